@@ -1,12 +1,17 @@
 import { API_URL, handleApiError } from './utils';
-import { ApiResponse, Question, ScanResult, QuestionBank } from './types';
+import { ApiResponse, ExtractionJob, Question, ScanResult, QuestionBank } from './types';
+
+// How often a queued PDF extraction is checked, and how long to wait for it at most
+const EXTRACTION_POLL_INTERVAL_MS = 3000;
+const EXTRACTION_MAX_WAIT_MS = 15 * 60 * 1000;
 
 /**
  * Question management API client
  */
 export const questionApi = {
   /**
-   * Scan PDF document to extract questions
+   * Scan PDF document to extract questions.
+   * The server queues the extraction, so this waits for the job to finish.
    */
   scanPdf: async (file: File, token: string): Promise<ApiResponse<ScanResult>> => {
     try {
@@ -26,8 +31,29 @@ export const questionApi = {
         return { error: errorMessage, statusCode: response.status };
       }
 
-      const data = await response.json();
-      return { data };
+      let job: ExtractionJob = await response.json();
+      const deadline = Date.now() + EXTRACTION_MAX_WAIT_MS;
+      while (job.processing_status === 'pending' || job.processing_status === 'processing') {
+        if (Date.now() >= deadline) {
+          return { error: 'PDF extraction is taking longer than expected. Please try again later.' };
+        }
+        await new Promise((resolve) => setTimeout(resolve, EXTRACTION_POLL_INTERVAL_MS));
+        const jobResponse = await fetch(`${API_URL}/question-extractor/jobs/${job.id}`, {
+          headers: {
+            'Authorization': `Bearer ${token}`
+          }
+        });
+        if (!jobResponse.ok) {
+          const errorMessage = await handleApiError(jobResponse);
+          return { error: errorMessage, statusCode: jobResponse.status };
+        }
+        job = await jobResponse.json();
+      }
+
+      if (job.processing_status === 'failed') {
+        return { error: job.error_message || 'Error processing PDF file' };
+      }
+      return { data: { questions: job.questions || [] } };
     } catch (error) {
       console.error('Scan PDF error:', error);
       return { error: 'Network error. Please check your connection and try again.' };
@@ -119,4 +119,14 @@ export interface ScanResult {
     difficulty_level?: string;
     marks?: number;
   }>;
+}
+
+export interface ExtractionJob {
+  id: string;
+  processing_status: 'pending' | 'processing' | 'completed' | 'failed';
+  pages_total?: number | null;
+  pages_processed: number;
+  questions_extracted: number;
+  questions?: ScanResult['questions'] | null;
+  error_message?: string | null;
 }
\ No newline at end of file
@@ -0,0 +1,191 @@
+"""
+Declarative index registry for every collection the routers query.
+
+Indexes are applied idempotently on application startup (disable with
+MONGO_ENSURE_INDEXES=false) or from the command line:
+
+    python -m apis.Ginny.indexes apply
+    python -m apis.Ginny.indexes report
+"""
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import ConnectionFailure, PyMongoError
+from typing import Dict, List
+import argparse
+import asyncio
+import json
+import logging
+import os
+from apis.Ginny.utils import get_database, close_mongo_clients
+
+logger = logging.getLogger(__name__)
+
+
+def _unique_id():
+    return IndexModel([("id", ASCENDING)], unique=True, name="id_unique")
+
+
+def _ancestors():
+    # Multikey index serving "everything below a node" lookups
+    return IndexModel([("ancestors", ASCENDING)], name="ancestors")
+
+
+# Database environment variable -> collection -> indexes
+INDEXES: Dict[str, Dict[str, List[IndexModel]]] = {
+    "MONGO_AUTH_DB": {
+        "users": [
+            IndexModel([("username", ASCENDING)], unique=True, name="username_unique"),
+            IndexModel([("email", ASCENDING)], unique=True, name="email_unique"),
+        ],
+    },
+    "MONGO_CURRICULUM_DB": {
+        "standards": [
+            _unique_id(),
+            IndexModel([("name", ASCENDING)], unique=True, name="name_unique"),
+        ],
+        # Parent-child lookups use the parent id prefix of the compound unique index
+        "subjects": [
+            _unique_id(),
+            IndexModel([("standard_id", ASCENDING), ("name", ASCENDING)], unique=True, name="standard_id_name_unique"),
+            _ancestors(),
+        ],
+        "chapters": [
+            _unique_id(),
+            IndexModel([("subject_id", ASCENDING), ("name", ASCENDING)], unique=True, name="subject_id_name_unique"),
+            _ancestors(),
+        ],
+        "topics": [
+            _unique_id(),
+            IndexModel([("chapter_id", ASCENDING), ("name", ASCENDING)], unique=True, name="chapter_id_name_unique"),
+            _ancestors(),
+        ],
+        "question_types": [
+            _unique_id(),
+            IndexModel([("name", ASCENDING)], unique=True, name="name_unique"),
+        ],
+        "tags": [
+            _unique_id(),
+            IndexModel([("name", ASCENDING)], unique=True, name="name_unique"),
+        ],
+        "curriculum_jobs": [
+            _unique_id(),
+        ],
+    },
+    "MONOGO_QUESTION_BANK_DB": {
+        "questions": [
+            _unique_id(),
+            IndexModel([("tags", ASCENDING)], name="tags"),
+            IndexModel([("topic_id", ASCENDING)], name="topic_id"),
+            IndexModel([("question_type_id", ASCENDING)], name="question_type_id"),
+            _ancestors(),
+        ],
+        "question_banks": [
+            _unique_id(),
+            IndexModel(
+                [("standard_id", ASCENDING), ("subject_id", ASCENDING), ("name", ASCENDING)],
+                unique=True,
+                name="standard_id_subject_id_name_unique"
+            ),
+        ],
+        # Workers claim the oldest pending extraction job
+        "question_bank_uploads": [
+            _unique_id(),
+            IndexModel([("processing_status", ASCENDING), ("created_at", ASCENDING)], name="processing_status_created_at"),
+        ],
+        # Page results keyed by content hash, see apis.Hermione.extraction_cache
+        "extraction_cache": [
+            _unique_id(),
+            IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_at_ttl"),
+        ],
+        # One document per provider model and minute, see apis.Ginny.ratelimit
+        "llm_rate_leases": [
+            IndexModel([("key", ASCENDING), ("window", ASCENDING)], unique=True, name="key_window_unique"),
+            IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_at_ttl"),
+        ],
+        "papers": [
+            _unique_id(),
+            # Serves the keyset-paginated paper list of a user
+            IndexModel(
+                [("created_by", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+                name="created_by_created_at_id"
+            ),
+        ],
+    },
+}
+
+
+def _registered_collections():
+    """Yield (database name, collection name, indexes) for every configured database"""
+    for db_env, collections in INDEXES.items():
+        db_name = os.getenv(db_env)
+        if not db_name:
+            logger.warning("%s is not set, skipping its indexes", db_env)
+            continue
+        for collection_name, indexes in collections.items():
+            yield db_name, collection_name, indexes
+
+
+async def ensure_indexes() -> dict:
+    """Create every registered index, returning the names that failed per collection"""
+    failures = {}
+    for db_name, collection_name, indexes in _registered_collections():
+        collection = get_database(db_name)[collection_name]
+        for index in indexes:
+            # One index at a time so a single conflict doesn't hide the others
+            try:
+                await collection.create_indexes([index])
+            except ConnectionFailure as e:
+                # No point trying the remaining indexes against an unreachable server
+                logger.warning("Could not reach MongoDB to create indexes: %s", e)
+                failures[db_name] = ["unreachable"]
+                return failures
+            except PyMongoError as e:
+                name = index.document["name"]
+                logger.warning("Could not create index %s on %s.%s: %s", name, db_name, collection_name, e)
+                failures.setdefault(f"{db_name}.{collection_name}", []).append(name)
+    return failures
+
+
+def compare_indexes(declared: List[IndexModel], existing: dict, usage: dict) -> dict:
+    """
+    Compare declared indexes with the ones present on a collection.
+
+    `existing` is the output of index_information() and `usage` maps index
+    names to the number of operations reported by $indexStats, which is
+    only counted since the last mongod restart.
+    """
+    declared_names = [index.document["name"] for index in declared]
+    existing_names = [name for name in existing if name != "_id_"]
+    return {
+        "missing": [name for name in declared_names if name not in existing],
+        "unregistered": [name for name in existing_names if name not in declared_names],
+        "unused": [name for name in existing_names if usage.get(name, 0) == 0],
+    }
+
+
+async def index_report() -> dict:
+    """Report missing, unregistered and unused indexes for every registered collection"""
+    report = {}
+    for db_name, collection_name, indexes in _registered_collections():
+        collection = get_database(db_name)[collection_name]
+        existing = await collection.index_information()
+        cursor = await collection.aggregate([{"$indexStats": {}}])
+        usage = {stat["name"]: stat["accesses"]["ops"] async for stat in cursor}
+        report[f"{db_name}.{collection_name}"] = compare_indexes(indexes, existing, usage)
+    return report
+
+
+async def _run(command: str):
+    try:
+        if command == "apply":
+            result = await ensure_indexes()
+        else:
+            result = await index_report()
+        print(json.dumps(result, indent=2))
+    finally:
+        await close_mongo_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply or audit MongoDB indexes")
+    parser.add_argument("command", choices=["apply", "report"])
+    asyncio.run(_run(parser.parse_args().command))
@@ -0,0 +1,205 @@
+"""
+Minimal Prometheus metrics exported in the text exposition format.
+
+Metrics are process-local, so with several uvicorn workers each worker
+has to be scraped on its own (or the counters summed by Prometheus).
+"""
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Sequence, Tuple
+from apis.Ginny.utils import get_pool_stats
+import bisect
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: Tuple[str, str] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    metric_type = ""
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[tuple, object] = {}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.metric_type}"]
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    metric_type = "gauge"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, description, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.setdefault(key, {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0})
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                state["buckets"][index] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _render_sample(self, key, value) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, value["buckets"]):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key, ("le", "+Inf"))
+        lines.append(f"{self.name}_bucket{labels} {value['count']}")
+        lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(value['sum'])}")
+        lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {value['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]):
+        """Register a callback that refreshes gauges right before each scrape"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+http_requests_total = REGISTRY.register(Counter(
+    "http_requests_total", "HTTP requests by route template and status", ["method", "route", "status"]
+))
+http_request_duration_seconds = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ["method", "route"]
+))
+http_requests_in_flight = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served"
+))
+llm_request_duration_seconds = REGISTRY.register(Histogram(
+    "llm_request_duration_seconds", "Latency of LLM provider calls", ["provider", "model"],
+    buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+))
+llm_request_failures_total = REGISTRY.register(Counter(
+    "llm_request_failures_total", "LLM provider calls that failed or returned unusable output", ["provider", "model", "reason"]
+))
+llm_request_retries_total = REGISTRY.register(Counter(
+    "llm_request_retries_total", "LLM provider calls retried after a rate limit or server error", ["provider", "model", "reason"]
+))
+extraction_cache_hits_total = REGISTRY.register(Counter(
+    "extraction_cache_hits_total", "Page extractions answered from the cache by layer (memory, mongo)", ["layer"]
+))
+extraction_cache_misses_total = REGISTRY.register(Counter(
+    "extraction_cache_misses_total", "Page extractions that had to call the provider"
+))
+curriculum_cache_hits_total = REGISTRY.register(Counter(
+    "curriculum_cache_hits_total", "Curriculum lookups served from the cache by collection (or topic_path)", ["collection"]
+))
+curriculum_cache_misses_total = REGISTRY.register(Counter(
+    "curriculum_cache_misses_total", "Curriculum lookups that queried MongoDB by collection (or topic_path)", ["collection"]
+))
+
+mongo_pool_connections = REGISTRY.register(Gauge(
+    "mongo_pool_connections", "MongoDB pool connections by state (open, in_use, waiting, max)", ["uri", "state"]
+))
+
+
+def _collect_pool_stats():
+    for uri, stats in get_pool_stats().items():
+        mongo_pool_connections.set(stats["connections_open"], uri=uri, state="open")
+        mongo_pool_connections.set(stats["connections_in_use"], uri=uri, state="in_use")
+        mongo_pool_connections.set(stats["waiting_for_connection"], uri=uri, state="waiting")
+        mongo_pool_connections.set(stats["max_pool_size"], uri=uri, state="max")
+
+
+REGISTRY.add_collector(_collect_pool_stats)
+
+
+@contextmanager
+def track_llm_call(provider: str, model: str):
+    """Time an LLM call and count it as a failure if it raises"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        llm_request_failures_total.inc(provider=provider, model=model, reason="error")
+        raise
+    finally:
+        llm_request_duration_seconds.observe(time.perf_counter() - start, provider=provider, model=model)
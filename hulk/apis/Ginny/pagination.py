@@ -0,0 +1,134 @@
+"""
+Keyset (cursor) pagination shared by the list routes.
+
+Pages are sorted on a unique key (e.g. created_at then id) and the next
+page starts after the last item of the previous one, so every page costs
+one index range scan no matter how deep the client goes. Cursors are
+opaque to clients: base64 of the sort values of the last item. The body
+stays a plain list and the cursor of the next page is sent in the
+X-Next-Cursor header, absent on the last page.
+
+List routes take PageParams as a dependency for the shared cursor, limit
+and fields query parameters.
+"""
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from bson import json_util
+from datetime import datetime
+from fastapi import HTTPException, Query, status
+from pydantic import BaseModel
+from pymongo import DESCENDING
+from typing import List, Optional, Tuple, Type
+from apis.Ginny.responses import model_projection, trusted_response
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+Sort = List[Tuple[str, int]]
+
+# Sort values a cursor may carry, anything else (e.g. {"$ne": null}) would
+# change the query instead of positioning it
+CURSOR_VALUE_TYPES = (str, int, float, bool, datetime, type(None))
+
+
+def encode_cursor(values: dict) -> str:
+    return urlsafe_b64encode(json_util.dumps(values).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json_util.loads(urlsafe_b64decode(padded.encode()))
+    except Exception:
+        values = None
+    if not isinstance(values, dict):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+    return values
+
+
+def keyset_filter(sort: Sort, cursor: Optional[str]) -> dict:
+    """Filter matching the documents that come after the cursor in `sort` order"""
+    if not cursor:
+        return {}
+    after = decode_cursor(cursor)
+    if set(after) != {field for field, _ in sort} or not all(isinstance(value, CURSOR_VALUE_TYPES) for value in after.values()):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        clause = {previous: after[previous] for previous, _ in sort[:i]}
+        clause[field] = {"$lt" if direction == DESCENDING else "$gt": after[field]}
+        clauses.append(clause)
+    return {"$or": clauses}
+
+
+def paginate(items: list, sort: Sort, limit: int) -> Tuple[list, Optional[str]]:
+    """
+    Trim a page fetched with `limit + 1` and build the cursor of the next one.
+
+    The extra item only tells us whether another page exists.
+    """
+    if len(items) <= limit:
+        return items, None
+    items = items[:limit]
+    last = items[-1]
+    return items, encode_cursor({field: last[field] for field, _ in sort})
+
+
+def next_cursor_headers(cursor: Optional[str]) -> dict:
+    return {NEXT_CURSOR_HEADER: cursor} if cursor else {}
+
+
+class PageParams:
+    """Query parameters shared by the paginated list routes"""
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Items per page"),
+        fields: Optional[str] = Query(None, description="Comma-separated fields to return, id is always included"),
+    ):
+        self.cursor = cursor
+        self.limit = limit
+        self.fields = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+
+    def projection(self, model: Type[BaseModel], sort: Sort) -> dict:
+        """Project the requested fields plus the sort keys the next cursor is built from"""
+        if not self.fields:
+            return model_projection(model)
+        unknown = [field for field in self.fields if field not in model.model_fields]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}"
+            )
+        projection = {field: 1 for field in ["id", *self.fields]}
+        projection.update({field: 1 for field, _ in sort})
+        projection["_id"] = 0
+        return projection
+
+    async def fetch(self, collection, query: dict, sort: Sort, projection: dict) -> Tuple[list, Optional[str]]:
+        """Run one page of `query`, returning the documents and the next cursor"""
+        find = collection.find({**query, **keyset_filter(sort, self.cursor)}, projection).sort(sort)
+        return paginate(await find.limit(self.limit + 1).to_list(), sort, self.limit)
+
+    def respond(self, documents: list, model: Type[BaseModel], cursor: Optional[str]):
+        """
+        Validate full documents against the model, or return only the requested fields.
+
+        Partial documents can't satisfy the model, and are read from our own
+        collections, so they take the trusted path.
+        """
+        headers = next_cursor_headers(cursor)
+        if not self.fields:
+            return trusted_response([model(**document).model_dump() for document in documents], headers=headers)
+        keep = ["id", *self.fields]
+        return trusted_response(
+            [{field: document[field] for field in keep if field in document} for document in documents],
+            headers=headers
+        )
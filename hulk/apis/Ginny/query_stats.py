@@ -0,0 +1,96 @@
+"""
+Per-request MongoDB query instrumentation.
+
+A CommandListener registered on every pooled client adds each command to
+the QueryStats of the request that issued it, tracked through a context
+variable set by the middleware in main.py.
+"""
+from collections import Counter
+from contextvars import ContextVar
+from pymongo.monitoring import CommandListener
+from typing import Optional
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Cursor continuations are extra round trips of a command, not new queries
+_CONTINUATION_COMMANDS = {"getMore", "killCursors"}
+
+
+class QueryStats:
+    """MongoDB usage of a single request"""
+
+    def __init__(self):
+        self.commands = 0
+        self.round_trips = 0
+        self.duration_micros = 0
+        self.by_command = Counter()
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration_micros / 1000
+
+    def headers(self) -> dict:
+        return {
+            "X-DB-Commands": str(self.commands),
+            "X-DB-Round-Trips": str(self.round_trips),
+            "X-DB-Time-Ms": f"{self.duration_ms:.2f}",
+        }
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("mongo_query_stats", default=None)
+
+
+def start_request_stats() -> QueryStats:
+    """Start collecting query stats for the current request"""
+    stats = QueryStats()
+    _current_stats.set(stats)
+    return stats
+
+
+def get_request_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+class QueryStatsListener(CommandListener):
+    """Adds every command to the stats of the request that issued it"""
+
+    def started(self, event):
+        stats = _current_stats.get()
+        if stats is None:
+            return
+        stats.round_trips += 1
+        if event.command_name not in _CONTINUATION_COMMANDS:
+            stats.commands += 1
+            target = event.command.get(event.command_name)
+            collection = target if isinstance(target, str) else event.database_name
+            stats.by_command[f"{event.command_name} {collection}"] += 1
+
+    def succeeded(self, event):
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.duration_micros += event.duration_micros
+
+    def failed(self, event):
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.duration_micros += event.duration_micros
+
+
+query_stats_listener = QueryStatsListener()
+
+
+def get_query_warn_threshold() -> int:
+    return int(os.getenv("MONGO_QUERY_WARN_THRESHOLD", "25"))
+
+
+def check_query_threshold(stats: QueryStats, method: str, route: str):
+    """Log a warning when a request issued more commands than the configured threshold"""
+    threshold = get_query_warn_threshold()
+    if threshold and stats.commands > threshold:
+        top_commands = ", ".join(f"{name} x{count}" for name, count in stats.by_command.most_common(3))
+        logger.warning(
+            "%s %s issued %d MongoDB commands (threshold %d, %.1f ms): %s",
+            method, route, stats.commands, threshold, stats.duration_ms, top_commands
+        )
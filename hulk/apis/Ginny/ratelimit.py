@@ -0,0 +1,264 @@
+"""
+Rate limiting for LLM providers.
+
+Every provider and model gets one limiter per process, made of two token
+buckets refilled continuously: requests per minute and tokens per minute.
+Calls go through RateLimiter.call(), which waits for both buckets and
+retries 429 and 5xx responses with exponential backoff and full jitter. A
+429 pauses the whole limiter, so concurrent callers back off together
+instead of each spending a request to find out the quota is gone.
+
+Limits come from the environment, per provider:
+
+    GEMINI_REQUESTS_PER_MINUTE=13  GEMINI_TOKENS_PER_MINUTE=1000000
+    OPENAI_REQUESTS_PER_MINUTE=10  OPENAI_TOKENS_PER_MINUTE=60000
+
+With LLM_RATE_LIMIT_SHARED=true each request also takes a lease in the
+`llm_rate_leases` collection, which counts the requests and tokens used
+in the current minute by every API and worker process together. Leases
+are taken for the estimated tokens and the difference with the reported
+usage is added to the minute the call finished in.
+"""
+from datetime import datetime, timedelta
+from pymongo.errors import DuplicateKeyError
+from typing import Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+import asyncio
+import logging
+import os
+import random
+import time
+import weakref
+from apis.Ginny.metrics import llm_request_retries_total
+from apis.Ginny.utils import get_database
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+LEASES_COLLECTION = "llm_rate_leases"
+
+# Provider -> (requests per minute, tokens per minute)
+DEFAULT_LIMITS = {
+    "gemini": (13, 1_000_000),
+    "openai": (10, 60_000),
+}
+FALLBACK_LIMITS = (60, 1_000_000)
+
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "1"))
+BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "60"))
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def get_leases_collection():
+    return get_database(os.getenv("MONOGO_QUESTION_BANK_DB"))[LEASES_COLLECTION]
+
+
+class TokenBucket:
+    """Bucket holding up to one minute of quota, refilled continuously"""
+
+    def __init__(self, per_minute: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available"""
+        self._refill()
+        # A single request larger than the bucket waits for a full bucket
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.tokens) / self.rate)
+
+    def take(self, amount: float):
+        """Remove tokens, going into debt if a request used more than estimated"""
+        self._refill()
+        self.tokens -= amount
+
+
+def error_status(error: Exception) -> Optional[int]:
+    """HTTP status of a provider error (OpenAI status_code, Google API code)"""
+    for attribute in ("status_code", "code"):
+        value = getattr(error, attribute, None)
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Delay requested by the provider in a Retry-After header, if any"""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    try:
+        return float(headers.get("retry-after")) if headers else None
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+class RateLimiter:
+    """Request and token buckets of one provider model"""
+
+    def __init__(
+        self,
+        provider: str,
+        model: str,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        shared: bool = False,
+        clock: Callable[[], float] = time.monotonic,
+        wall_clock: Callable[[], float] = time.time,
+    ):
+        self.provider = provider
+        self.model = model
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.shared = shared
+        self.clock = clock
+        self.wall_clock = wall_clock
+        self.requests = TokenBucket(requests_per_minute, clock)
+        self.tokens = TokenBucket(tokens_per_minute, clock)
+        self.paused_until = 0.0
+        # Locks belong to the event loop that first waits on them, one per loop
+        self._locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+    def _lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if loop not in self._locks:
+            self._locks[loop] = asyncio.Lock()
+        return self._locks[loop]
+
+    def _window(self) -> int:
+        return int(self.wall_clock() // 60)
+
+    def pause(self, seconds: float):
+        """Hold every caller back, e.g. after the provider answered 429"""
+        self.paused_until = max(self.paused_until, self.clock() + seconds)
+
+    def wait_time(self, tokens: float) -> float:
+        return max(
+            self.paused_until - self.clock(),
+            self.requests.wait_time(1),
+            self.tokens.wait_time(tokens),
+        )
+
+    async def acquire(self, tokens: float):
+        """Wait until one request of about `tokens` tokens fits the quota"""
+        # Waiters queue on the lock, so they are served in arrival order
+        async with self._lock():
+            while (wait := self.wait_time(tokens)) > 0:
+                await asyncio.sleep(wait)
+            self.requests.take(1)
+            self.tokens.take(tokens)
+        if self.shared:
+            await self._take_lease(tokens)
+
+    async def record_usage(self, estimated: float, actual: Optional[float]):
+        """Settle the token buckets once the provider reported the real usage"""
+        if actual is None or actual == estimated:
+            return
+        self.tokens.take(actual - estimated)
+        if self.shared:
+            try:
+                await get_leases_collection().update_one(
+                    {"key": self.key, "window": self._window()},
+                    {
+                        "$inc": {"tokens": actual - estimated},
+                        "$setOnInsert": {"requests": 0, "expires_at": datetime.now() + timedelta(minutes=2)},
+                    },
+                    upsert=True
+                )
+            except Exception:
+                logger.exception("Could not settle the shared token usage of %s", self.key)
+
+    @property
+    def key(self) -> str:
+        return f"{self.provider}:{self.model}"
+
+    async def _take_lease(self, tokens: float):
+        """Count the request in this minute's window shared by every process"""
+        leases = get_leases_collection()
+        tokens = min(tokens, self.tokens_per_minute)
+        while True:
+            window = self._window()
+            try:
+                # Only matches while the window has room, otherwise the upsert
+                # collides with the existing window on the unique index
+                await leases.update_one(
+                    {
+                        "key": self.key,
+                        "window": window,
+                        "requests": {"$lt": self.requests_per_minute},
+                        "tokens": {"$lte": self.tokens_per_minute - tokens},
+                    },
+                    {
+                        "$inc": {"requests": 1, "tokens": tokens},
+                        "$setOnInsert": {"expires_at": datetime.now() + timedelta(minutes=2)},
+                    },
+                    upsert=True
+                )
+                return
+            except DuplicateKeyError:
+                # Check again once the next minute starts
+                await asyncio.sleep(60 - self.wall_clock() % 60 + random.uniform(0, 1))
+
+    async def call(
+        self,
+        func: Callable[[], Awaitable[T]],
+        tokens: float = 1,
+        retries: int = MAX_RETRIES,
+    ) -> T:
+        """Run `func` within the quota, retrying rate limits and server errors"""
+        attempt = 0
+        while True:
+            await self.acquire(tokens)
+            try:
+                return await func()
+            except Exception as e:
+                status_code = error_status(e)
+                if status_code not in RETRYABLE_STATUS or attempt >= retries:
+                    raise
+                delay = retry_after(e) or backoff_delay(attempt)
+                reason = "rate_limited" if status_code == 429 else "server_error"
+                llm_request_retries_total.inc(provider=self.provider, model=self.model, reason=reason)
+                logger.warning(
+                    "%s %s returned %s, retrying in %.1fs (attempt %d of %d)",
+                    self.provider, self.model, status_code, delay, attempt + 1, retries
+                )
+                attempt += 1
+                if status_code == 429:
+                    # The quota is shared, so every caller waits, not just this one
+                    self.pause(delay)
+                else:
+                    await asyncio.sleep(delay)
+
+
+_limiters: Dict[Tuple[str, str], RateLimiter] = {}
+
+
+def get_limiter(provider: str, model: str) -> RateLimiter:
+    """Process-wide limiter of a provider model, configured from the environment"""
+    key = (provider, model)
+    if key not in _limiters:
+        requests_per_minute, tokens_per_minute = DEFAULT_LIMITS.get(provider, FALLBACK_LIMITS)
+        prefix = provider.upper()
+        _limiters[key] = RateLimiter(
+            provider,
+            model,
+            requests_per_minute=float(os.getenv(f"{prefix}_REQUESTS_PER_MINUTE", requests_per_minute)),
+            tokens_per_minute=float(os.getenv(f"{prefix}_TOKENS_PER_MINUTE", tokens_per_minute)),
+            shared=os.getenv("LLM_RATE_LIMIT_SHARED", "false").lower() == "true",
+        )
+    return _limiters[key]
@@ -0,0 +1,67 @@
+"""
+Fast JSON responses for large payloads.
+
+FastJSONResponse serializes with orjson instead of the standard library
+encoder. Routes opt in with `response_class=FastJSONResponse`; returning
+`trusted_response(...)` additionally skips response_model validation for
+documents the server wrote itself, so only use it for data read straight
+from our own collections.
+"""
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from typing import Any, Type
+import orjson
+
+
+def _default(value):
+    """Fallback for types orjson doesn't handle natively (ObjectId, Decimal128, models)"""
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    return str(value)
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def strip_mongo_id(document: dict) -> dict:
+    document.pop("_id", None)
+    return document
+
+
+def trusted_response(content: Any, status_code: int = 200, headers: dict = None) -> FastJSONResponse:
+    """
+    Serialize server-written documents without re-validating them.
+
+    Returning a Response from a route bypasses response_model, so callers
+    should project the fields the model declares (see model_projection)
+    to keep the body identical to the validated one.
+    """
+    if isinstance(content, dict):
+        strip_mongo_id(content)
+    elif isinstance(content, list):
+        for item in content:
+            if isinstance(item, dict):
+                strip_mongo_id(item)
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
+
+
+def model_projection(model: Type[BaseModel]) -> dict:
+    """MongoDB projection returning exactly the fields of a response model"""
+    projection = {name: 1 for name in model.model_fields}
+    projection["_id"] = 0
+    return projection
+
+
+def sse_event(event: str, data: Any) -> bytes:
+    """One Server-Sent Events message with a JSON payload"""
+    return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
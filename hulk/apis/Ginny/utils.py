@@ -1,24 +1,146 @@
-from pymongo import MongoClient
+from pymongo import AsyncMongoClient
+from pymongo.monitoring import ConnectionPoolListener
+from apis.Ginny.query_stats import query_stats_listener
 from dotenv import load_dotenv
+from typing import Dict, Optional
 import os
+import re
+import threading
 load_dotenv(dotenv_path=".env")
 
+DEFAULT_MONGO_URI = "mongodb://localhost:27017"
+
 _test_db = None
 
+# One pooled client per URI, shared by every router for the lifetime of the process
+_clients: Dict[str, AsyncMongoClient] = {}
+_pool_listeners: Dict[str, "PoolStatsListener"] = {}
+_clients_lock = threading.Lock()
+
 def set_test_db(db):
     global _test_db
     _test_db = db
 
-def get_mongo_client() -> MongoClient:
-    client = MongoClient(os.getenv("MONGO_URI"))
+
+class PoolStatsListener(ConnectionPoolListener):
+    """Keeps running connection pool counters for a single client"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats = {
+            "connections_open": 0,
+            "connections_in_use": 0,
+            "waiting_for_connection": 0,
+            "connections_created_total": 0,
+            "checkouts_total": 0,
+            "checkout_failures_total": 0,
+            "pool_clears_total": 0,
+        }
+
+    def _add(self, **changes):
+        with self._lock:
+            for key, value in changes.items():
+                self.stats[key] += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self.stats)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._add(pool_clears_total=1)
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._add(connections_open=1, connections_created_total=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._add(connections_open=-1)
+
+    def connection_check_out_started(self, event):
+        self._add(waiting_for_connection=1)
+
+    def connection_check_out_failed(self, event):
+        self._add(waiting_for_connection=-1, checkout_failures_total=1)
+
+    def connection_checked_out(self, event):
+        self._add(waiting_for_connection=-1, connections_in_use=1, checkouts_total=1)
+
+    def connection_checked_in(self, event):
+        self._add(connections_in_use=-1)
+
+
+def get_pool_options() -> dict:
+    """Connection pool settings shared by every client, configurable through the environment"""
+    options = {
+        "maxPoolSize": int(os.getenv("MONGO_MAX_POOL_SIZE", "100")),
+        "minPoolSize": int(os.getenv("MONGO_MIN_POOL_SIZE", "0")),
+    }
+    if os.getenv("MONGO_MAX_IDLE_TIME_MS"):
+        options["maxIdleTimeMS"] = int(os.getenv("MONGO_MAX_IDLE_TIME_MS"))
+    if os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS"):
+        options["waitQueueTimeoutMS"] = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS"))
+    return options
+
+def get_mongo_client(uri: Optional[str] = None) -> AsyncMongoClient:
+    """Return the process-wide pooled client for a URI, creating it on first use"""
+    uri = uri or os.getenv("MONGO_URI", DEFAULT_MONGO_URI)
+    client = _clients.get(uri)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        client = _clients.get(uri)
+        if client is None:
+            listener = PoolStatsListener()
+            client = AsyncMongoClient(
+                uri,
+                uuidRepresentation="standard",
+                event_listeners=[listener, query_stats_listener],
+                **get_pool_options()
+            )
+            _clients[uri] = client
+            _pool_listeners[uri] = listener
     return client
 
+def get_database(db_name: Optional[str]):
+    """Get an async database handle from the shared client"""
+    return get_mongo_client()[db_name]
+
 def get_auth_db():
     global _test_db
     if _test_db is not None:
-        return _test_db
-        
-    client = get_mongo_client()
-    db = client[os.getenv("MONGO_AUTH_DB")]
-    return db
+        # Tests hand over a synchronous database, route to the same database on the async client
+        return get_database(_test_db.name)
+
+    return get_database(os.getenv("MONGO_AUTH_DB"))
+
+def _redact_uri(uri: str) -> str:
+    return re.sub(r"//[^@/]+@", "//***@", uri)
+
+def get_pool_stats() -> dict:
+    """Connection pool usage for every registered client, keyed by URI without credentials"""
+    max_pool_size = get_pool_options()["maxPoolSize"]
+    stats = {}
+    for uri, listener in list(_pool_listeners.items()):
+        stats[_redact_uri(uri)] = {**listener.snapshot(), "max_pool_size": max_pool_size}
+    return stats
 
+async def close_mongo_clients():
+    """Close every pooled client, called once on application shutdown"""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+        _pool_listeners.clear()
+    for client in clients:
+        await client.close()
@@ -0,0 +1,84 @@
+"""
+Per-collection change versions for conditional GETs.
+
+Every write to a versioned collection bumps its counter in the
+`collection_versions` collection of the curriculum database. Read routes
+declare the collections their body depends on with
+`dependencies=[Depends(conditional_get(...))]`: the ETag is derived from
+those versions and the request URL, so a matching If-None-Match is
+answered with 304 after a single small read, before the route queries
+or serializes anything. The ETag header itself is added by the
+middleware in main.py from request.state.
+
+The versions are read before the route reads its data, so a write racing
+with a read can only cause an extra 200, never a stale 304. The check
+authenticates the caller first and the ETag includes the username, so an
+anonymous request gets its 401 without touching Mongo and one user's
+copy never validates for another.
+"""
+from fastapi import Depends, HTTPException, Request, status
+from hashlib import sha1
+from pymongo import UpdateOne
+import os
+from apis.Ginny.utils import get_database
+from security.main import TokenData, get_current_user
+
+# Bump when the shape of the versioned responses changes, so clients
+# don't keep bodies rendered by an older release
+RESPONSE_FORMAT_VERSION = 1
+VERSIONS_COLLECTION = "collection_versions"
+
+
+def _versions():
+    return get_database(os.getenv("MONGO_CURRICULUM_DB"))[VERSIONS_COLLECTION]
+
+
+async def bump_versions(*collections: str):
+    """Record that the given collections changed"""
+    if collections:
+        await _versions().bulk_write(
+            [UpdateOne({"_id": name}, {"$inc": {"version": 1}}, upsert=True) for name in set(collections)],
+            ordered=False
+        )
+
+
+async def get_versions(collections) -> dict:
+    versions = {name: 0 for name in collections}
+    async for document in _versions().find({"_id": {"$in": list(collections)}}):
+        versions[document["_id"]] = document["version"]
+    return versions
+
+
+def make_etag(url: str, versions: dict, username: str = "") -> str:
+    key = "|".join([str(RESPONSE_FORMAT_VERSION), username, url, *(f"{name}:{versions[name]}" for name in sorted(versions))])
+    return f'"{sha1(key.encode()).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in candidates
+
+
+def conditional_get(*collections: str):
+    """Dependency answering 304 when none of `collections` changed since the client's copy"""
+
+    # Same dependency as the route's, so FastAPI resolves it once per request
+    async def check(request: Request, current_user: TokenData = Depends(get_current_user)):
+        etag = make_etag(
+            str(request.url.path) + "?" + request.url.query,
+            await get_versions(collections),
+            current_user.username
+        )
+        if etag_matches(request.headers.get("if-none-match", ""), etag):
+            raise HTTPException(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={"ETag": etag, "Cache-Control": "private, no-cache"}
+            )
+        request.state.etag = etag
+
+    return check
@@ -24,14 +24,14 @@ async def register(user_create: UserCreate, current_admin = Depends(get_current_
     db = get_auth_db()
     users_collection = db["users"]
     
-    existing_user = users_collection.find_one({"username": user_create.username})
+    existing_user = await users_collection.find_one({"username": user_create.username})
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already registered"
         )
     
-    existing_email = users_collection.find_one({"email": user_create.email})
+    existing_email = await users_collection.find_one({"email": user_create.email})
     if existing_email:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -48,7 +48,7 @@ async def register(user_create: UserCreate, current_admin = Depends(get_current_
     hashed_password = get_password_hash(user_create.password)
     user_dict["password"] = hashed_password
     
-    result = users_collection.insert_one(user_dict)
+    result = await users_collection.insert_one(user_dict)
     
     if not result.acknowledged:
         raise HTTPException(
@@ -70,7 +70,7 @@ async def create_initial_admin(user_create: UserCreate):
     db = get_auth_db()
     users_collection = db["users"]
     
-    existing_users_count = users_collection.count_documents({})
+    existing_users_count = await users_collection.count_documents({})
     if existing_users_count > 0:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -85,7 +85,7 @@ async def create_initial_admin(user_create: UserCreate):
     hashed_password = get_password_hash(user_create.password)
     user_dict["password"] = hashed_password
     
-    result = users_collection.insert_one(user_dict)
+    result = await users_collection.insert_one(user_dict)
     
     if not result.acknowledged:
         raise HTTPException(
@@ -100,10 +100,10 @@ async def create_initial_admin(user_create: UserCreate):
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     db = get_auth_db()
     users_collection = db["users"]
-    user = users_collection.find_one({"username": form_data.username})
+    user = await users_collection.find_one({"username": form_data.username})
     
     if not user:
-        user = users_collection.find_one({"email": form_data.username})
+        user = await users_collection.find_one({"email": form_data.username})
     
     if not user or not verify_password(form_data.password, user["password"]):
         raise HTTPException(
@@ -127,7 +127,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
 async def get_current_user_info(token_data = Depends(get_current_user)):
     db = get_auth_db()
     users_collection = db["users"]
-    user = users_collection.find_one({"username": token_data.username})
+    user = await users_collection.find_one({"username": token_data.username})
     
     if not user:
         raise HTTPException(
@@ -0,0 +1,91 @@
+"""
+Materialized ancestor paths.
+
+Every curriculum node stores the ids of the nodes above it, root first, in
+`ancestors` (standards have none), and every question stores the ids of
+its standard, subject, chapter and topic the same way. The field has a
+multikey index in each collection, so "everything below X" is a single
+indexed {"ancestors": X} query whatever level X is at. Nodes can't move
+to another parent, so paths are written once when a node is created.
+
+Data created before the field existed is filled in with
+
+    python -m apis.Harry.ancestors migrate
+"""
+from pymongo import UpdateOne
+from typing import Dict, List
+import argparse
+import asyncio
+import json
+import logging
+from apis.Ginny.utils import close_mongo_clients
+from .cache import curriculum_changed
+from .db_init import get_curriculum_db
+from .tags import get_questions_collection
+from .tree import LEVELS
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_BATCH_SIZE = 1_000
+
+# Update pipeline expression rebuilding a question's path from its own ids,
+# skipping the levels it has been detached from
+QUESTION_ANCESTORS = {"$filter": {
+    "input": ["$standard_id", "$subject_id", "$chapter_id", "$topic_id"],
+    "cond": {"$ne": ["$$this", None]},
+}}
+
+
+def child_ancestors(parent: dict) -> List[str]:
+    """The ancestors of a new child of `parent`"""
+    return [*parent.get("ancestors", []), parent["id"]]
+
+
+async def migrate_ancestors() -> dict:
+    """Write the ancestor path of every curriculum node and question"""
+    db = get_curriculum_db()
+    updated = {}
+
+    # Paths of the level being processed, keyed by node id
+    paths: Dict[str, List[str]] = {}
+    for _, collection_name, parent_field in LEVELS:
+        collection = db[collection_name]
+        next_paths = {}
+        operations = []
+        orphans = 0
+        async for node in collection.find({}, {"_id": 0, "id": 1, parent_field or "id": 1}):
+            if parent_field:
+                if node.get(parent_field) not in paths:
+                    orphans += 1
+                    continue
+                ancestors = paths[node[parent_field]]
+            else:
+                ancestors = []
+            operations.append(UpdateOne({"id": node["id"]}, {"$set": {"ancestors": ancestors}}))
+            next_paths[node["id"]] = [*ancestors, node["id"]]
+        for start in range(0, len(operations), MIGRATION_BATCH_SIZE):
+            await collection.bulk_write(operations[start:start + MIGRATION_BATCH_SIZE], ordered=False)
+        if orphans:
+            logger.warning("Skipped %d %s whose parent doesn't exist", orphans, collection_name)
+        updated[collection_name] = len(operations)
+        paths = next_paths
+
+    result = await get_questions_collection().update_many({}, [{"$set": {"ancestors": QUESTION_ANCESTORS}}])
+    updated["questions"] = result.modified_count
+
+    await curriculum_changed(*(collection_name for _, collection_name, _ in LEVELS))
+    return updated
+
+
+async def _run():
+    try:
+        print(json.dumps(await migrate_ancestors(), indent=2))
+    finally:
+        await close_mongo_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain curriculum ancestor paths")
+    parser.add_argument("command", choices=["migrate"])
+    parser.parse_args()
+    asyncio.run(_run())
@@ -0,0 +1,184 @@
+"""
+In-process cache of curriculum documents.
+
+Curriculum data changes rarely but is read by every router, so standards,
+subjects, chapters, topics and question types are cached by id with a TTL
+and a bound on the number of entries. Topics are also memoized with their
+whole path (standard, subject, chapter), which question creation and
+paper generation validate against. Harry's write routes call
+invalidate(), which empties the cache and bumps its version; lookups that
+were already in flight when the version changed don't store their result,
+so a stale read can't repopulate the cache. Other workers pick up changes
+once their entries expire (CURRICULUM_CACHE_TTL_SECONDS).
+
+Cached documents are shared, callers must not modify them.
+"""
+from collections import OrderedDict
+from typing import Dict, Iterable, NamedTuple, Optional
+import os
+import time
+from apis.Ginny.metrics import curriculum_cache_hits_total, curriculum_cache_misses_total
+from apis.Ginny.versions import bump_versions
+from .db_init import get_curriculum_db
+
+# Joins a topic to its chapter, subject and standard in one round trip,
+# subjects and standards are found through the topic's ancestor path
+TOPIC_PATH_LOOKUPS = [
+    {"$lookup": {
+        "from": collection,
+        "localField": local_field,
+        "foreignField": "id",
+        "pipeline": [{"$project": {"_id": 0}}],
+        "as": collection,
+    }}
+    for collection, local_field in [("chapters", "chapter_id"), ("subjects", "ancestors"), ("standards", "ancestors")]
+]
+
+
+class TopicPath(NamedTuple):
+    """A topic with the nodes above it, None for any level that doesn't exist"""
+    standard: Optional[dict]
+    subject: Optional[dict]
+    chapter: Optional[dict]
+    topic: dict
+
+
+class CurriculumCache:
+    def __init__(self, ttl_seconds: float = None, max_entries: int = None):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv("CURRICULUM_CACHE_TTL_SECONDS", "300"))
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("CURRICULUM_CACHE_MAX_ENTRIES", "50000"))
+        self.version = 0
+        # (collection name, id) -> (expires at, document), least recently used first
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+    def invalidate(self):
+        """Drop every entry, called after any curriculum write"""
+        self.version += 1
+        self._entries.clear()
+
+    def _lookup(self, key) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, document = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return document
+
+    def _store(self, key, document: dict):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, document)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_many(self, collection_name: str, ids: Iterable[str]) -> Dict[str, dict]:
+        """Documents by id, loading the ones not cached with a single query"""
+        found = {}
+        missing = []
+        for doc_id in set(ids):
+            if doc_id is None:
+                continue
+            document = self._lookup((collection_name, doc_id))
+            if document is None:
+                missing.append(doc_id)
+            else:
+                found[doc_id] = document
+        curriculum_cache_hits_total.inc(len(found), collection=collection_name)
+        curriculum_cache_misses_total.inc(len(missing), collection=collection_name)
+        if missing:
+            version = self.version
+            collection = get_curriculum_db()[collection_name]
+            async for document in collection.find({"id": {"$in": missing}}, {"_id": 0}):
+                found[document["id"]] = document
+                # A write landed while we were reading, don't cache what may be stale
+                if version == self.version:
+                    self._store((collection_name, document["id"]), document)
+        return found
+
+    async def get(self, collection_name: str, doc_id: str) -> Optional[dict]:
+        return (await self.get_many(collection_name, [doc_id])).get(doc_id)
+
+    async def names(self, collection_name: str, ids: Iterable[str], default: str = None) -> Dict[str, str]:
+        """Map ids to names, ids that don't exist map to `default`"""
+        ids = set(ids)
+        documents = await self.get_many(collection_name, ids)
+        return {
+            doc_id: str(documents[doc_id].get("name", default)) if doc_id in documents else default
+            for doc_id in ids
+        }
+
+    async def hierarchy(self, topic_id: str) -> dict:
+        """The topic with its chapter, subject and standard, None for any level that doesn't exist"""
+        topic = await self.get("topics", topic_id)
+        chapter = await self.get("chapters", topic["chapter_id"]) if topic else None
+        subject = await self.get("subjects", chapter["subject_id"]) if chapter else None
+        standard = await self.get("standards", subject["standard_id"]) if subject else None
+        return {"topic": topic, "chapter": chapter, "subject": subject, "standard": standard}
+
+    async def topic_paths(self, topic_ids: Iterable[str]) -> Dict[str, TopicPath]:
+        """
+        Resolve topics to their full path, memoized per topic.
+
+        Topics not cached are loaded together with their chapter, subject and
+        standard by a single aggregation. Unknown topics are left out.
+        """
+        found = {}
+        missing = []
+        for topic_id in set(topic_ids):
+            path = self._lookup(("topic_path", topic_id))
+            if path is None:
+                missing.append(topic_id)
+            else:
+                found[topic_id] = path
+        curriculum_cache_hits_total.inc(len(found), collection="topic_path")
+        curriculum_cache_misses_total.inc(len(missing), collection="topic_path")
+        if not missing:
+            return found
+
+        version = self.version
+        cursor = await get_curriculum_db().topics.aggregate([
+            {"$match": {"id": {"$in": missing}}},
+            *TOPIC_PATH_LOOKUPS,
+        ])
+        async for row in cursor:
+            chapters, subjects, standards = row.pop("chapters"), row.pop("subjects"), row.pop("standards")
+            row.pop("_id", None)
+            if "ancestors" not in row:
+                # Created before ancestor paths existed, walk up the parents instead
+                hierarchy = await self.hierarchy(row["id"])
+                path = TopicPath(hierarchy["standard"], hierarchy["subject"], hierarchy["chapter"], row)
+            else:
+                path = TopicPath(
+                    standards[0] if standards else None,
+                    subjects[0] if subjects else None,
+                    chapters[0] if chapters else None,
+                    row
+                )
+            found[row["id"]] = path
+            # A write landed while we were reading, don't cache what may be stale
+            if version == self.version:
+                self._store(("topic_path", row["id"]), path)
+        return found
+
+    async def topic_path(self, topic_id: str) -> Optional[TopicPath]:
+        return (await self.topic_paths([topic_id])).get(topic_id)
+
+    def get_derived(self, key: str):
+        """A value computed from curriculum documents, such as a serialized tree"""
+        return self._lookup(("derived", key))
+
+    def store_derived(self, key: str, value, version: int):
+        """Store a derived value unless a write happened since `version` was read"""
+        if version == self.version:
+            self._store(("derived", key), value)
+
+
+curriculum_cache = CurriculumCache()
+
+
+async def curriculum_changed(*collections: str):
+    """Invalidate cached curriculum data and bump the versions of the changed collections"""
+    curriculum_cache.invalidate()
+    await bump_versions(*collections)
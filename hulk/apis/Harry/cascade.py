@@ -0,0 +1,214 @@
+"""
+Background deletes of whole curriculum subtrees.
+
+The delete routes only remove empty nodes unless called with cascade=true,
+which records a job in `curriculum_jobs` and runs it after the response is
+sent. The job finds everything below the node through the ancestor paths,
+handles the questions of the subtree in batches (deleting them along with
+their GridFS images, bank entries, tag counts and statistics, or
+detaching them by clearing the deleted curriculum ids), then removes the
+nodes bottom-up with one delete_many per batch so an interrupted job
+never leaves a child without its parent. Progress is written to the job after every batch and
+served by GET /curriculum/jobs/{job_id}.
+
+Jobs run in the worker that accepted the request; one interrupted by a
+restart stays `running` and can be started again with the same request.
+"""
+from datetime import datetime
+from typing import Dict, List
+from uuid import uuid4
+import logging
+import os
+from pymongo import ReturnDocument
+from apis.Ginny.versions import bump_versions
+from .ancestors import QUESTION_ANCESTORS
+from .cache import curriculum_changed
+from .db_init import get_curriculum_db
+from .stats import STATS_FIELDS, apply_question_stats, drop_node_stats
+from .models import JobStatus, QuestionAction, TreeLevel
+from .tags import apply_tag_usage_changes, count_tags, get_questions_collection
+from .tree import LEVELS
+
+logger = logging.getLogger(__name__)
+
+JOBS_COLLECTION = "curriculum_jobs"
+BATCH_SIZE = int(os.getenv("CASCADE_DELETE_BATCH_SIZE", "500"))
+
+
+def get_jobs_collection():
+    return get_curriculum_db()[JOBS_COLLECTION]
+
+
+def _batches(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _level_index(level: TreeLevel) -> int:
+    return next(i for i, (name, _, _) in enumerate(LEVELS) if name == level)
+
+
+def question_field(level: TreeLevel) -> str:
+    """Field of a question holding the id of its node at `level`"""
+    return f"{level.value}_id"
+
+
+async def create_cascade_job(level: TreeLevel, node_id: str, questions: QuestionAction, username: str) -> dict:
+    """Record a pending cascading delete of the node and its subtree"""
+    job = {
+        "id": str(uuid4()),
+        "type": "cascade_delete",
+        "status": JobStatus.PENDING.value,
+        "level": level.value,
+        "node_id": node_id,
+        "questions": questions.value,
+        "totals": {},
+        "progress": {},
+        "error": None,
+        "created_at": datetime.now(),
+        "created_by": username,
+        "started_at": None,
+        "finished_at": None,
+    }
+    await get_jobs_collection().insert_one(dict(job))
+    return job
+
+
+async def collect_subtree(level: TreeLevel, node_id: str) -> Dict[str, List[str]]:
+    """Ids of the node and of every node below it, by collection, one indexed query per level"""
+    level_index = _level_index(level)
+    ids = {LEVELS[level_index][1]: [node_id]}
+    db = get_curriculum_db()
+    for _, collection_name, _ in LEVELS[level_index + 1:]:
+        ids[collection_name] = [
+            document["id"]
+            async for document in db[collection_name].find({"ancestors": node_id}, {"_id": 0, "id": 1})
+        ]
+    return ids
+
+
+async def _delete_images(question_db, image_ids: List[str]):
+    """Remove GridFS files (and their chunks) stored for the given image ids"""
+    if not image_ids:
+        return 0
+    file_ids = [
+        document["_id"]
+        async for document in question_db["fs.files"].find({"file_id": {"$in": image_ids}}, {"_id": 1})
+    ]
+    if file_ids:
+        await question_db["fs.chunks"].delete_many({"files_id": {"$in": file_ids}})
+        await question_db["fs.files"].delete_many({"_id": {"$in": file_ids}})
+    return len(file_ids)
+
+
+async def _delete_questions(questions, batch: List[dict]) -> dict:
+    question_ids = [question["id"] for question in batch]
+    images = await _delete_images(
+        questions.database,
+        [str(image) for question in batch for image in question.get("images") or []]
+    )
+
+    # Remove the questions from every bank that lists them
+    banks = await questions.database.question_banks.update_many(
+        {"question_ids": {"$in": question_ids}},
+        {"$pull": {"question_ids": {"$in": question_ids}}, "$set": {"updated_at": datetime.now()}}
+    )
+    if banks.modified_count:
+        await bump_versions("question_banks")
+
+    await questions.delete_many({"id": {"$in": question_ids}})
+    await apply_tag_usage_changes({tag_id: -count for tag_id, count in count_tags(batch).items()})
+    await apply_question_stats(batch, -1)
+    return {"questions": len(question_ids), "images": images}
+
+
+async def _detach_questions(questions, batch: List[dict], level: TreeLevel) -> dict:
+    # Clear the ids of the deleted node and of the levels below it, then
+    # rebuild the path from the ids that are left
+    cleared = {question_field(name): None for name, _, _ in LEVELS[_level_index(level):]}
+    cleared["updated_at"] = datetime.now()
+    await questions.update_many(
+        {"id": {"$in": [question["id"] for question in batch]}},
+        [{"$set": cleared}, {"$set": {"ancestors": QUESTION_ANCESTORS}}]
+    )
+    return {"questions": len(batch)}
+
+
+async def _process_questions(job_id: str, level: TreeLevel, node_id: str, action: QuestionAction):
+    """Delete or detach the questions below the node, one batch at a time"""
+    questions = get_questions_collection()
+    jobs = get_jobs_collection()
+    while True:
+        # Handled questions no longer match, so every round reads the next batch
+        batch = await questions.find(
+            {"ancestors": node_id},
+            {"_id": 0, "id": 1, "images": 1, "tags": 1, **{field: 1 for field in STATS_FIELDS}}
+        ).limit(BATCH_SIZE).to_list()
+        if not batch:
+            break
+        if action == QuestionAction.DELETE:
+            done = await _delete_questions(questions, batch)
+        else:
+            done = await _detach_questions(questions, batch, level)
+        await jobs.update_one(
+            {"id": job_id},
+            {"$inc": {f"progress.{name}": count for name, count in done.items()}}
+        )
+
+
+async def run_cascade_delete(job_id: str):
+    """Run a pending cascading delete job, recording its progress and outcome"""
+    jobs = get_jobs_collection()
+    job = await jobs.find_one_and_update(
+        {"id": job_id, "status": JobStatus.PENDING.value},
+        {"$set": {"status": JobStatus.RUNNING.value, "started_at": datetime.now()}},
+        return_document=ReturnDocument.AFTER
+    )
+    if not job:
+        return
+
+    level = TreeLevel(job["level"])
+    changed = []
+    try:
+        subtree = await collect_subtree(level, job["node_id"])
+        questions_total = await get_questions_collection().count_documents({"ancestors": job["node_id"]})
+        await jobs.update_one(
+            {"id": job_id},
+            {"$set": {"totals": {**{name: len(ids) for name, ids in subtree.items()}, "questions": questions_total}}}
+        )
+
+        await _process_questions(job_id, level, job["node_id"], QuestionAction(job["questions"]))
+
+        # Banks belong to a standard and subject, they go with them
+        bank_filters = [
+            {question_field(name): {"$in": subtree[collection_name]}}
+            for name, collection_name, _ in LEVELS[:2] if collection_name in subtree
+        ]
+        if bank_filters:
+            banks = await get_questions_collection().database.question_banks.delete_many({"$or": bank_filters})
+            if banks.deleted_count:
+                await bump_versions("question_banks")
+                await jobs.update_one({"id": job_id}, {"$inc": {"progress.question_banks": banks.deleted_count}})
+
+        # Bottom-up, so the tree stays consistent if the job stops halfway
+        db = get_curriculum_db()
+        for collection_name, ids in reversed(list(subtree.items())):
+            for batch in _batches(ids, BATCH_SIZE):
+                result = await db[collection_name].delete_many({"id": {"$in": batch}})
+                changed.append(collection_name)
+                await jobs.update_one({"id": job_id}, {"$inc": {f"progress.{collection_name}": result.deleted_count}})
+                await drop_node_stats(batch)
+
+        await jobs.update_one(
+            {"id": job_id},
+            {"$set": {"status": JobStatus.COMPLETED.value, "finished_at": datetime.now()}}
+        )
+    except Exception as e:
+        logger.exception("Cascading delete job %s failed", job_id)
+        await jobs.update_one(
+            {"id": job_id},
+            {"$set": {"status": JobStatus.FAILED.value, "error": str(e), "finished_at": datetime.now()}}
+        )
+    finally:
+        if changed:
+            await curriculum_changed(*set(changed))
@@ -1,10 +1,7 @@
-from pymongo import MongoClient
+from apis.Ginny.utils import get_database
 import os
 
 
 def get_curriculum_db():
-    """Get MongoDB curriculum database connection"""
-    mongo_uri = os.getenv("MONGO_URI", "mongodb://localhost:27017")
-    client = MongoClient(mongo_uri)
-    return client[os.getenv("MONGO_CURRICULUM_DB")]
-
+    """Get MongoDB curriculum database from the shared client pool"""
+    return get_database(os.getenv("MONGO_CURRICULUM_DB"))
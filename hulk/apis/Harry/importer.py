@@ -0,0 +1,175 @@
+"""
+Bulk curriculum import from CSV or Excel.
+
+Each row names a standard and optionally a subject, chapter and topic
+(columns `standard`, `subject`, `chapter`, `topic`). The import works one
+level at a time: it loads the existing names under the parents it has
+resolved with a single query, creates the missing nodes in memory and
+inserts them with one ordered bulk_write, then moves down a level. Every
+row gets a report entry saying what it created or why it failed.
+"""
+from datetime import datetime
+from fastapi import HTTPException, status
+from io import BytesIO
+from pymongo import InsertOne
+from pymongo.errors import BulkWriteError
+from typing import Dict, List
+from uuid import uuid4
+from zipfile import BadZipFile
+import asyncio
+import pandas as pd
+from .cache import curriculum_changed
+from .db_init import get_curriculum_db
+from .tree import LEVELS
+
+# Sheet column of each level, in the order of LEVELS
+COLUMNS = [level.value for level, _, _ in LEVELS]
+
+# Spreadsheet row numbers start at 1 and the first row is the header
+FIRST_DATA_ROW = 2
+
+
+def read_sheet(content: bytes, filename: str) -> pd.DataFrame:
+    """Load a CSV or Excel upload with every cell as text"""
+    if not filename.lower().endswith((".csv", ".xlsx", ".xls")):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File must be a CSV or Excel document"
+        )
+    try:
+        if filename.lower().endswith(".csv"):
+            df = pd.read_csv(BytesIO(content), dtype=str)
+        else:
+            df = pd.read_excel(BytesIO(content), dtype=str)
+    except (pd.errors.ParserError, pd.errors.EmptyDataError, BadZipFile, ValueError) as e:
+        # Corrupt or empty uploads are the client's fault, not a server error
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Could not read {filename}: {e}"
+        )
+    df.columns = [str(column).strip().lower() for column in df.columns]
+    if "standard" not in df.columns:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File must contain a standard column and may contain {', '.join(COLUMNS[1:])}"
+        )
+    return df
+
+
+def parse_rows(df: pd.DataFrame) -> List[dict]:
+    """Turn sheet rows into report entries holding the cleaned names of each level"""
+    rows = []
+    for index, record in enumerate(df.to_dict("records")):
+        names = {}
+        for column in COLUMNS:
+            value = record.get(column)
+            names[column] = str(value).strip() if value is not None and not pd.isna(value) and str(value).strip() else None
+        row = {"row": index + FIRST_DATA_ROW, "status": "unchanged", "created": [], "names": names}
+
+        # Levels must be filled from the top without gaps
+        filled = [names[column] is not None for column in COLUMNS]
+        if not any(filled):
+            row["status"] = "skipped"
+        elif not filled[0] or filled != sorted(filled, reverse=True):
+            row.update(status="error", error="Every level above the last one filled in is required")
+        else:
+            try:
+                names["standard"] = int(float(names["standard"]))
+            except ValueError:
+                row.update(status="error", error=f"Standard must be a number, got {names['standard']!r}")
+        rows.append(row)
+    return rows
+
+
+async def _import_level(db, level_index: int, rows: List[dict], username: str, dry_run: bool) -> int:
+    """Resolve one level for every row still valid, returning how many nodes were created"""
+    _, collection_name, parent_field = LEVELS[level_index]
+    level = COLUMNS[level_index]
+    parent_level = COLUMNS[level_index - 1] if level_index else None
+    pending = [row for row in rows if row["status"] in ("unchanged", "created") and row["names"][level] is not None]
+    if not pending:
+        return 0
+
+    def key(row):
+        return (row["ids"][parent_level] if parent_level else None, row["names"][level])
+
+    # Existing nodes under the resolved parents, in one query
+    query = {"name": {"$in": list({row["names"][level] for row in pending})}}
+    if parent_field:
+        query[parent_field] = {"$in": list({row["ids"][parent_level] for row in pending})}
+    existing = {
+        (document.get(parent_field) if parent_field else None, document["name"]): document["id"]
+        async for document in db[collection_name].find(query, {"_id": 0, "id": 1, "name": 1, parent_field or "id": 1})
+    }
+
+    new_documents: Dict[tuple, dict] = {}
+    first_rows: Dict[tuple, dict] = {}
+    for row in pending:
+        node_key = key(row)
+        if node_key not in existing and node_key not in new_documents:
+            document = {
+                "name": row["names"][level],
+                "description": None,
+                "id": str(uuid4()),
+                "created_at": datetime.now(),
+                "created_by": username,
+            }
+            document["ancestors"] = [row["ids"][name] for name in COLUMNS[:level_index]]
+            if parent_field:
+                document[parent_field] = node_key[0]
+            new_documents[node_key] = document
+            first_rows[node_key] = row
+        row["ids"][level] = existing.get(node_key) or new_documents[node_key]["id"]
+
+    inserted = list(new_documents)
+    if new_documents and not dry_run:
+        try:
+            await db[collection_name].bulk_write(
+                [InsertOne(document) for document in new_documents.values()], ordered=True
+            )
+        except BulkWriteError as e:
+            # Ordered writes stop at the first failure (usually a concurrent
+            # insert of the same name), nothing after it was written
+            inserted = inserted[:e.details["nInserted"]]
+            failed = set(list(new_documents)[e.details["nInserted"]:])
+            for row in pending:
+                if key(row) in failed:
+                    row.update(status="error", error=f"{level.capitalize()} {row['names'][level]!r} was created concurrently, import the file again")
+
+    for node_key in inserted:
+        row = first_rows[node_key]
+        if row["status"] != "error":
+            row["status"] = "created"
+            row["created"].append(level)
+    return len(inserted)
+
+
+async def import_curriculum(content: bytes, filename: str, username: str, dry_run: bool = False) -> dict:
+    """Import a curriculum sheet and return a per-row report"""
+    df = await asyncio.to_thread(read_sheet, content, filename)
+    rows = parse_rows(df)
+    for row in rows:
+        row["ids"] = {}
+
+    db = get_curriculum_db()
+    created = {}
+    for level_index, (_, collection_name, _) in enumerate(LEVELS):
+        created[collection_name] = await _import_level(db, level_index, rows, username, dry_run)
+
+    changed = [collection_name for collection_name, count in created.items() if count]
+    if changed and not dry_run:
+        await curriculum_changed(*changed)
+
+    report_rows = []
+    for row in rows:
+        entry = {"row": row["row"], "status": row["status"], "created": row["created"], **row["names"]}
+        if row.get("error"):
+            entry["error"] = row["error"]
+        report_rows.append(entry)
+    return {
+        "dry_run": dry_run,
+        "rows": len(rows),
+        "created": created,
+        "errors": sum(1 for row in rows if row["status"] == "error"),
+        "report": report_rows,
+    }
@@ -1,22 +1,170 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, HTTPException, Query, Request, Response, UploadFile, status
 from typing import List, Optional
 from uuid import uuid4
 from datetime import datetime
-from pymongo import MongoClient
-from security.main import get_current_user
+from security.main import get_current_user, get_current_admin_user
 from apis.Harry.models import (
     StandardCreate, StandardUpdate, StandardResponse, 
     SubjectCreate, SubjectUpdate, SubjectResponse, 
     ChapterCreate, ChapterUpdate, ChapterResponse,
     TopicCreate, TopicUpdate, TopicResponse,
     QuestionTypeCreate, QuestionTypeUpdate, QuestionTypeResponse,
-    TagCreate, TagUpdate, TagResponse
+    TagCreate, TagUpdate, TagResponse,
+    CurriculumNode, TreeLevel,
+    CurriculumJobResponse, CurriculumStatsResponse, QuestionAction
 )
 from .db_init import get_curriculum_db
+from .cache import curriculum_cache, curriculum_changed
+from .tree import LEVELS, build_tree
+from .importer import import_curriculum
+from .ancestors import child_ancestors
+from .stats import STATS_COLLECTION, drop_node_stats, format_stats, get_stats_collection
+from .cascade import create_cascade_job, get_jobs_collection, run_cascade_delete
+from .tags import get_questions_collection, reconcile_tag_usage
+from apis.Ginny.responses import FastJSONResponse, trusted_response
+from apis.Ginny.pagination import PageParams
+from apis.Ginny.versions import bump_versions, conditional_get, etag_matches
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
 # Initialize router
 router = APIRouter(prefix="/curriculum", tags=["curriculum"])
 
+# Names are unique among siblings, so they are a stable keyset for pagination
+NAME_SORT = [("name", ASCENDING)]
+
+async def update_node(collection, node_id: str, update, username: str, label: str, conflict_detail: str) -> dict:
+    """
+    Apply an update model to one document and return the updated document.
+
+    A single find_one_and_update replaces the exists / conflict / update /
+    re-read sequence: a missing id comes back as None and a name clash is
+    rejected by the collection's unique index.
+    """
+    update_data = {k: v for k, v in update.model_dump().items() if v is not None}
+    update_data["updated_at"] = datetime.now()
+    update_data["updated_by"] = username
+    
+    try:
+        document = await collection.find_one_and_update(
+            {"id": node_id},
+            {"$set": update_data},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=conflict_detail
+        )
+    
+    if document is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"{label} not found"
+        )
+    return document
+
+# ----- TREE ROUTES -----
+
+@router.get("/tree", response_model=List[CurriculumNode])
+async def get_curriculum_tree(
+    request: Request,
+    root_level: TreeLevel = Query(TreeLevel.STANDARD, description="Level of the root node"),
+    root_id: Optional[str] = Query(None, description="ID of the root node, every standard when omitted"),
+    depth: Optional[int] = Query(None, ge=0, le=3, description="Levels of children to include, all when omitted"),
+    current_user = Depends(get_current_user)
+):
+    """Get the nested standard -> subject -> chapter -> topic tree in one request"""
+    if root_id is None and root_level != TreeLevel.STANDARD:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="root_id is required when root_level is not standard"
+        )
+    
+    tree = await build_tree(root_level, root_id, depth)
+    headers = {"ETag": tree["etag"], "Cache-Control": "private, no-cache"}
+    
+    # Let clients revalidate a tree they already have
+    if etag_matches(request.headers.get("if-none-match", ""), tree["etag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    return Response(content=tree["body"], media_type="application/json", headers=headers)
+
+async def start_cascade_delete(
+    collection,
+    level: TreeLevel,
+    node_id: str,
+    questions: QuestionAction,
+    background_tasks: BackgroundTasks,
+    current_user,
+    label: str
+):
+    """Queue a background delete of a node and its whole subtree"""
+    # Check if the user may delete whole subtrees
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized. Admin privileges required for cascading deletes."
+        )
+    
+    # Check if node exists
+    if not await collection.find_one({"id": node_id}, {"_id": 1}):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"{label} not found"
+        )
+    
+    job = await create_cascade_job(level, node_id, questions, current_user.username)
+    background_tasks.add_task(run_cascade_delete, job["id"])
+    return trusted_response(job, status_code=status.HTTP_202_ACCEPTED)
+
+# ----- JOB ROUTES -----
+
+@router.get("/jobs/{job_id}", response_model=CurriculumJobResponse)
+async def get_curriculum_job(job_id: str, current_user = Depends(get_current_user)):
+    """Get the status and progress of a background curriculum job"""
+    job = await get_jobs_collection().find_one({"id": job_id}, {"_id": 0})
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    
+    return CurriculumJobResponse(**job)
+
+# ----- STATS ROUTES -----
+
+@router.get(
+    "/{level}/{node_id}/stats",
+    response_model=CurriculumStatsResponse,
+    dependencies=[Depends(conditional_get(STATS_COLLECTION, *(collection for _, collection, _ in LEVELS)))]
+)
+async def get_curriculum_stats(level: TreeLevel, node_id: str, current_user = Depends(get_current_user)):
+    """Get the number of questions below a node by question type, difficulty and marks"""
+    collection = next(collection for name, collection, _ in LEVELS if name == level)
+    
+    # Check if node exists
+    if not await curriculum_cache.get(collection, node_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"{level.value.capitalize()} not found"
+        )
+    
+    stats = await get_stats_collection().find_one({"_id": node_id})
+    return CurriculumStatsResponse(**format_stats(level, node_id, stats))
+
+# ----- IMPORT ROUTES -----
+
+@router.post("/import")
+async def import_curriculum_sheet(
+    file: UploadFile = File(..., description="CSV or Excel file with standard, subject, chapter and topic columns"),
+    dry_run: bool = Form(False, description="Only report what would be created"),
+    current_user = Depends(get_current_user)
+):
+    """Create standards, subjects, chapters and topics in bulk from a spreadsheet"""
+    return await import_curriculum(await file.read(), file.filename or "", current_user.username, dry_run)
+
 # ----- STANDARDS (GRADES) ROUTES -----
 
 @router.post("/standards", response_model=StandardResponse, status_code=status.HTTP_201_CREATED)
@@ -25,7 +173,7 @@ async def create_standard(standard: StandardCreate, current_user = Depends(get_c
     db = get_curriculum_db()
     
     # Check if standard with same name already exists
-    existing_standard = db.standards.find_one({"name": standard.name})
+    existing_standard = await db.standards.find_one({"name": standard.name})
     if existing_standard:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -36,10 +184,12 @@ async def create_standard(standard: StandardCreate, current_user = Depends(get_c
     standard_id = str(uuid4())
     standard_dict = standard.model_dump()
     standard_dict["id"] = standard_id
+    standard_dict["ancestors"] = []
     standard_dict["created_at"] = datetime.now()
     standard_dict["created_by"] = current_user.username
     
-    result = db.standards.insert_one(standard_dict)
+    result = await db.standards.insert_one(standard_dict)
+    await curriculum_changed("standards")
     
     if not result.acknowledged:
         raise HTTPException(
@@ -49,18 +199,20 @@ async def create_standard(standard: StandardCreate, current_user = Depends(get_c
     
     return StandardResponse(**standard_dict)
 
-@router.get("/standards", response_model=List[StandardResponse])
-async def get_all_standards(current_user = Depends(get_current_user)):
+@router.get("/standards", response_model=List[StandardResponse], response_class=FastJSONResponse, dependencies=[Depends(conditional_get("standards"))])
+async def get_all_standards(page: PageParams = Depends(), current_user = Depends(get_current_user)):
     """Get all standards/grades"""
     db = get_curriculum_db()
-    standards = list(db.standards.find())
-    return [StandardResponse(**standard) for standard in standards]
+    standards, next_cursor = await page.fetch(
+        db.standards, {}, NAME_SORT, page.projection(StandardResponse, NAME_SORT)
+    )
+    return page.respond(standards, StandardResponse, next_cursor)
 
-@router.get("/standards/{standard_id}", response_model=StandardResponse)
+@router.get("/standards/{standard_id}", response_model=StandardResponse, dependencies=[Depends(conditional_get("standards"))])
 async def get_standard(standard_id: str, current_user = Depends(get_current_user)):
     """Get a specific standard by ID"""
     db = get_curriculum_db()
-    standard = db.standards.find_one({"id": standard_id})
+    standard = await db.standards.find_one({"id": standard_id})
     
     if not standard:
         raise HTTPException(
@@ -77,60 +229,46 @@ async def update_standard(
     current_user = Depends(get_current_user)
 ):
     """Update a standard/grade"""
-    db = get_curriculum_db()
-    
-    # Check if standard exists
-    existing_standard = db.standards.find_one({"id": standard_id})
-    if not existing_standard:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Standard not found"
-        )
-    
-    # Check if new name conflicts with another standard
-    if standard_update.name:
-        name_conflict = db.standards.find_one({
-            "name": standard_update.name,
-            "id": {"$ne": standard_id}
-        })
-        if name_conflict:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Another standard with this name already exists"
-            )
-    
-    # Update standard
-    update_data = {k: v for k, v in standard_update.model_dump().items() if v is not None}
-    update_data["updated_at"] = datetime.now()
-    update_data["updated_by"] = current_user.username
-    
-    result = db.standards.update_one(
-        {"id": standard_id},
-        {"$set": update_data}
+    standard = await update_node(
+        get_curriculum_db().standards, standard_id, standard_update, current_user.username,
+        "Standard", "Another standard with this name already exists"
     )
-    
-    if result.matched_count == 0:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Standard not found"
-        )
-    
-    updated_standard = db.standards.find_one({"id": standard_id})
-    return StandardResponse(**updated_standard)
+    await curriculum_changed("standards")
+    return StandardResponse(**standard)
 
-@router.delete("/standards/{standard_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_standard(standard_id: str, current_user = Depends(get_current_user)):
+@router.delete("/standards/{standard_id}", status_code=status.HTTP_204_NO_CONTENT, responses={202: {"model": CurriculumJobResponse}})
+async def delete_standard(
+    standard_id: str,
+    background_tasks: BackgroundTasks,
+    cascade: bool = Query(False, description="Delete the whole subtree in a background job"),
+    questions: QuestionAction = Query(QuestionAction.DELETE, description="What a cascading delete does with the questions of the subtree"),
+    current_user = Depends(get_current_user)
+):
+    """
+    Delete a standard.
+
+    If cascade=true (admins only), the standard and everything below it is deleted by a
+    background job and the job is returned with 202. questions=delete removes the
+    questions of the subtree, questions=detach keeps them with the deleted ids cleared.
+    """
     db = get_curriculum_db()
     
+    if cascade:
+        return await start_cascade_delete(
+            db.standards, TreeLevel.STANDARD, standard_id, questions, background_tasks, current_user, "Standard"
+        )
+    
     # Check if standard has subjects
-    subjects_count = db.subjects.count_documents({"standard_id": standard_id})
+    subjects_count = await db.subjects.count_documents({"standard_id": standard_id})
     if subjects_count > 0:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Cannot delete standard with {subjects_count} associated subjects. Remove subjects first."
         )
     
-    result = db.standards.delete_one({"id": standard_id})
+    result = await db.standards.delete_one({"id": standard_id})
+    await curriculum_changed("standards")
+    await drop_node_stats([standard_id])
     
     if result.deleted_count == 0:
         raise HTTPException(
@@ -152,7 +290,7 @@ async def create_subject(
     db = get_curriculum_db()
     
     # Check if standard exists
-    standard = db.standards.find_one({"id": standard_id})
+    standard = await db.standards.find_one({"id": standard_id})
     if not standard:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -160,7 +298,7 @@ async def create_subject(
         )
     
     # Check if subject with same name already exists for this standard
-    existing_subject = db.subjects.find_one({
+    existing_subject = await db.subjects.find_one({
         "standard_id": standard_id,
         "name": subject.name
     })
@@ -175,10 +313,12 @@ async def create_subject(
     subject_dict = subject.model_dump()
     subject_dict["id"] = subject_id
     subject_dict["standard_id"] = standard_id
+    subject_dict["ancestors"] = child_ancestors(standard)
     subject_dict["created_at"] = datetime.now()
     subject_dict["created_by"] = current_user.username
     
-    result = db.subjects.insert_one(subject_dict)
+    result = await db.subjects.insert_one(subject_dict)
+    await curriculum_changed("subjects")
     
     if not result.acknowledged:
         raise HTTPException(
@@ -188,33 +328,36 @@ async def create_subject(
     
     return SubjectResponse(**subject_dict)
 
-@router.get("/standards/{standard_id}/subjects", response_model=List[SubjectResponse])
+@router.get("/standards/{standard_id}/subjects", response_model=List[SubjectResponse], response_class=FastJSONResponse, dependencies=[Depends(conditional_get("subjects", "standards"))])
 async def get_subjects_by_standard(
     standard_id: str,
+    page: PageParams = Depends(),
     current_user = Depends(get_current_user)
 ):
     """Get all subjects for a specific standard"""
     db = get_curriculum_db()
     
     # Check if standard exists
-    standard = db.standards.find_one({"id": standard_id})
+    standard = await db.standards.find_one({"id": standard_id})
     if not standard:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Standard not found"
         )
     
-    subjects = list(db.subjects.find({"standard_id": standard_id}))
-    return [SubjectResponse(**subject) for subject in subjects]
+    subjects, next_cursor = await page.fetch(
+        db.subjects, {"standard_id": standard_id}, NAME_SORT, page.projection(SubjectResponse, NAME_SORT)
+    )
+    return page.respond(subjects, SubjectResponse, next_cursor)
 
-@router.get("/subjects/{subject_id}", response_model=SubjectResponse)
+@router.get("/subjects/{subject_id}", response_model=SubjectResponse, dependencies=[Depends(conditional_get("subjects"))])
 async def get_subject(
     subject_id: str,
     current_user = Depends(get_current_user)
 ):
     """Get a specific subject by ID"""
     db = get_curriculum_db()
-    subject = db.subjects.find_one({"id": subject_id})
+    subject = await db.subjects.find_one({"id": subject_id})
     
     if not subject:
         raise HTTPException(
@@ -231,62 +374,46 @@ async def update_subject(
     current_user = Depends(get_current_user)
 ):
     """Update a subject"""
-    db = get_curriculum_db()
-    
-    # Check if subject exists
-    existing_subject = db.subjects.find_one({"id": subject_id})
-    if not existing_subject:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Subject not found"
-        )
-    
-    # If name is changed, check for conflicts
-    if subject_update.name:
-        name_conflict = db.subjects.find_one({
-            "standard_id": existing_subject["standard_id"],
-            "name": subject_update.name,
-            "id": {"$ne": subject_id}
-        })
-        if name_conflict:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Another subject with this name already exists for this standard"
-            )
-    
-    # Update subject
-    update_data = {k: v for k, v in subject_update.model_dump().items() if v is not None}
-    update_data["updated_at"] = datetime.now()
-    update_data["updated_by"] = current_user.username
-    
-    result = db.subjects.update_one(
-        {"id": subject_id},
-        {"$set": update_data}
+    subject = await update_node(
+        get_curriculum_db().subjects, subject_id, subject_update, current_user.username,
+        "Subject", "Another subject with this name already exists for this standard"
     )
-    
-    if result.matched_count == 0:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Subject not found"
-        )
-    
-    updated_subject = db.subjects.find_one({"id": subject_id})
-    return SubjectResponse(**updated_subject)
+    await curriculum_changed("subjects")
+    return SubjectResponse(**subject)
 
-@router.delete("/subjects/{subject_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_subject(subject_id: str, current_user = Depends(get_current_user)):
-    """Delete a subject"""
+@router.delete("/subjects/{subject_id}", status_code=status.HTTP_204_NO_CONTENT, responses={202: {"model": CurriculumJobResponse}})
+async def delete_subject(
+    subject_id: str,
+    background_tasks: BackgroundTasks,
+    cascade: bool = Query(False, description="Delete the whole subtree in a background job"),
+    questions: QuestionAction = Query(QuestionAction.DELETE, description="What a cascading delete does with the questions of the subtree"),
+    current_user = Depends(get_current_user)
+):
+    """
+    Delete a subject.
+
+    If cascade=true (admins only), the subject and everything below it is deleted by a
+    background job and the job is returned with 202. questions=delete removes the
+    questions of the subtree, questions=detach keeps them with the deleted ids cleared.
+    """
     db = get_curriculum_db()
     
+    if cascade:
+        return await start_cascade_delete(
+            db.subjects, TreeLevel.SUBJECT, subject_id, questions, background_tasks, current_user, "Subject"
+        )
+    
     # Check if subject has chapters
-    chapters_count = db.chapters.count_documents({"subject_id": subject_id})
+    chapters_count = await db.chapters.count_documents({"subject_id": subject_id})
     if chapters_count > 0:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Cannot delete subject with {chapters_count} associated chapters. Remove chapters first."
         )
     
-    result = db.subjects.delete_one({"id": subject_id})
+    result = await db.subjects.delete_one({"id": subject_id})
+    await curriculum_changed("subjects")
+    await drop_node_stats([subject_id])
     
     if result.deleted_count == 0:
         raise HTTPException(
@@ -308,7 +435,7 @@ async def create_chapter(
     db = get_curriculum_db()
     
     # Check if subject exists
-    subject = db.subjects.find_one({"id": subject_id})
+    subject = await db.subjects.find_one({"id": subject_id})
     if not subject:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -316,7 +443,7 @@ async def create_chapter(
         )
     
     # Check if chapter with same name already exists for this subject
-    existing_chapter = db.chapters.find_one({
+    existing_chapter = await db.chapters.find_one({
         "subject_id": subject_id,
         "name": chapter.name
     })
@@ -331,10 +458,12 @@ async def create_chapter(
     chapter_dict = chapter.model_dump()
     chapter_dict["id"] = chapter_id
     chapter_dict["subject_id"] = subject_id
+    chapter_dict["ancestors"] = child_ancestors(subject)
     chapter_dict["created_at"] = datetime.now()
     chapter_dict["created_by"] = current_user.username
     
-    result = db.chapters.insert_one(chapter_dict)
+    result = await db.chapters.insert_one(chapter_dict)
+    await curriculum_changed("chapters")
     
     if not result.acknowledged:
         raise HTTPException(
@@ -344,33 +473,36 @@ async def create_chapter(
     
     return ChapterResponse(**chapter_dict)
 
-@router.get("/subjects/{subject_id}/chapters", response_model=List[ChapterResponse])
+@router.get("/subjects/{subject_id}/chapters", response_model=List[ChapterResponse], response_class=FastJSONResponse, dependencies=[Depends(conditional_get("chapters", "subjects"))])
 async def get_chapters_by_subject(
     subject_id: str,
+    page: PageParams = Depends(),
     current_user = Depends(get_current_user)
 ):
     """Get all chapters for a specific subject"""
     db = get_curriculum_db()
     
     # Check if subject exists
-    subject = db.subjects.find_one({"id": subject_id})
+    subject = await db.subjects.find_one({"id": subject_id})
     if not subject:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Subject not found"
         )
     
-    chapters = list(db.chapters.find({"subject_id": subject_id}))
-    return [ChapterResponse(**chapter) for chapter in chapters]
+    chapters, next_cursor = await page.fetch(
+        db.chapters, {"subject_id": subject_id}, NAME_SORT, page.projection(ChapterResponse, NAME_SORT)
+    )
+    return page.respond(chapters, ChapterResponse, next_cursor)
 
-@router.get("/chapters/{chapter_id}", response_model=ChapterResponse)
+@router.get("/chapters/{chapter_id}", response_model=ChapterResponse, dependencies=[Depends(conditional_get("chapters"))])
 async def get_chapter(
     chapter_id: str,
     current_user = Depends(get_current_user)
 ):
     """Get a specific chapter by ID"""
     db = get_curriculum_db()
-    chapter = db.chapters.find_one({"id": chapter_id})
+    chapter = await db.chapters.find_one({"id": chapter_id})
     
     if not chapter:
         raise HTTPException(
@@ -387,62 +519,46 @@ async def update_chapter(
     current_user = Depends(get_current_user)
 ):
     """Update a chapter"""
-    db = get_curriculum_db()
-    
-    # Check if chapter exists
-    existing_chapter = db.chapters.find_one({"id": chapter_id})
-    if not existing_chapter:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Chapter not found"
-        )
-    
-    # If name is changed, check for conflicts
-    if chapter_update.name:
-        name_conflict = db.chapters.find_one({
-            "subject_id": existing_chapter["subject_id"],
-            "name": chapter_update.name,
-            "id": {"$ne": chapter_id}
-        })
-        if name_conflict:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Another chapter with this name already exists for this subject"
-            )
-    
-    # Update chapter
-    update_data = {k: v for k, v in chapter_update.model_dump().items() if v is not None}
-    update_data["updated_at"] = datetime.now()
-    update_data["updated_by"] = current_user.username
-    
-    result = db.chapters.update_one(
-        {"id": chapter_id},
-        {"$set": update_data}
+    chapter = await update_node(
+        get_curriculum_db().chapters, chapter_id, chapter_update, current_user.username,
+        "Chapter", "Another chapter with this name already exists for this subject"
     )
-    
-    if result.matched_count == 0:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Chapter not found"
-        )
-    
-    updated_chapter = db.chapters.find_one({"id": chapter_id})
-    return ChapterResponse(**updated_chapter)
+    await curriculum_changed("chapters")
+    return ChapterResponse(**chapter)
 
-@router.delete("/chapters/{chapter_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_chapter(chapter_id: str, current_user = Depends(get_current_user)):
-    """Delete a chapter"""
+@router.delete("/chapters/{chapter_id}", status_code=status.HTTP_204_NO_CONTENT, responses={202: {"model": CurriculumJobResponse}})
+async def delete_chapter(
+    chapter_id: str,
+    background_tasks: BackgroundTasks,
+    cascade: bool = Query(False, description="Delete the whole subtree in a background job"),
+    questions: QuestionAction = Query(QuestionAction.DELETE, description="What a cascading delete does with the questions of the subtree"),
+    current_user = Depends(get_current_user)
+):
+    """
+    Delete a chapter.
+
+    If cascade=true (admins only), the chapter and everything below it is deleted by a
+    background job and the job is returned with 202. questions=delete removes the
+    questions of the subtree, questions=detach keeps them with the deleted ids cleared.
+    """
     db = get_curriculum_db()
     
+    if cascade:
+        return await start_cascade_delete(
+            db.chapters, TreeLevel.CHAPTER, chapter_id, questions, background_tasks, current_user, "Chapter"
+        )
+    
     # Check if chapter has topics
-    topics_count = db.topics.count_documents({"chapter_id": chapter_id})
+    topics_count = await db.topics.count_documents({"chapter_id": chapter_id})
     if topics_count > 0:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Cannot delete chapter with {topics_count} associated topics. Remove topics first."
         )
     
-    result = db.chapters.delete_one({"id": chapter_id})
+    result = await db.chapters.delete_one({"id": chapter_id})
+    await curriculum_changed("chapters")
+    await drop_node_stats([chapter_id])
     
     if result.deleted_count == 0:
         raise HTTPException(
@@ -464,7 +580,7 @@ async def create_topic(
     db = get_curriculum_db()
     
     # Check if chapter exists
-    chapter = db.chapters.find_one({"id": chapter_id})
+    chapter = await db.chapters.find_one({"id": chapter_id})
     if not chapter:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -472,7 +588,7 @@ async def create_topic(
         )
     
     # Check if topic with same name already exists for this chapter
-    existing_topic = db.topics.find_one({
+    existing_topic = await db.topics.find_one({
         "chapter_id": chapter_id,
         "name": topic.name
     })
@@ -487,10 +603,12 @@ async def create_topic(
     topic_dict = topic.model_dump()
     topic_dict["id"] = topic_id
     topic_dict["chapter_id"] = chapter_id
+    topic_dict["ancestors"] = child_ancestors(chapter)
     topic_dict["created_at"] = datetime.now()
     topic_dict["created_by"] = current_user.username
     
-    result = db.topics.insert_one(topic_dict)
+    result = await db.topics.insert_one(topic_dict)
+    await curriculum_changed("topics")
     
     if not result.acknowledged:
         raise HTTPException(
@@ -500,33 +618,36 @@ async def create_topic(
     
     return TopicResponse(**topic_dict)
 
-@router.get("/chapters/{chapter_id}/topics", response_model=List[TopicResponse])
+@router.get("/chapters/{chapter_id}/topics", response_model=List[TopicResponse], response_class=FastJSONResponse, dependencies=[Depends(conditional_get("topics", "chapters"))])
 async def get_topics_by_chapter(
     chapter_id: str,
+    page: PageParams = Depends(),
     current_user = Depends(get_current_user)
 ):
     """Get all topics for a specific chapter"""
     db = get_curriculum_db()
     
     # Check if chapter exists
-    chapter = db.chapters.find_one({"id": chapter_id})
+    chapter = await db.chapters.find_one({"id": chapter_id})
     if not chapter:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Chapter not found"
         )
     
-    topics = list(db.topics.find({"chapter_id": chapter_id}))
-    return [TopicResponse(**topic) for topic in topics]
+    topics, next_cursor = await page.fetch(
+        db.topics, {"chapter_id": chapter_id}, NAME_SORT, page.projection(TopicResponse, NAME_SORT)
+    )
+    return page.respond(topics, TopicResponse, next_cursor)
 
-@router.get("/topics/{topic_id}", response_model=TopicResponse)
+@router.get("/topics/{topic_id}", response_model=TopicResponse, dependencies=[Depends(conditional_get("topics"))])
 async def get_topic(
     topic_id: str,
     current_user = Depends(get_current_user)
 ):
     """Get a specific topic by ID"""
     db = get_curriculum_db()
-    topic = db.topics.find_one({"id": topic_id})
+    topic = await db.topics.find_one({"id": topic_id})
     
     if not topic:
         raise HTTPException(
@@ -543,62 +664,46 @@ async def update_topic(
     current_user = Depends(get_current_user)
 ):
     """Update a topic"""
-    db = get_curriculum_db()
-    
-    # Check if topic exists
-    existing_topic = db.topics.find_one({"id": topic_id})
-    if not existing_topic:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Topic not found"
-        )
-    
-    # If name is changed, check for conflicts
-    if topic_update.name:
-        name_conflict = db.topics.find_one({
-            "chapter_id": existing_topic["chapter_id"],
-            "name": topic_update.name,
-            "id": {"$ne": topic_id}
-        })
-        if name_conflict:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Another topic with this name already exists for this chapter"
-            )
-    
-    # Update topic
-    update_data = {k: v for k, v in topic_update.model_dump().items() if v is not None}
-    update_data["updated_at"] = datetime.now()
-    update_data["updated_by"] = current_user.username
-    
-    result = db.topics.update_one(
-        {"id": topic_id},
-        {"$set": update_data}
+    topic = await update_node(
+        get_curriculum_db().topics, topic_id, topic_update, current_user.username,
+        "Topic", "Another topic with this name already exists for this chapter"
     )
-    
-    if result.matched_count == 0:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Topic not found"
-        )
-    
-    updated_topic = db.topics.find_one({"id": topic_id})
-    return TopicResponse(**updated_topic)
+    await curriculum_changed("topics")
+    return TopicResponse(**topic)
 
-@router.delete("/topics/{topic_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_topic(topic_id: str, current_user = Depends(get_current_user)):
-    """Delete a topic"""
+@router.delete("/topics/{topic_id}", status_code=status.HTTP_204_NO_CONTENT, responses={202: {"model": CurriculumJobResponse}})
+async def delete_topic(
+    topic_id: str,
+    background_tasks: BackgroundTasks,
+    cascade: bool = Query(False, description="Delete the whole subtree in a background job"),
+    questions: QuestionAction = Query(QuestionAction.DELETE, description="What a cascading delete does with the questions of the subtree"),
+    current_user = Depends(get_current_user)
+):
+    """
+    Delete a topic.
+
+    If cascade=true (admins only), the topic and everything below it is deleted by a
+    background job and the job is returned with 202. questions=delete removes the
+    questions of the subtree, questions=detach keeps them with the deleted ids cleared.
+    """
     db = get_curriculum_db()
     
+    if cascade:
+        return await start_cascade_delete(
+            db.topics, TreeLevel.TOPIC, topic_id, questions, background_tasks, current_user, "Topic"
+        )
+    
     # Check if topic has questions
-    questions_count = db.questions.count_documents({"topic_id": topic_id})
+    questions_count = await get_questions_collection().count_documents({"topic_id": topic_id})
     if questions_count > 0:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Cannot delete topic with {questions_count} associated questions. Remove questions first."
         )
     
-    result = db.topics.delete_one({"id": topic_id})
+    result = await db.topics.delete_one({"id": topic_id})
+    await curriculum_changed("topics")
+    await drop_node_stats([topic_id])
     
     if result.deleted_count == 0:
         raise HTTPException(
@@ -619,7 +724,7 @@ async def create_question_type(
     db = get_curriculum_db()
     
     # Check if question type with same code already exists
-    existing_question_type = db.question_types.find_one({"name": question_type.name})
+    existing_question_type = await db.question_types.find_one({"name": question_type.name})
     if existing_question_type:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -633,7 +738,8 @@ async def create_question_type(
     question_type_dict["created_at"] = datetime.now()
     question_type_dict["created_by"] = current_user.username
     
-    result = db.question_types.insert_one(question_type_dict)
+    result = await db.question_types.insert_one(question_type_dict)
+    await curriculum_changed("question_types")
     
     if not result.acknowledged:
         raise HTTPException(
@@ -643,18 +749,20 @@ async def create_question_type(
     
     return QuestionTypeResponse(**question_type_dict)
 
-@router.get("/question-types", response_model=List[QuestionTypeResponse])
-async def get_all_question_types(current_user = Depends(get_current_user)):
+@router.get("/question-types", response_model=List[QuestionTypeResponse], response_class=FastJSONResponse, dependencies=[Depends(conditional_get("question_types"))])
+async def get_all_question_types(page: PageParams = Depends(), current_user = Depends(get_current_user)):
     """Get all question types"""
     db = get_curriculum_db()
-    question_types = list(db.question_types.find())
-    return [QuestionTypeResponse(**question_type) for question_type in question_types]
+    question_types, next_cursor = await page.fetch(
+        db.question_types, {}, NAME_SORT, page.projection(QuestionTypeResponse, NAME_SORT)
+    )
+    return page.respond(question_types, QuestionTypeResponse, next_cursor)
 
-@router.get("/question-types/{question_type_id}", response_model=QuestionTypeResponse)
+@router.get("/question-types/{question_type_id}", response_model=QuestionTypeResponse, dependencies=[Depends(conditional_get("question_types"))])
 async def get_question_type(question_type_id: str, current_user = Depends(get_current_user)):
     """Get a specific question type by ID"""
     db = get_curriculum_db()
-    question_type = db.question_types.find_one({"id": question_type_id})
+    question_type = await db.question_types.find_one({"id": question_type_id})
     
     if not question_type:
         raise HTTPException(
@@ -671,34 +779,12 @@ async def update_question_type(
     current_user = Depends(get_current_user)
 ):
     """Update a question type"""
-    db = get_curriculum_db()
-    
-    # Check if question type exists
-    existing_question_type = db.question_types.find_one({"id": question_type_id})
-    if not existing_question_type:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Question type not found"
-        )
-    
-    # Update question type
-    update_data = {k: v for k, v in question_type_update.model_dump().items() if v is not None}
-    update_data["updated_at"] = datetime.now()
-    update_data["updated_by"] = current_user.username
-    
-    result = db.question_types.update_one(
-        {"id": question_type_id},
-        {"$set": update_data}
+    question_type = await update_node(
+        get_curriculum_db().question_types, question_type_id, question_type_update, current_user.username,
+        "Question type", "Another question type with this name already exists"
     )
-    
-    if result.matched_count == 0:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Question type not found"
-        )
-    
-    updated_question_type = db.question_types.find_one({"id": question_type_id})
-    return QuestionTypeResponse(**updated_question_type)
+    await curriculum_changed("question_types")
+    return QuestionTypeResponse(**question_type)
 
 @router.delete("/question-types/{question_type_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_question_type(question_type_id: str, current_user = Depends(get_current_user)):
@@ -706,14 +792,15 @@ async def delete_question_type(question_type_id: str, current_user = Depends(get
     db = get_curriculum_db()
     
     # Check if any questions use this question type
-    questions_count = db.questions.count_documents({"question_type_id": question_type_id})
+    questions_count = await get_questions_collection().count_documents({"question_type_id": question_type_id})
     if questions_count > 0:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Cannot delete question type with {questions_count} associated questions. Update or remove these questions first."
         )
     
-    result = db.question_types.delete_one({"id": question_type_id})
+    result = await db.question_types.delete_one({"id": question_type_id})
+    await curriculum_changed("question_types")
     
     if result.deleted_count == 0:
         raise HTTPException(
@@ -733,7 +820,7 @@ async def create_tag(
     db = get_curriculum_db()
     
     # Check if tag with same name already exists
-    existing_tag = db.tags.find_one({"name": tag.name})
+    existing_tag = await db.tags.find_one({"name": tag.name})
     if existing_tag:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -748,7 +835,8 @@ async def create_tag(
     tag_dict["created_by"] = current_user.username
     tag_dict["usage_count"] = 0  # Initialize usage count
     
-    result = db.tags.insert_one(tag_dict)
+    result = await db.tags.insert_one(tag_dict)
+    await bump_versions("tags")
     
     if not result.acknowledged:
         raise HTTPException(
@@ -758,29 +846,29 @@ async def create_tag(
     
     return TagResponse(**tag_dict)
 
-@router.get("/tags", response_model=List[TagResponse])
+@router.get("/tags", response_model=List[TagResponse], response_class=FastJSONResponse, dependencies=[Depends(conditional_get("tags"))])
 async def get_all_tags(
+    page: PageParams = Depends(),
     current_user = Depends(get_current_user)
 ):
     """Get all tags"""
     db = get_curriculum_db()
-    tags = list(db.tags.find())
-    
-    # Update usage counts (optional - can be expensive on large collections)
-    for tag in tags:
-        # Count questions using this tag
-        tag["usage_count"] = db.questions.count_documents({"tags": tag["id"]})
-    
-    return [TagResponse(**tag) for tag in tags]
+    tags, next_cursor = await page.fetch(db.tags, {}, NAME_SORT, page.projection(TagResponse, NAME_SORT))
+    return page.respond(tags, TagResponse, next_cursor)
 
-@router.get("/tags/{tag_id}", response_model=TagResponse)
+@router.post("/tags/reconcile")
+async def reconcile_tags(current_admin = Depends(get_current_admin_user)):
+    """Recompute tag usage counts from the questions and fix any drift (admin only)"""
+    return await reconcile_tag_usage()
+
+@router.get("/tags/{tag_id}", response_model=TagResponse, dependencies=[Depends(conditional_get("tags"))])
 async def get_tag(
     tag_id: str,
     current_user = Depends(get_current_user)
 ):
     """Get a specific tag by ID"""
     db = get_curriculum_db()
-    tag = db.tags.find_one({"id": tag_id})
+    tag = await db.tags.find_one({"id": tag_id})
     
     if not tag:
         raise HTTPException(
@@ -788,9 +876,6 @@ async def get_tag(
             detail="Tag not found"
         )
     
-    # Update usage count
-    tag["usage_count"] = db.questions.count_documents({"tags": tag_id})
-    
     return TagResponse(**tag)
 
 @router.put("/tags/{tag_id}", response_model=TagResponse)
@@ -800,51 +885,12 @@ async def update_tag(
     current_user = Depends(get_current_user)
 ):
     """Update a tag"""
-    db = get_curriculum_db()
-    
-    # Check if tag exists
-    existing_tag = db.tags.find_one({"id": tag_id})
-    if not existing_tag:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Tag not found"
-        )
-    
-    # Check for name conflicts if name is being updated
-    if tag_update.name and tag_update.name != existing_tag["name"]:
-        name_conflict = db.tags.find_one({
-            "name": tag_update.name,
-            "id": {"$ne": tag_id}
-        })
-        if name_conflict:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Another tag with this name already exists"
-            )
-    
-    # Update tag
-    update_data = {k: v for k, v in tag_update.model_dump().items() if v is not None}
-    update_data["updated_at"] = datetime.now()
-    update_data["updated_by"] = current_user.username
-    
-    result = db.tags.update_one(
-        {"id": tag_id},
-        {"$set": update_data}
+    tag = await update_node(
+        get_curriculum_db().tags, tag_id, tag_update, current_user.username,
+        "Tag", "Another tag with this name already exists"
     )
-    
-    if result.matched_count == 0:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Tag not found"
-        )
-    
-    # Get updated tag
-    updated_tag = db.tags.find_one({"id": tag_id})
-    
-    # Update usage count
-    updated_tag["usage_count"] = db.questions.count_documents({"tags": tag_id})
-    
-    return TagResponse(**updated_tag)
+    await bump_versions("tags")
+    return TagResponse(**tag)
 
 @router.delete("/tags/{tag_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_tag(
@@ -858,17 +904,19 @@ async def delete_tag(
     If force=true, it will remove the tag from all questions using it and then delete.
     """
     db = get_curriculum_db()
+    questions = get_questions_collection()
     
     # Check if tag exists
-    tag = db.tags.find_one({"id": tag_id})
+    tag = await db.tags.find_one({"id": tag_id})
     if not tag:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Tag not found"
         )
     
-    # Check if tag is in use
-    usage_count = db.questions.count_documents({"tags": tag_id})
+    # Check if tag is in use, counted from the questions (tags index) rather
+    # than the stored counter so drift can't orphan tag ids on questions
+    usage_count = await questions.count_documents({"tags": tag_id})
     
     if usage_count > 0 and not force:
         raise HTTPException(
@@ -879,13 +927,14 @@ async def delete_tag(
     # If force is true and tag is in use, remove the tag from all questions
     if usage_count > 0 and force:
         # Remove this tag from all questions
-        db.questions.update_many(
+        await questions.update_many(
             {"tags": tag_id},
             {"$pull": {"tags": tag_id}}
         )
     
     # Delete the tag
-    result = db.tags.delete_one({"id": tag_id})
+    result = await db.tags.delete_one({"id": tag_id})
+    await bump_versions("tags")
     
     if result.deleted_count == 0:
         raise HTTPException(
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime
 from enum import Enum
 from uuid import UUID
@@ -131,3 +131,59 @@ class QuestionTypeResponse(BaseModel):
     updated_at: Optional[datetime] = None
     updated_by: Optional[str] = None
 
+
+# ----- CURRICULUM TREE MODELS -----
+
+class TreeLevel(str, Enum):
+    STANDARD = "standard"
+    SUBJECT = "subject"
+    CHAPTER = "chapter"
+    TOPIC = "topic"
+
+class CurriculumNode(BaseModel):
+    id: str
+    name: str
+    description: Optional[str] = None
+    subjects: Optional[List["CurriculumNode"]] = None
+    chapters: Optional[List["CurriculumNode"]] = None
+    topics: Optional[List["CurriculumNode"]] = None
+
+
+# ----- CURRICULUM JOB MODELS -----
+
+class QuestionAction(str, Enum):
+    DELETE = "delete"
+    DETACH = "detach"
+
+class JobStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class CurriculumJobResponse(BaseModel):
+    id: str
+    type: str
+    status: JobStatus
+    level: TreeLevel
+    node_id: str
+    questions: QuestionAction
+    # Nodes found in the subtree and the number handled so far, per collection
+    totals: dict = Field(default_factory=dict)
+    progress: dict = Field(default_factory=dict)
+    error: Optional[str] = None
+    created_at: datetime
+    created_by: str
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+# ----- CURRICULUM STATS MODELS -----
+
+class CurriculumStatsResponse(BaseModel):
+    level: TreeLevel
+    node_id: str
+    total: int = 0
+    by_question_type: Dict[str, int] = Field(default_factory=dict)
+    by_difficulty: Dict[str, int] = Field(default_factory=dict)
+    by_marks: Dict[str, int] = Field(default_factory=dict)
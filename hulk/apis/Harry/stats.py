@@ -0,0 +1,125 @@
+"""
+Question count rollups per curriculum node.
+
+`curriculum_stats` holds one document per standard, subject, chapter and
+topic (keyed by the node id) with the number of questions below it, broken
+down by question type, difficulty and marks:
+
+    {"_id": node_id, "level": "chapter", "total": 12,
+     "by_question_type": {type_id: 4, ...}, "by_difficulty": {"easy": 5, ...},
+     "by_marks": {"2": 7, ...}}
+
+Every path that creates or deletes questions applies the change to the
+four nodes of each question with one unordered bulk of $inc upserts, so
+reads never scan questions. rebuild_stats() recomputes everything from the
+questions to repair drift:
+
+    python -m apis.Harry.stats rebuild
+"""
+from collections import Counter
+from pymongo import UpdateOne
+from typing import Dict, Iterable, List, Optional
+import argparse
+import asyncio
+import json
+import logging
+from apis.Ginny.utils import close_mongo_clients
+from apis.Ginny.versions import bump_versions
+from .db_init import get_curriculum_db
+from .models import TreeLevel
+from .tags import get_questions_collection
+
+logger = logging.getLogger(__name__)
+
+STATS_COLLECTION = "curriculum_stats"
+
+# Question fields the rollups are computed from, for callers' projections
+STATS_FIELDS = ("question_type_id", "difficulty_level", "marks", "standard_id", "subject_id", "chapter_id", "topic_id")
+BREAKDOWNS = {
+    "by_question_type": "question_type_id",
+    "by_difficulty": "difficulty_level",
+    "by_marks": "marks",
+}
+
+
+def get_stats_collection():
+    return get_curriculum_db()[STATS_COLLECTION]
+
+
+def stat_changes(questions: Iterable[dict], amount: int, changes: Optional[Dict[str, dict]] = None) -> Dict[str, dict]:
+    """Counter changes per node for adding `amount` of each question, merged into `changes`"""
+    changes = {} if changes is None else changes
+    for question in questions:
+        for level in TreeLevel:
+            node_id = question.get(f"{level.value}_id")
+            if not node_id:
+                continue
+            counters = changes.setdefault(node_id, {"level": level.value, "inc": Counter()})["inc"]
+            counters["total"] += amount
+            for breakdown, field in BREAKDOWNS.items():
+                counters[f"{breakdown}.{question.get(field)}"] += amount
+    return changes
+
+
+def stat_operations(changes: Dict[str, dict]) -> List[UpdateOne]:
+    operations = []
+    for node_id, change in changes.items():
+        inc = {field: amount for field, amount in change["inc"].items() if amount}
+        if inc:
+            operations.append(UpdateOne({"_id": node_id}, {"$inc": inc, "$set": {"level": change["level"]}}, upsert=True))
+    return operations
+
+
+async def apply_question_stats(questions: Iterable[dict], amount: int):
+    """Count questions in (amount=1) or out of (amount=-1) the rollups of their nodes"""
+    operations = stat_operations(stat_changes(questions, amount))
+    if operations:
+        await get_stats_collection().bulk_write(operations, ordered=False)
+        await bump_versions(STATS_COLLECTION)
+
+
+async def drop_node_stats(node_ids: List[str]):
+    """Forget the rollups of deleted nodes"""
+    if node_ids:
+        await get_stats_collection().delete_many({"_id": {"$in": node_ids}})
+        await bump_versions(STATS_COLLECTION)
+
+
+def format_stats(level: TreeLevel, node_id: str, document: Optional[dict]) -> dict:
+    """A node's rollup as served by the API, without counters that dropped to zero"""
+    document = document or {}
+    stats = {"level": level.value, "node_id": node_id, "total": document.get("total", 0)}
+    for breakdown in BREAKDOWNS:
+        stats[breakdown] = {key: count for key, count in (document.get(breakdown) or {}).items() if count}
+    return stats
+
+
+async def rebuild_stats() -> dict:
+    """Recompute every rollup from the questions"""
+    changes = {}
+    projection = {"_id": 0, **{field: 1 for field in STATS_FIELDS}}
+    async for question in get_questions_collection().find({}, projection):
+        stat_changes([question], 1, changes)
+
+    stats = get_stats_collection()
+    await stats.delete_many({})
+    operations = stat_operations(changes)
+    for start in range(0, len(operations), 1_000):
+        await stats.bulk_write(operations[start:start + 1_000], ordered=False)
+    await bump_versions(STATS_COLLECTION)
+    logger.info("Rebuilt question statistics of %d nodes", len(operations))
+    return {"nodes": len(operations)}
+
+
+async def _run():
+    try:
+        print(json.dumps(await rebuild_stats(), indent=2))
+    finally:
+        await close_mongo_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain curriculum question statistics")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+    asyncio.run(_run())
@@ -0,0 +1,90 @@
+"""
+Tag usage counters.
+
+Each tag stores the number of questions using it in `usage_count`. The
+question routes adjust it with atomic $inc updates as questions are
+created and deleted, and reconcile_tag_usage() recomputes every counter
+from the questions in one aggregation to repair any drift:
+
+    python -m apis.Harry.tags reconcile
+"""
+from collections import Counter
+from pymongo import UpdateOne
+from typing import Dict, Iterable, Optional
+import argparse
+import asyncio
+import json
+import logging
+import os
+from apis.Ginny.utils import get_database, close_mongo_clients
+from apis.Ginny.versions import bump_versions
+from .db_init import get_curriculum_db
+
+logger = logging.getLogger(__name__)
+
+
+def get_questions_collection():
+    return get_database(os.getenv("MONOGO_QUESTION_BANK_DB")).questions
+
+
+async def apply_tag_usage_changes(changes: Dict[str, int]):
+    """Add each amount to the usage counter of its tag"""
+    operations = [
+        UpdateOne({"id": tag_id}, {"$inc": {"usage_count": amount}})
+        for tag_id, amount in changes.items() if amount
+    ]
+    if operations:
+        await get_curriculum_db().tags.bulk_write(operations, ordered=False)
+        await bump_versions("tags")
+
+
+async def adjust_tag_usage(tag_ids: Optional[Iterable[str]], amount: int):
+    """Add `amount` to the counter of every tag of one question"""
+    await apply_tag_usage_changes({tag_id: amount for tag_id in set(tag_ids or [])})
+
+
+def count_tags(questions: Iterable[dict]) -> Counter:
+    """Number of uses per tag across several questions"""
+    counts = Counter()
+    for question in questions:
+        counts.update(set(question.get("tags") or []))
+    return counts
+
+
+async def reconcile_tag_usage() -> dict:
+    """Recompute every tag counter from the questions and fix the ones that drifted"""
+    cursor = await get_questions_collection().aggregate([
+        # A question listing a tag twice uses it once, as in count_tags
+        {"$project": {"tags": {"$setUnion": ["$tags", []]}}},
+        {"$unwind": "$tags"},
+        {"$group": {"_id": "$tags", "count": {"$sum": 1}}},
+    ])
+    actual = {row["_id"]: row["count"] async for row in cursor}
+
+    tags = get_curriculum_db().tags
+    drift = {}
+    operations = []
+    async for tag in tags.find({}, {"_id": 0, "id": 1, "usage_count": 1}):
+        count = actual.get(tag["id"], 0)
+        if tag.get("usage_count") != count:
+            drift[tag["id"]] = {"stored": tag.get("usage_count"), "actual": count}
+            operations.append(UpdateOne({"id": tag["id"]}, {"$set": {"usage_count": count}}))
+    if operations:
+        await tags.bulk_write(operations, ordered=False)
+        await bump_versions("tags")
+        logger.info("Fixed usage counts of %d tags", len(operations))
+    return {"fixed": len(operations), "drift": drift}
+
+
+async def _run():
+    try:
+        print(json.dumps(await reconcile_tag_usage(), indent=2))
+    finally:
+        await close_mongo_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain tag usage counters")
+    parser.add_argument("command", choices=["reconcile"])
+    parser.parse_args()
+    asyncio.run(_run())
@@ -0,0 +1,80 @@
+"""
+Nested curriculum tree built with a single aggregation.
+
+Each level is joined to its children with a $lookup sub-pipeline on the
+parent id, which the compound unique indexes serve (the localField plus
+pipeline form needs MongoDB 5.0+). Serialized trees are kept in the
+curriculum cache, so they are rebuilt only after a curriculum write or
+once they expire.
+"""
+from fastapi import HTTPException, status
+from hashlib import sha1
+from typing import Optional
+from apis.Ginny.responses import dumps
+from .cache import curriculum_cache
+from .db_init import get_curriculum_db
+from .models import TreeLevel
+
+# Level -> (collection, field pointing at the parent)
+LEVELS = [
+    (TreeLevel.STANDARD, "standards", None),
+    (TreeLevel.SUBJECT, "subjects", "standard_id"),
+    (TreeLevel.CHAPTER, "chapters", "subject_id"),
+    (TreeLevel.TOPIC, "topics", "chapter_id"),
+]
+
+NODE_FIELDS = {"_id": 0, "id": 1, "name": 1, "description": 1}
+
+
+def _children_stages(level_index: int, depth: Optional[int]) -> list:
+    """Stages that sort a level and attach up to `depth` levels of children"""
+    stages = [{"$sort": {"name": 1}}]
+    projection = dict(NODE_FIELDS)
+    child_index = level_index + 1
+    if child_index < len(LEVELS) and (depth is None or depth > 0):
+        _, child_collection, parent_field = LEVELS[child_index]
+        stages.append({"$lookup": {
+            "from": child_collection,
+            "localField": "id",
+            "foreignField": parent_field,
+            "pipeline": _children_stages(child_index, None if depth is None else depth - 1),
+            "as": child_collection,
+        }})
+        projection[child_collection] = 1
+    stages.append({"$project": projection})
+    return stages
+
+
+def tree_pipeline(root_level: TreeLevel = TreeLevel.STANDARD, root_id: Optional[str] = None, depth: Optional[int] = None) -> tuple:
+    """The collection to aggregate and the pipeline producing the nested tree"""
+    level_index = next(i for i, level in enumerate(LEVELS) if level[0] == root_level)
+    _, collection, _ = LEVELS[level_index]
+    match = {"id": root_id} if root_id else {}
+    return collection, [{"$match": match}, *_children_stages(level_index, depth)]
+
+
+def tree_etag(body: bytes) -> str:
+    return f'"{sha1(body).hexdigest()}"'
+
+
+async def build_tree(root_level: TreeLevel = TreeLevel.STANDARD, root_id: Optional[str] = None, depth: Optional[int] = None) -> dict:
+    """Serialized tree and its ETag, from the cache when nothing changed since it was built"""
+    key = f"tree:{root_level.value}:{root_id}:{depth}"
+    cached = curriculum_cache.get_derived(key)
+    if cached is not None:
+        return cached
+
+    version = curriculum_cache.version
+    collection, pipeline = tree_pipeline(root_level, root_id, depth)
+    cursor = await get_curriculum_db()[collection].aggregate(pipeline)
+    nodes = await cursor.to_list()
+    if root_id and not nodes:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"{root_level.value.capitalize()} not found"
+        )
+
+    body = dumps(nodes)
+    tree = {"body": body, "etag": tree_etag(body)}
+    curriculum_cache.store_derived(key, tree, version)
+    return tree
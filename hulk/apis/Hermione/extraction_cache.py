@@ -0,0 +1,116 @@
+"""
+Content-addressed cache of page extraction results.
+
+Teachers often upload the same paper, or the same scanned page, more than
+once. The validated `{"questions": [...]}` Gemini returned for a page is
+kept under a hash of the page image, the prompt version and the model, so
+a repeat scan skips the provider call. The OpenAI cleanup of those
+questions is cached the same way, keyed on its input JSON. Any change to
+a prompt or a model produces new keys and the old entries simply expire.
+
+Entries are stored in the `extraction_cache` collection of the question
+bank database for EXTRACTION_CACHE_TTL_DAYS, with an in-process LRU of
+EXTRACTION_CACHE_MAX_ENTRIES in front of it. EXTRACTION_CACHE=false turns
+the cache off. Cache failures are logged and treated as misses, they
+never fail an extraction.
+
+Cached results are copied on the way out, callers may modify them.
+"""
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from hashlib import sha256
+from pymongo.errors import PyMongoError
+from typing import Optional
+import logging
+import os
+from apis.Ginny.metrics import extraction_cache_hits_total, extraction_cache_misses_total
+from apis.Ginny.utils import get_database
+
+logger = logging.getLogger(__name__)
+
+CACHE_COLLECTION = "extraction_cache"
+
+
+def get_cache_collection():
+    return get_database(os.getenv("MONOGO_QUESTION_BANK_DB"))[CACHE_COLLECTION]
+
+
+def cache_key(image: bytes, prompt_version: str, model: str) -> str:
+    """Hash of the page image together with everything else shaping the answer"""
+    digest = sha256()
+    for part in (prompt_version.encode(), model.encode(), image):
+        # Length prefixes keep the parts from running into each other
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def _copy(result: dict) -> dict:
+    return {"questions": [dict(question) for question in result.get("questions", [])]}
+
+
+class ExtractionCache:
+    def __init__(self, max_entries: int = None, ttl_days: float = None, enabled: bool = None):
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "2000"))
+        self.ttl_days = ttl_days if ttl_days is not None else float(os.getenv("EXTRACTION_CACHE_TTL_DAYS", "30"))
+        self.enabled = enabled if enabled is not None else os.getenv("EXTRACTION_CACHE", "true").lower() != "false"
+        # key -> result, least recently used first
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+
+    def _remember(self, key: str, result: dict):
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[dict]:
+        """Cached result of a page, from memory first, then from Mongo"""
+        if not self.enabled:
+            return None
+        result = self._entries.get(key)
+        if result is not None:
+            self._entries.move_to_end(key)
+            extraction_cache_hits_total.inc(layer="memory")
+            return _copy(result)
+
+        try:
+            document = await get_cache_collection().find_one(
+                {"id": key, "expires_at": {"$gt": datetime.now()}}, {"_id": 0, "result": 1}
+            )
+        except PyMongoError as e:
+            logger.warning("Extraction cache lookup failed: %s", e)
+            document = None
+        if document is None:
+            extraction_cache_misses_total.inc()
+            return None
+        self._remember(key, document["result"])
+        extraction_cache_hits_total.inc(layer="mongo")
+        return _copy(document["result"])
+
+    async def set(self, key: str, result: dict, model: str):
+        """Store the validated result of a page"""
+        if not self.enabled:
+            return
+        result = _copy(result)
+        self._remember(key, result)
+        now = datetime.now()
+        try:
+            await get_cache_collection().update_one(
+                {"id": key},
+                {"$set": {
+                    "result": result,
+                    "model": model,
+                    "created_at": now,
+                    "expires_at": now + timedelta(days=self.ttl_days),
+                }},
+                upsert=True
+            )
+        except PyMongoError as e:
+            logger.warning("Extraction cache write failed: %s", e)
+
+    def clear(self):
+        """Forget the in-memory entries, the Mongo entries expire on their own"""
+        self._entries.clear()
+
+
+extraction_cache = ExtractionCache()
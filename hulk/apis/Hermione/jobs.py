@@ -0,0 +1,238 @@
+"""
+Background question extraction jobs.
+
+Extraction takes minutes for a long PDF, so the scan routes only store the
+upload in the `uploads` GridFS bucket, record a QuestionBankUpload in
+`question_bank_uploads` and return it. A pool of worker tasks, started
+with the application, claims pending jobs with an atomic
+find_one_and_update (so several processes can share the queue), runs the
+processor registered for the upload type and records progress, the
+extracted questions or the error on the job. Clients poll
+GET /question-extractor/jobs/{job_id}.
+
+Workers are woken as soon as a job is queued in their process and poll
+every EXTRACTION_POLL_SECONDS for jobs queued elsewhere. Stopping the
+workers (e.g. on a deploy) queues their jobs in progress again right away.
+Jobs left in `processing` by a process that died are queued again by any
+running worker, checked every REQUEUE_INTERVAL_SECONDS, once they were
+started more than EXTRACTION_STALE_AFTER_SECONDS ago. Every claim counts
+as an attempt, and a job claimed more than EXTRACTION_MAX_ATTEMPTS times
+(e.g. one that keeps crashing its worker) is marked failed instead of
+being processed again.
+"""
+from bson import ObjectId
+from datetime import datetime, timedelta
+from gridfs import AsyncGridFS
+from pymongo import ASCENDING, ReturnDocument
+from typing import Awaitable, Callable, Dict, Iterable, Optional
+import asyncio
+import logging
+import os
+import time
+from apis.Ginny.utils import get_database
+from models.question_bank_model import QuestionBankUpload, UploadType
+
+logger = logging.getLogger(__name__)
+
+UPLOADS_COLLECTION = "question_bank_uploads"
+UPLOADS_BUCKET = "uploads"
+REQUEUE_INTERVAL_SECONDS = 60
+
+# Puts a job back in the queue, its progress starts over
+REQUEUE = {"$set": {"processing_status": "pending", "started_at": None, "pages_processed": 0}}
+
+# Takes the job and the uploaded file, returns {"questions": [...]}
+Processor = Callable[[dict, bytes], Awaitable[dict]]
+
+
+def get_uploads_collection():
+    return get_database(os.getenv("MONOGO_QUESTION_BANK_DB"))[UPLOADS_COLLECTION]
+
+
+def get_uploads_bucket():
+    return AsyncGridFS(get_database(os.getenv("MONOGO_QUESTION_BANK_DB")), collection=UPLOADS_BUCKET)
+
+
+async def create_upload_job(
+    content: bytes,
+    filename: Optional[str],
+    upload_type: UploadType,
+    username: str,
+    question_bank_id: Optional[str] = None,
+    bank_info: Optional[dict] = None
+) -> dict:
+    """Store an uploaded file and record a pending extraction job for it"""
+    file_id = await get_uploads_bucket().put(content, filename=filename, uploaded_by=username)
+    job = QuestionBankUpload(
+        upload_type=upload_type,
+        file_path=str(file_id),
+        created_by=username,
+        filename=filename,
+        question_bank_id=question_bank_id,
+        bank_info=bank_info,
+    ).model_dump()
+    job["id"] = str(job["id"])
+    job["upload_type"] = upload_type.value
+    await get_uploads_collection().insert_one(dict(job))
+    return job
+
+
+async def update_upload_job(job_id: str, **fields):
+    await get_uploads_collection().update_one({"id": job_id}, {"$set": fields})
+
+
+async def claim_next_job() -> Optional[dict]:
+    """Take the oldest pending job, None when the queue is empty"""
+    return await get_uploads_collection().find_one_and_update(
+        {"processing_status": "pending"},
+        {"$set": {"processing_status": "processing", "started_at": datetime.now()}, "$inc": {"attempts": 1}},
+        projection={"_id": 0},
+        sort=[("created_at", ASCENDING)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+async def requeue_stale_jobs(stale_after_seconds: float) -> int:
+    """Queue again the jobs whose worker stopped before finishing them"""
+    result = await get_uploads_collection().update_many(
+        {
+            "processing_status": "processing",
+            "started_at": {"$lt": datetime.now() - timedelta(seconds=stale_after_seconds)},
+        },
+        REQUEUE
+    )
+    return result.modified_count
+
+
+async def requeue_jobs(job_ids: Iterable[str]) -> int:
+    """Queue again jobs this process claimed but did not finish"""
+    job_ids = list(job_ids)
+    if not job_ids:
+        return 0
+    result = await get_uploads_collection().update_many(
+        {"id": {"$in": job_ids}, "processing_status": "processing"}, REQUEUE
+    )
+    return result.modified_count
+
+
+class ExtractionWorkers:
+    """A fixed number of tasks processing queued extraction jobs"""
+
+    def __init__(
+        self,
+        processors: Dict[UploadType, Processor],
+        workers: int = None,
+        poll_seconds: float = None,
+        stale_after_seconds: float = None,
+        max_attempts: int = None
+    ):
+        self.processors = processors
+        self.workers = workers if workers is not None else int(os.getenv("EXTRACTION_WORKERS", "2"))
+        self.poll_seconds = poll_seconds if poll_seconds is not None else float(os.getenv("EXTRACTION_POLL_SECONDS", "5"))
+        self.stale_after_seconds = (
+            stale_after_seconds if stale_after_seconds is not None
+            else float(os.getenv("EXTRACTION_STALE_AFTER_SECONDS", "1800"))
+        )
+        self.max_attempts = max_attempts if max_attempts is not None else int(os.getenv("EXTRACTION_MAX_ATTEMPTS", "3"))
+        self._wakeup = asyncio.Event()
+        self._tasks = []
+        # Ids of the jobs being processed by this process
+        self._running = set()
+        self._next_requeue = 0.0
+
+    def notify(self):
+        """Wake the workers, called after queuing a job"""
+        self._wakeup.set()
+
+    async def start(self):
+        if self._tasks or self.workers <= 0:
+            return
+        await self._requeue_stale()
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Cancel the workers and queue the jobs they were processing again"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        try:
+            requeued = await requeue_jobs(self._running)
+            if requeued:
+                logger.warning("Queued %d extraction jobs in progress again", requeued)
+        except Exception:
+            logger.exception("Could not queue the extraction jobs in progress again")
+        self._running.clear()
+
+    async def _requeue_stale(self):
+        """Queue again jobs abandoned by a process that died, at most once per interval"""
+        # Check if another worker of this process already did it recently
+        if time.monotonic() < self._next_requeue:
+            return
+        self._next_requeue = time.monotonic() + REQUEUE_INTERVAL_SECONDS
+        try:
+            requeued = await requeue_stale_jobs(self.stale_after_seconds)
+            if requeued:
+                logger.warning("Queued %d interrupted extraction jobs again", requeued)
+        except Exception:
+            logger.exception("Could not check for interrupted extraction jobs")
+
+    async def _wait(self):
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _run(self):
+        while True:
+            await self._requeue_stale()
+            try:
+                job = await claim_next_job()
+            except Exception:
+                logger.exception("Could not claim an extraction job")
+                job = None
+            if job is None:
+                await self._wait()
+                continue
+            try:
+                await self.process(job)
+            except Exception:
+                logger.exception("Could not process extraction job %s", job["id"])
+
+    async def process(self, job: dict):
+        """Run one claimed job and record its outcome"""
+        bucket = get_uploads_bucket()
+        self._running.add(job["id"])
+        try:
+            # Check if earlier attempts already died while processing this job
+            if job.get("attempts", 1) > self.max_attempts:
+                raise RuntimeError(f"Gave up after {self.max_attempts} attempts")
+            upload = await bucket.get(ObjectId(job["file_path"]))
+            result = await self.processors[UploadType(job["upload_type"])](job, await upload.read())
+            questions = result.get("questions", [])
+            await update_upload_job(
+                job["id"],
+                processing_status="completed",
+                questions=questions,
+                questions_extracted=len(questions),
+                finished_at=datetime.now()
+            )
+        except Exception as e:
+            logger.exception("Extraction job %s failed", job["id"])
+            try:
+                await update_upload_job(
+                    job["id"],
+                    processing_status="failed",
+                    error_message=str(e),
+                    finished_at=datetime.now()
+                )
+            except Exception:
+                logger.exception("Could not record the failure of extraction job %s", job["id"])
+        # Not reached when cancelled, so stop() can queue the job again
+        self._running.discard(job["id"])
+        # The upload is only needed until the job has an outcome
+        try:
+            await bucket.delete(ObjectId(job["file_path"]))
+        except Exception:
+            logger.exception("Could not delete the upload of extraction job %s", job["id"])
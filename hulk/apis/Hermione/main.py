@@ -8,20 +8,31 @@ from dotenv import load_dotenv
 import json
 import tempfile
 import fitz
-from openai import OpenAI
+from openai import AsyncOpenAI
 from PIL import Image
 from io import BytesIO
 from uuid import UUID, uuid4
 from datetime import datetime
-from gridfs import GridFS
-from pymongo import MongoClient
+from gridfs import AsyncGridFS
 from fastapi.responses import StreamingResponse
 from security.main import get_current_user
-from models.question_bank_model import DifficultyLevel
+from models.question_bank_model import DifficultyLevel, QuestionBankUpload, UploadType
 from pydantic import BaseModel, Field
 import asyncio
+import logging
+import threading
 import time
-from apis.Harry.db_init import get_curriculum_db
+import weakref
+from apis.Harry.cache import curriculum_cache
+from apis.Harry.tags import adjust_tag_usage
+from apis.Harry.stats import apply_question_stats
+from apis.Ginny.versions import bump_versions
+from apis.Ginny.utils import get_database
+from apis.Ginny.metrics import track_llm_call, llm_request_failures_total
+from apis.Ginny.responses import sse_event
+from apis.Ginny.ratelimit import get_limiter
+from .extraction_cache import cache_key, extraction_cache
+from .jobs import ExtractionWorkers, create_upload_job, get_uploads_collection, update_upload_job
 
 # ----- QUESTION MODELS -----
 
@@ -51,10 +62,11 @@ class QuestionResponse(BaseModel):
     marks: int
     image_required: bool
     images: Optional[List[UUID]] = None
-    topic_id: str
-    chapter_id: str
-    subject_id: str
-    standard_id: str
+    # None once the curriculum node was deleted with questions=detach
+    topic_id: Optional[str] = None
+    chapter_id: Optional[str] = None
+    subject_id: Optional[str] = None
+    standard_id: Optional[str] = None
     tags: Optional[List[str]] = None
     created_at: datetime
     created_by: str
@@ -63,10 +75,46 @@ class QuestionResponse(BaseModel):
 
 load_dotenv(dotenv_path=".env")
 
+logger = logging.getLogger(__name__)
+
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_MODEL = "gemini-2.0-flash"
 if GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
 
+# Gemini requests in flight across every request and extraction job of the
+# process, so throughput follows the provider quota rather than upload shapes
+GEMINI_CONCURRENCY = max(1, int(os.getenv("GEMINI_CONCURRENCY", "4")))
+
+# Semaphores belong to the event loop that first waits on them, so each loop
+# (the app's, or a test's) gets its own
+_gemini_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+def get_gemini_slots() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    if loop not in _gemini_slots:
+        _gemini_slots[loop] = asyncio.Semaphore(GEMINI_CONCURRENCY)
+    return _gemini_slots[loop]
+
+# PyMuPDF is not thread-safe, pages are rendered off the event loop one at a time
+_render_lock = threading.Lock()
+
+def render_page(page: fitz.Page) -> bytes:
+    """PNG of a PDF page, blocking, run it in a thread"""
+    with _render_lock:
+        return page.get_pixmap().tobytes("png")
+
+# Rough token use charged to the rate limiter before a call: one page image,
+# the prompt and its answer. The bucket is settled with the reported usage.
+GEMINI_PAGE_TOKENS = 2000
+
+# Bump when the Gemini extraction prompt changes, so page results cached
+# with an older prompt are not reused
+EXTRACTION_PROMPT_VERSION = 1
+
+# Same for the OpenAI cleanup prompt
+CLEANUP_PROMPT_VERSION = 1
+
 # Create two separate routers
 router = APIRouter(
     prefix="/question-extractor", 
@@ -80,20 +128,14 @@ questions_router = APIRouter(
 
 # Connect to MongoDB and get GridFS
 def get_question_db():
-    client = MongoClient(os.getenv("MONGO_URI", "mongodb://localhost:27017"), uuidRepresentation="standard")
-    return client[os.getenv("MONOGO_QUESTION_BANK_DB")]
+    return get_database(os.getenv("MONOGO_QUESTION_BANK_DB"))
 
 def get_grid_fs():
     db = get_question_db()
-    return GridFS(db)
+    return AsyncGridFS(db)
 
 
-@router.post("/scan-pdf", status_code=status.HTTP_200_OK)
-async def scan_pdf(
-    file: UploadFile = File(...),
-    question_bank_id: Optional[str] = Form(None),
-    current_user = Depends(get_current_user)
-):
+def check_pdf_upload(file: UploadFile):
     if not GEMINI_API_KEY:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -106,100 +148,195 @@ async def scan_pdf(
             detail="File must be a PDF document"
         )
 
-    # If question_bank_id is provided, verify it exists and get its standard/subject
-    bank_info = None
-    if question_bank_id:
-        db = get_question_db()
-        bank = db.question_banks.find_one({"id": question_bank_id})
-        if not bank:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Question bank not found"
-            )
-        bank_info = {
-            "standard_id": bank["standard_id"],
-            "subject_id": bank["subject_id"]
-        }
+async def get_bank_info(question_bank_id: Optional[str]) -> Optional[dict]:
+    """Standard and subject of a question bank, None without a bank"""
+    if not question_bank_id:
+        return None
+    db = get_question_db()
+    bank = await db.question_banks.find_one({"id": question_bank_id})
+    if not bank:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Question bank not found"
+        )
+    return {
+        "standard_id": bank["standard_id"],
+        "subject_id": bank["subject_id"]
+    }
 
-    temp_pdf_path = None
-    try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_pdf:
-            temp_pdf.write(await file.read())
-            temp_pdf_path = temp_pdf.name
 
-        combined_data = {"questions": []}
+# The GridFS id of the stored upload is internal to the workers
+JOB_RESPONSE_EXCLUDE = {"file_path"}
 
-        with fitz.open(temp_pdf_path) as pdf_document:
-            start_time = time.time()
-            num_pages = len(pdf_document)
-            print(f"Processing {num_pages} pages concurrently")
-            pages = [pdf_document[page_num] for page_num in range(num_pages)]
-            
-            combined_data["questions"] = []
-            batch_size = min(4, num_pages) 
-            pages_per_minute = 13  
-            delay_between_batches = 2  
-            
-            print(f"[DEBUG] Starting PDF processing with batch size: {batch_size}")
-            print(f"[DEBUG] Rate limit: {pages_per_minute} pages/min, delay: {delay_between_batches} seconds")
-            
-            total_questions = 0
-            
-            # Process pages in batches
-            for i in range(0, len(pages), batch_size):
-                batch_start_time = time.time()
-                batch = pages[i:i+batch_size]
-                batch_num = i // batch_size + 1
-                total_batches = (len(pages) + batch_size - 1) // batch_size
-                
-                print(f"[DEBUG] Processing batch {batch_num}/{total_batches} - Pages {i+1} to {min(i+len(batch), len(pages))}")
-                
-                # Process batch concurrently
-                tasks = [extract_questions_from_image(page) for page in batch]
-                batch_results = await asyncio.gather(*tasks)
-                
-                # Process results
-                batch_questions = 0
-                for result in batch_results:
-                    if result and "questions" in result:
-                        batch_questions += len(result["questions"])
-                        combined_data["questions"].extend(result["questions"])
-                
-                total_questions += batch_questions
-                batch_end_time = time.time()
-                batch_duration = batch_end_time - batch_start_time
-                
-                print(f"[DEBUG] Batch {batch_num} complete - Processed {len(batch)} pages in {batch_duration:.2f}s")
-                print(f"[DEBUG] Extracted {batch_questions} questions from this batch (Total: {total_questions})")
-                
-                # Apply minimal rate limiting if there are more pages to process
-                if i + batch_size < len(pages):
-                    print(f"[DEBUG] Rate limiting: Waiting {delay_between_batches}s before next batch")
-                    await asyncio.sleep(delay_between_batches)
-            
-            total_duration = time.time() - start_time
-            print(f"[DEBUG] PDF processing complete - Total time: {total_duration:.2f}s")
-            print(f"[DEBUG] Extracted {total_questions} questions from {num_pages} pages")
-            print(f"[DEBUG] Average processing time per page: {total_duration/num_pages:.2f}s")
-                    
-        combined_data = get_checked_from_openai_response(combined_data)
-        # Add bank info to response if available
-        if bank_info:
-            combined_data["bank_info"] = bank_info
-            
-        return combined_data
+@router.post("/scan-pdf", status_code=status.HTTP_202_ACCEPTED, response_model=QuestionBankUpload, response_model_exclude=JOB_RESPONSE_EXCLUDE)
+async def scan_pdf(
+    file: UploadFile = File(...),
+    question_bank_id: Optional[str] = Form(None),
+    current_user = Depends(get_current_user)
+):
+    """
+    Queue a PDF for question extraction.
 
-    except Exception as e:
+    Pages go through Gemini and OpenAI in the background, poll
+    GET /question-extractor/jobs/{job_id} for progress and the questions.
+    """
+    check_pdf_upload(file)
+
+    # If question_bank_id is provided, verify it exists and get its standard/subject
+    bank_info = await get_bank_info(question_bank_id)
+
+    job = await create_upload_job(
+        await file.read(), file.filename, UploadType.PDF, current_user.username, question_bank_id, bank_info
+    )
+    extraction_workers.notify()
+    return QuestionBankUpload(**job)
+
+@router.get("/jobs/{job_id}", response_model=QuestionBankUpload, response_model_exclude=JOB_RESPONSE_EXCLUDE)
+async def get_extraction_job(job_id: str, current_user = Depends(get_current_user)):
+    """Get the status, progress and, once completed, the questions of an extraction job"""
+    job = await get_uploads_collection().find_one({"id": job_id}, {"_id": 0})
+    
+    # Check if job exists and belongs to the user
+    if not job or (job["created_by"] != current_user.username and not current_user.is_superuser):
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error processing PDF file: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Extraction job not found"
         )
-    finally:
-        if temp_pdf_path and os.path.exists(temp_pdf_path):
-            try:
-                os.unlink(temp_pdf_path)
-            except PermissionError:
-                pass
+    
+    return QuestionBankUpload(**job)
+
+@router.post("/scan-pdf/stream")
+async def scan_pdf_stream(
+    file: UploadFile = File(...),
+    question_bank_id: Optional[str] = Form(None),
+    current_user = Depends(get_current_user)
+):
+    """
+    Extract questions from a PDF, streaming each page's questions as Server-Sent Events.
+
+    Events, in order:
+    - `start`: {pages_total, bank_info}
+    - `page`: {page, questions} as soon as a page is extracted and cleaned up,
+      followed by `progress`: {pages_processed, pages_total, questions_extracted}
+    - `done`: {pages_processed, pages_total, questions_extracted}, or `error`: {detail}
+    """
+    check_pdf_upload(file)
+    bank_info = await get_bank_info(question_bank_id)
+    content = await file.read()
+    
+    # Reject unreadable files before the stream starts
+    try:
+        with fitz.open(stream=content, filetype="pdf") as pdf_document:
+            pages_total = len(pdf_document)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File is not a readable PDF document"
+        )
+
+    async def events():
+        pages_processed = 0
+        questions_extracted = 0
+        yield sse_event("start", {"pages_total": pages_total, "bank_info": bank_info})
+        pages = iter_pdf_page_questions(content)
+        try:
+            async for page_number, _, questions in pages:
+                # Each page is cleaned up on its own so it can be sent right away.
+                # That is one OpenAI call per page with questions instead of one
+                # per PDF (/scan-pdf), the price of streaming, and it still goes
+                # through the OpenAI rate limiter
+                if questions:
+                    questions = (await get_checked_from_openai_response({"questions": questions}))["questions"]
+                pages_processed += 1
+                questions_extracted += len(questions)
+                yield sse_event("page", {"page": page_number, "questions": questions})
+                yield sse_event("progress", {
+                    "pages_processed": pages_processed,
+                    "pages_total": pages_total,
+                    "questions_extracted": questions_extracted,
+                })
+            yield sse_event("done", {
+                "pages_processed": pages_processed,
+                "pages_total": pages_total,
+                "questions_extracted": questions_extracted,
+            })
+        except Exception as e:
+            yield sse_event("error", {"detail": f"Error processing PDF file: {str(e)}"})
+        finally:
+            # Check if the client went away, the pages still queued are not needed
+            await pages.aclose()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def iter_pdf_page_questions(content: bytes):
+    """
+    Yield (page number, pages total, questions) for every page of a PDF.
+
+    Every page is scheduled at once and the Gemini slots decide how many
+    run at the same time. Pages are yielded as soon as they finish, so the
+    order follows completion rather than page number.
+    """
+    with fitz.open(stream=content, filetype="pdf") as pdf_document:
+        start_time = time.time()
+        num_pages = len(pdf_document)
+        logger.debug("Starting PDF processing of %d pages with %d concurrent requests", num_pages, GEMINI_CONCURRENCY)
+
+        async def extract_page(page_num):
+            return page_num, await extract_questions_from_image(pdf_document[page_num])
+
+        tasks = [asyncio.create_task(extract_page(page_num)) for page_num in range(num_pages)]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                page_num, result = await finished
+                yield page_num + 1, num_pages, (result or {}).get("questions", [])
+        finally:
+            # Check if the consumer went away early, pages still queued are not needed
+            for task in tasks:
+                task.cancel()
+            # Let them finish before the document closes under them
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        logger.debug("PDF processing complete - %d pages in %.2fs", num_pages, time.time() - start_time)
+
+async def extract_questions_from_pdf(content: bytes, on_progress=None) -> dict:
+    """
+    Extract the questions of every page of a PDF, then clean them up with OpenAI.
+
+    `on_progress(pages_processed, pages_total, questions_extracted)` is awaited
+    after each page.
+    """
+    questions_by_page = {}
+    questions_extracted = 0
+    async for page_number, pages_total, questions in iter_pdf_page_questions(content):
+        questions_by_page[page_number] = questions
+        questions_extracted += len(questions)
+        if on_progress:
+            await on_progress(len(questions_by_page), pages_total, questions_extracted)
+
+    # Keep the questions in page order whatever order the pages finished in
+    combined_data = {"questions": [
+        question for page_number in sorted(questions_by_page) for question in questions_by_page[page_number]
+    ]}
+    return await get_checked_from_openai_response(combined_data)
+
+async def process_pdf_upload(job: dict, content: bytes) -> dict:
+    """Run the extraction of a queued PDF job, recording page progress on the job"""
+    async def on_progress(pages_processed, pages_total, questions_extracted):
+        await update_upload_job(
+            job["id"],
+            pages_processed=pages_processed,
+            pages_total=pages_total,
+            questions_extracted=questions_extracted
+        )
+
+    return await extract_questions_from_pdf(content, on_progress)
+
+extraction_workers = ExtractionWorkers({UploadType.PDF: process_pdf_upload})
 
 @router.post("/scan-excel", status_code=status.HTTP_200_OK)
 async def scan_excel(
@@ -220,7 +357,7 @@ async def scan_excel(
     bank_info = None
     if question_bank_id:
         db = get_question_db()
-        bank = db.question_banks.find_one({"id": question_bank_id})
+        bank = await db.question_banks.find_one({"id": question_bank_id})
         if not bank:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -305,7 +442,7 @@ async def scan_image(
     bank_info = None
     if question_bank_id:
         db = get_question_db()
-        bank = db.question_banks.find_one({"id": question_bank_id})
+        bank = await db.question_banks.find_one({"id": question_bank_id})
         if not bank:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -320,7 +457,7 @@ async def scan_image(
         image_data = await file.read()
         image = Image.open(BytesIO(image_data))
         result_data = await extract_questions_from_image(image)
-        result_data = get_checked_from_openai_response(result_data)
+        result_data = await get_checked_from_openai_response(result_data)
         if bank_info:
             result_data["bank_info"] = bank_info
         return result_data
@@ -346,31 +483,28 @@ async def create_question(
 ):
     """Create a new question with optional image upload and add to question bank if specified"""
     question_db = get_question_db()
-    curriculum_db = get_curriculum_db()
     
     # Validate topic_id and get related information
-    topic = curriculum_db.topics.find_one({"id": topic_id})
-    if not topic:
+    path = await curriculum_cache.topic_path(topic_id)
+    if not path:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Topic not found"
         )
+    standard, subject, chapter, topic = path
     
-    chapter = curriculum_db.chapters.find_one({"id": topic["chapter_id"]})
     if not chapter:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Chapter not found"
         )
     
-    subject = curriculum_db.subjects.find_one({"id": chapter["subject_id"]})
     if not subject:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Subject not found"
         )
     
-    standard = curriculum_db.standards.find_one({"id": subject["standard_id"]})
     if not standard:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -378,7 +512,7 @@ async def create_question(
         )
     
     # Validate question_type_id
-    question_type = curriculum_db.question_types.find_one({"id": question_type_id})
+    question_type = await curriculum_cache.get("question_types", question_type_id)
     if not question_type:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -421,6 +555,7 @@ async def create_question(
         "chapter_id": chapter["id"],
         "subject_id": subject["id"],
         "standard_id": standard["id"],
+        "ancestors": [standard["id"], subject["id"], chapter["id"], topic_id],
         "images": []
     }
     
@@ -450,13 +585,13 @@ async def create_question(
         }
         
         # Save to GridFS
-        fs.put(file_content, **metadata)
+        await fs.put(file_content, **metadata)
         
         # Add image reference to question
         question_dict["images"] = [file_id]
     
     # Insert question into database
-    result = question_db.questions.insert_one(question_dict)
+    result = await question_db.questions.insert_one(question_dict)
     
     if not result.acknowledged:
         raise HTTPException(
@@ -464,11 +599,14 @@ async def create_question(
             detail="Failed to create question"
         )
     
+    await adjust_tag_usage(question_dict["tags"], 1)
+    await apply_question_stats([question_dict], 1)
+    
     # If question_bank_id is provided, add the question to the bank
     if question_bank_id:
         db = get_question_db()
         # Check if the bank exists and belongs to the correct standard/subject
-        bank = db.question_banks.find_one({
+        bank = await db.question_banks.find_one({
             "id": question_bank_id,
             "standard_id": standard["id"],
             "subject_id": subject["id"]
@@ -481,13 +619,14 @@ async def create_question(
             )
             
         # Add question to bank
-        db.question_banks.update_one(
+        await db.question_banks.update_one(
             {"id": question_bank_id},
             {
                 "$push": {"question_ids": question_id},
                 "$set": {"updated_at": datetime.now()}
             }
         )
+        await bump_versions("question_banks")
     
     # Prepare response
     response_data = {
@@ -514,7 +653,7 @@ async def get_question_image(
     question_db = get_question_db()
     fs = get_grid_fs()
 
-    question = question_db.questions.find_one({"id": question_id})
+    question = await question_db.questions.find_one({"id": question_id})
     if not question:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -528,14 +667,14 @@ async def get_question_image(
             detail="Image not found for this question"
         )
     
-    file = fs.find_one({"file_id": str(image_uuid)})
+    file = await fs.find_one({"file_id": str(image_uuid)})
     if not file:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Image not found in storage"
         )
     try:
-        grid_out = fs.get(file._id)
+        grid_out = await fs.get(file._id)
         if not grid_out:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -568,16 +707,27 @@ def sanitize_latex(response_text):
         return response_text
     return response_text
 
-def get_checked_from_openai_response(response_text):
+async def get_checked_from_openai_response(response_text):
+    openai_model = get_openai_model()
     try:
-        client = OpenAI(
-                base_url=os.environ["OPENAI_API_BASE"],
-                api_key=os.environ["GITHUB_TOKEN"],
-        )
         if isinstance(response_text, dict):
             input_json = json.dumps(response_text)
         else:
             input_json = sanitize_latex(response_text)
+
+        # Check if the same questions were already cleaned up with the same prompt and model
+        key = cache_key(input_json.encode(), f"cleanup:{CLEANUP_PROMPT_VERSION}", openai_model)
+        cached = await extraction_cache.get(key)
+        if cached is not None:
+            logger.debug("Cleanup cache hit, %d questions", len(cached["questions"]))
+            return cached
+
+        # Retries are left to the shared rate limiter
+        client = AsyncOpenAI(
+                base_url=os.environ["OPENAI_API_BASE"],
+                api_key=os.environ["GITHUB_TOKEN"],
+                max_retries=0,
+        )
         
         system_content = """
         You are a LaTeX expert with deep knowledge of formatting content in JSON. 
@@ -619,14 +769,23 @@ def get_checked_from_openai_response(response_text):
         
         user_content = user_content + input_json
 
-        response = client.chat.completions.create(
-            model=get_openai_model(),
-            messages=[
-                {"role": "system", "content": system_content},
-                {"role": "user", "content": user_content},
-            ],
-            temperature=0.2
-        )
+        # About four characters per token, and the answer is as long as the input
+        estimated_tokens = (len(system_content) + 2 * len(user_content)) // 4
+        limiter = get_limiter("openai", openai_model)
+
+        async def complete():
+            with track_llm_call("openai", openai_model):
+                return await client.chat.completions.create(
+                    model=openai_model,
+                    messages=[
+                        {"role": "system", "content": system_content},
+                        {"role": "user", "content": user_content},
+                    ],
+                    temperature=0.2
+                )
+
+        response = await limiter.call(complete, tokens=estimated_tokens)
+        await limiter.record_usage(estimated_tokens, response.usage.total_tokens if response.usage else None)
 
         response_text = response.choices[0].message.content.strip()
         response_text = sanitize_latex(response_text)
@@ -651,9 +810,12 @@ def get_checked_from_openai_response(response_text):
                         validated_questions.append(question.model_dump())
                     except Exception as ve:
                         print(f"Validation error for question: {ve}")
-                return {"questions": validated_questions}
+                result = {"questions": validated_questions}
+                await extraction_cache.set(key, result, openai_model)
+                return result
             
         except json.JSONDecodeError as e:
+            llm_request_failures_total.inc(provider="openai", model=openai_model, reason="invalid_json")
             print(f"Error parsing JSON: {str(e)}")
             print(f"Response text was: {response_text[:200]}...")
             return {"questions": []}
@@ -666,22 +828,39 @@ def get_checked_from_openai_response(response_text):
 
 
 async def extract_questions_from_image(image_data):
+    """Extract the questions of one image or PDF page, from the cache or once a Gemini slot is free"""
+    page_id = None
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash')
-        
-        page_id = None
         if isinstance(image_data, fitz.Page):
             page_id = f"Page {image_data.number+1}"
             print(f"[DEBUG] Starting processing of {page_id}")
-            pix = image_data.get_pixmap()
-            img_data = pix.tobytes("png")
-            pil_img = Image.open(BytesIO(img_data))
-            image_to_process = pil_img
+            img_data = await asyncio.to_thread(render_page, image_data)
+            image_to_process = Image.open(BytesIO(img_data))
         else:
             page_id = "Image"
             print(f"[DEBUG] Starting processing of uploaded {page_id}")
             image_to_process = image_data
-        
+            img_data = f"{image_data.mode}:{image_data.size}:".encode() + await asyncio.to_thread(image_data.tobytes)
+
+        # Check if this exact page was already extracted with the same prompt and model,
+        # a cached page doesn't wait for a Gemini slot
+        key = cache_key(img_data, str(EXTRACTION_PROMPT_VERSION), GEMINI_MODEL)
+        cached = await extraction_cache.get(key)
+        if cached is not None:
+            logger.debug("Cache hit for %s, %d questions", page_id, len(cached["questions"]))
+            return cached
+    except Exception as e:
+        page_id_info = f"{page_id} " if page_id else ""
+        print(f"[ERROR] Error processing {page_id_info}image: {str(e)}")
+        return {"questions": []}
+
+    async with get_gemini_slots():
+        return await _extract_questions_from_image(image_to_process, page_id, key)
+
+
+async def _extract_questions_from_image(image_to_process, page_id, key):
+    try:
+        model = genai.GenerativeModel(GEMINI_MODEL)
         page_start_time = time.time()
         
         prompt = """
@@ -726,7 +905,15 @@ async def extract_questions_from_image(image_data):
 
         """
         print(f"[DEBUG] Sending {page_id} to Gemini API...")
-        response = model.generate_content([prompt, image_to_process], stream=False)
+        limiter = get_limiter("gemini", GEMINI_MODEL)
+
+        async def generate():
+            with track_llm_call("gemini", GEMINI_MODEL):
+                return await model.generate_content_async([prompt, image_to_process], stream=False)
+
+        response = await limiter.call(generate, tokens=GEMINI_PAGE_TOKENS)
+        usage = getattr(response, "usage_metadata", None)
+        await limiter.record_usage(GEMINI_PAGE_TOKENS, getattr(usage, "total_token_count", None))
         print(f"[DEBUG] Received response from Gemini API for {page_id} after {time.time() - page_start_time:.2f}s")
         
         response_text = sanitize_latex(response.text)
@@ -753,9 +940,12 @@ async def extract_questions_from_image(image_data):
                 
                 question_count = len(validated_questions)
                 print(f"[DEBUG] Successfully extracted {question_count} questions from {page_id} in {time.time() - page_start_time:.2f}s")
-                return {"questions": validated_questions}
+                result = {"questions": validated_questions}
+                await extraction_cache.set(key, result, GEMINI_MODEL)
+                return result
             
         except json.JSONDecodeError as e:
+            llm_request_failures_total.inc(provider="gemini", model=GEMINI_MODEL, reason="invalid_json")
             print(f"[ERROR] Error parsing JSON from {page_id}: {str(e)}")
             print(f"[ERROR] Response text from {page_id} was: {response_text[:100]}...")
             return {"questions": []}
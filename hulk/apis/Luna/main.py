@@ -3,11 +3,17 @@ from typing import List, Optional
 from pydantic import BaseModel, Field
 from uuid import uuid4
 from datetime import datetime
-from pymongo import MongoClient
 import os
 from models.user_model import User
 from security.main import get_current_user
-from apis.Harry.db_init import get_curriculum_db
+from apis.Harry.cache import curriculum_cache
+from apis.Harry.tags import adjust_tag_usage, apply_tag_usage_changes, count_tags
+from apis.Harry.stats import STATS_FIELDS, apply_question_stats
+from apis.Ginny.utils import get_database
+from apis.Ginny.responses import FastJSONResponse, model_projection, trusted_response
+from apis.Ginny.pagination import PageParams
+from apis.Ginny.versions import bump_versions, conditional_get
+from pymongo import ASCENDING, ReturnDocument
 from apis.Hermione.main import QuestionResponse
 
 
@@ -15,8 +21,7 @@ from apis.Hermione.main import QuestionResponse
 router = APIRouter(tags=["question_banks"])
 
 def get_db():
-    client = MongoClient(os.getenv("MONGO_URI", "mongodb://localhost:27017"), uuidRepresentation="standard")
-    return client[os.getenv("MONOGO_QUESTION_BANK_DB")]
+    return get_database(os.getenv("MONOGO_QUESTION_BANK_DB"))
 
 # Models
 class QuestionBankBase(BaseModel):
@@ -53,8 +58,7 @@ async def create_question_bank(
     db = get_db()
     
     # Check if standard exists
-    curriculum_db = get_curriculum_db()
-    standard = curriculum_db.standards.find_one({"id": question_bank.standard_id})
+    standard = await curriculum_cache.get("standards", question_bank.standard_id)
     if not standard:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -62,11 +66,8 @@ async def create_question_bank(
         )
     
     # Check if subject exists
-    subject = curriculum_db.subjects.find_one({
-        "id": question_bank.subject_id,
-        "standard_id": question_bank.standard_id
-    })
-    if not subject:
+    subject = await curriculum_cache.get("subjects", question_bank.subject_id)
+    if not subject or subject.get("standard_id") != question_bank.standard_id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Subject not found for this standard"
@@ -76,7 +77,7 @@ async def create_question_bank(
     name = f"{standard.get('name', 'Unknown Standard')} - {subject.get('name', 'Unknown Subject')}"
     
     # Check if a question bank with the same name exists for this standard and subject
-    existing_bank = db.question_banks.find_one({
+    existing_bank = await db.question_banks.find_one({
         "name": name,
         "standard_id": question_bank.standard_id,
         "subject_id": question_bank.subject_id
@@ -101,7 +102,8 @@ async def create_question_bank(
         "created_by": current_user.username  # Changed from current_user.id to current_user.username
     }
     
-    db.question_banks.insert_one(new_bank)
+    await db.question_banks.insert_one(new_bank)
+    await bump_versions("question_banks")
     
     # Add names for the response
     new_bank["question_count"] = 0
@@ -110,15 +112,18 @@ async def create_question_bank(
     
     return new_bank
 
-@router.get("/question-banks", response_model=List[QuestionBankResponse])
+# Bank names are only unique per standard and subject, id breaks ties
+BANK_SORT = [("name", ASCENDING), ("id", ASCENDING)]
+
+@router.get("/question-banks", response_model=List[QuestionBankResponse], response_class=FastJSONResponse, dependencies=[Depends(conditional_get("question_banks", "standards", "subjects"))])
 async def get_question_banks(
     standard_id: Optional[str] = None,
     subject_id: Optional[str] = None,
+    page: PageParams = Depends(),
     current_user: User = Depends(get_current_user)
 ):
     """Get all question banks, optionally filtered by standard and/or subject"""
     db = get_db()
-    curriculum_db = get_curriculum_db()
     
     # Build filter
     filter_query = {}
@@ -127,24 +132,26 @@ async def get_question_banks(
     if subject_id:
         filter_query["subject_id"] = subject_id
     
-    # Get question banks
-    banks = list(db.question_banks.find(filter_query))
+    # Get question banks, counting questions in the database so the ids
+    # only leave it when they were asked for
+    projection = page.projection(QuestionBankResponse, BANK_SORT)
+    projection.update({
+        "question_count": {"$size": {"$ifNull": ["$question_ids", []]}},
+        "standard_id": 1,
+        "subject_id": 1,
+    })
+    banks, next_cursor = await page.fetch(db.question_banks, filter_query, BANK_SORT, projection)
     
-    # Enhance with standard and subject names and question counts
+    # Enhance with standard and subject names
+    standard_names = await curriculum_cache.names("standards", [bank["standard_id"] for bank in banks], "Unknown Standard")
+    subject_names = await curriculum_cache.names("subjects", [bank["subject_id"] for bank in banks], "Unknown Subject")
     for bank in banks:
-        bank["question_count"] = len(bank.get("question_ids", []))
-        
-        # Get standard name
-        standard = curriculum_db.standards.find_one({"id": bank["standard_id"]})
-        bank["standard_name"] = str(standard.get("name", "Unknown Standard")) if standard else "Unknown Standard"
-        
-        # Get subject name
-        subject = curriculum_db.subjects.find_one({"id": bank["subject_id"]})
-        bank["subject_name"] = str(subject.get("name", "Unknown Subject")) if subject else "Unknown Subject"
+        bank["standard_name"] = standard_names[bank["standard_id"]]
+        bank["subject_name"] = subject_names[bank["subject_id"]]
     
-    return banks
+    return page.respond(banks, QuestionBankResponse, next_cursor)
 
-@router.get("/question-banks/{bank_id}", response_model=QuestionBankResponse)
+@router.get("/question-banks/{bank_id}", response_model=QuestionBankResponse, dependencies=[Depends(conditional_get("question_banks", "standards", "subjects"))])
 async def get_question_bank(
     bank_id: str,
     current_user: User = Depends(get_current_user)
@@ -152,7 +159,7 @@ async def get_question_bank(
     """Get a specific question bank by ID"""
     db = get_db()
     
-    bank = db.question_banks.find_one({"id": bank_id})
+    bank = await db.question_banks.find_one({"id": bank_id})
     if not bank:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -160,13 +167,8 @@ async def get_question_bank(
         )
     
     # Get standard and subject names
-    curriculum_db = get_curriculum_db()
-    
-    standard = curriculum_db.standards.find_one({"id": bank["standard_id"]})
-    bank["standard_name"] = str(standard.get("name", "Unknown Standard")) if standard else "Unknown Standard"
-    
-    subject = curriculum_db.subjects.find_one({"id": bank["subject_id"]})
-    bank["subject_name"] = str(subject.get("name", "Unknown Subject")) if subject else "Unknown Subject"
+    bank["standard_name"] = (await curriculum_cache.names("standards", [bank["standard_id"]], "Unknown Standard"))[bank["standard_id"]]
+    bank["subject_name"] = (await curriculum_cache.names("subjects", [bank["subject_id"]], "Unknown Subject"))[bank["subject_id"]]
     
     bank["question_count"] = len(bank.get("question_ids", []))
     
@@ -181,14 +183,6 @@ async def update_question_bank(
     """Update a question bank"""
     db = get_db()
     
-    # Check if the bank exists
-    bank = db.question_banks.find_one({"id": bank_id})
-    if not bank:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Question bank not found"
-        )
-    
     # Build update data
     update_fields = {k: v for k, v in update_data.dict().items() if v is not None}
     
@@ -196,15 +190,27 @@ async def update_question_bank(
         # No fields to update
         return await get_question_bank(bank_id, current_user)
     
-    # Update the bank
+    # Update the bank and read it back in one round trip
     update_fields["updated_at"] = datetime.now()
     
-    db.question_banks.update_one(
+    bank = await db.question_banks.find_one_and_update(
         {"id": bank_id},
-        {"$set": update_fields}
+        {"$set": update_fields},
+        projection=model_projection(QuestionBankInDB),
+        return_document=ReturnDocument.AFTER
     )
+    if not bank:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Question bank not found"
+        )
+    await bump_versions("question_banks")
     
-    return await get_question_bank(bank_id, current_user)
+    bank["standard_name"] = (await curriculum_cache.names("standards", [bank["standard_id"]], "Unknown Standard"))[bank["standard_id"]]
+    bank["subject_name"] = (await curriculum_cache.names("subjects", [bank["subject_id"]], "Unknown Subject"))[bank["subject_id"]]
+    bank["question_count"] = len(bank.get("question_ids", []))
+    
+    return bank
 
 @router.delete("/question-banks/{bank_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_question_bank(
@@ -221,7 +227,7 @@ async def delete_question_bank(
     questions_db = get_db()
     
     # Check if the bank exists
-    bank = db.question_banks.find_one({"id": bank_id})
+    bank = await db.question_banks.find_one({"id": bank_id})
     if not bank:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -233,20 +239,25 @@ async def delete_question_bank(
         # Get all question IDs
         question_ids = bank.get("question_ids", [])
         
-        for q_id in question_ids:
-            # Get the question to find related resources
-            question = questions_db.questions.find_one({"id": q_id})
-            if question:
-                # Delete any images associated with the question
-                if question.get("images"):
-                    for image_id in question.get("images"):
-                        questions_db.images.delete_one({"id": image_id})
-                
-                # Delete the question itself
-                questions_db.questions.delete_one({"id": q_id})
+        # Get the questions to find related resources
+        questions = await questions_db.questions.find(
+            {"id": {"$in": question_ids}},
+            {"_id": 0, "id": 1, "images": 1, "tags": 1, **{field: 1 for field in STATS_FIELDS}}
+        ).to_list()
+        
+        # Delete any images associated with the questions
+        image_ids = [image_id for question in questions for image_id in question.get("images") or []]
+        if image_ids:
+            await questions_db.images.delete_many({"id": {"$in": image_ids}})
+        
+        # Delete the questions themselves and release their tags
+        await questions_db.questions.delete_many({"id": {"$in": [question["id"] for question in questions]}})
+        await apply_tag_usage_changes({tag_id: -count for tag_id, count in count_tags(questions).items()})
+        await apply_question_stats(questions, -1)
     
     # Delete the question bank
-    db.question_banks.delete_one({"id": bank_id})
+    await db.question_banks.delete_one({"id": bank_id})
+    await bump_versions("question_banks")
     
     return None
 
@@ -261,7 +272,7 @@ async def add_question_to_bank(
     questions_db = get_db()
     
     # Check if the bank exists
-    bank = db.question_banks.find_one({"id": bank_id})
+    bank = await db.question_banks.find_one({"id": bank_id})
     if not bank:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -269,7 +280,7 @@ async def add_question_to_bank(
         )
     
     # Check if the question exists
-    question = questions_db.questions.find_one({"id": question_id})
+    question = await questions_db.questions.find_one({"id": question_id})
     if not question:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -284,13 +295,14 @@ async def add_question_to_bank(
         )
     
     # Add question to bank
-    db.question_banks.update_one(
+    await db.question_banks.update_one(
         {"id": bank_id},
         {
             "$push": {"question_ids": question_id},
             "$set": {"updated_at": datetime.now()}
         }
     )
+    await bump_versions("question_banks")
     
     return None
 
@@ -310,7 +322,7 @@ async def remove_question_from_bank(
     questions_db = get_db()
     
     # Check if the bank exists
-    bank = db.question_banks.find_one({"id": bank_id})
+    bank = await db.question_banks.find_one({"id": bank_id})
     if not bank:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -325,30 +337,32 @@ async def remove_question_from_bank(
         )
     
     # Remove question from bank
-    db.question_banks.update_one(
+    await db.question_banks.update_one(
         {"id": bank_id},
         {
             "$pull": {"question_ids": question_id},
             "$set": {"updated_at": datetime.now()}
         }
     )
+    await bump_versions("question_banks")
     
     # If delete_question is true, also delete the question itself
     if delete_question:
-        # Get the question to find related resources
-        question = questions_db.questions.find_one({"id": question_id})
+        # Delete the question, only the request that actually removed it
+        # releases its tags and statistics
+        question = await questions_db.questions.find_one_and_delete({"id": question_id})
         if question:
             # Delete any images associated with the question
             if question.get("images"):
                 for image_id in question.get("images"):
-                    questions_db.images.delete_one({"id": image_id})
+                    await questions_db.images.delete_one({"id": image_id})
             
-            # Delete the question itself
-            questions_db.questions.delete_one({"id": question_id})
+            await adjust_tag_usage(question.get("tags"), -1)
+            await apply_question_stats([question], -1)
     
     return None
 
-@router.get("/question-banks/{bank_id}/questions", response_model=List[QuestionResponse])
+@router.get("/question-banks/{bank_id}/questions", response_model=List[QuestionResponse], response_class=FastJSONResponse)
 async def get_questions_in_bank(
     bank_id: str,
     current_user: User = Depends(get_current_user)
@@ -358,18 +372,17 @@ async def get_questions_in_bank(
     questions_db = get_db()
     
     # Check if the bank exists
-    bank = db.question_banks.find_one({"id": bank_id})
+    bank = await db.question_banks.find_one({"id": bank_id})
     if not bank:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Question bank not found"
         )
     
-    # Get questions
-    questions = []
-    for q_id in bank.get("question_ids", []):
-        question = questions_db.questions.find_one({"id": q_id})
-        if question:
-            questions.append(question)
+    # Get questions in one query, keeping the order of the bank
+    question_ids = bank.get("question_ids", [])
+    cursor = questions_db.questions.find({"id": {"$in": question_ids}}, model_projection(QuestionResponse))
+    questions_by_id = {question["id"]: question async for question in cursor}
+    questions = [questions_by_id[q_id] for q_id in question_ids if q_id in questions_by_id]
     
-    return questions
\ No newline at end of file
+    return trusted_response(questions)
\ No newline at end of file
@@ -1,14 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Query
 from typing import List, Dict, Optional, Union, Set
 from pydantic import BaseModel, Field, field_validator
+from pymongo import DESCENDING
 from uuid import uuid4
 from datetime import datetime
-from pymongo import MongoClient
 import os
 import random
 from models.user_model import User
 from security.main import get_current_user
-from apis.Harry.db_init import get_curriculum_db
+from apis.Harry.cache import curriculum_cache
+from apis.Ginny.utils import get_database
+from apis.Ginny.responses import FastJSONResponse, trusted_response
+from apis.Ginny.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_filter, next_cursor_headers, paginate
+)
 from apis.Hermione.main import get_question_db
 
 router = APIRouter(prefix="/papers", tags=["papers"])
@@ -68,15 +73,26 @@ class GeneratedPaper(BaseModel):
     created_at: datetime = Field(..., description="Timestamp when the paper was created")
     created_by: str = Field(..., description="User who created the paper")
 
+class PaperSummary(BaseModel):
+    id: str = Field(..., description="Unique ID of the paper")
+    title: str = Field(..., description="Title of the paper")
+    standard_name: str = Field(..., description="Name of the standard/grade")
+    subject_name: str = Field(..., description="Name of the subject")
+    total_marks: int = Field(..., description="Total marks for the paper")
+    question_count: int = Field(..., description="Number of questions across all sections")
+    created_at: datetime = Field(..., description="Timestamp when the paper was created")
+
+# Newest first, id breaks ties between papers created in the same millisecond
+PAPER_SORT = [("created_at", DESCENDING), ("id", DESCENDING)]
+
 # ----- HELPER FUNCTIONS -----
 
 def get_db():
-    client = MongoClient(os.getenv("MONGO_URI", "mongodb://localhost:27017"), uuidRepresentation="standard")
-    return client[os.getenv("MONOGO_QUESTION_BANK_DB")]
+    return get_database(os.getenv("MONOGO_QUESTION_BANK_DB"))
 
 # ----- ROUTES -----
 
-@router.post("/generate", response_model=GeneratedPaper, status_code=status.HTTP_201_CREATED)
+@router.post("/generate", response_model=GeneratedPaper, status_code=status.HTTP_201_CREATED, response_class=FastJSONResponse)
 async def generate_paper(
     paper_request: PaperGenerationRequest = Body(...),
     current_user: User = Depends(get_current_user)
@@ -89,7 +105,6 @@ async def generate_paper(
     difficulty levels, and topics.
     """
     question_db = get_question_db()
-    curriculum_db = get_curriculum_db()
     papers_db = get_db()
     
     # Validate question banks
@@ -104,7 +119,7 @@ async def generate_paper(
     subject_name = None
     
     for bank_id in question_bank_ids:
-        bank = papers_db.question_banks.find_one({"id": bank_id})
+        bank = await papers_db.question_banks.find_one({"id": bank_id})
         if not bank:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -117,7 +132,7 @@ async def generate_paper(
             subject_id = bank.get("subject_id")
             
             # Get standard and subject names
-            standard = curriculum_db.standards.find_one({"id": standard_id})
+            standard = await curriculum_cache.get("standards", standard_id)
             if not standard:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -125,11 +140,8 @@ async def generate_paper(
                 )
             standard_name = standard.get("name", "Unknown Standard")
             
-            subject = curriculum_db.subjects.find_one({
-                "id": subject_id,
-                "standard_id": standard_id
-            })
-            if not subject:
+            subject = await curriculum_cache.get("subjects", subject_id)
+            if not subject or subject.get("standard_id") != standard_id:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Subject not found for this standard"
@@ -159,7 +171,7 @@ async def generate_paper(
         )
     
     # Fetch all questions from the selected banks
-    all_questions = list(question_db.questions.find({"id": {"$in": list(all_question_ids)}}))
+    all_questions = await question_db.questions.find({"id": {"$in": list(all_question_ids)}}).to_list()
     
     if not all_questions:
         raise HTTPException(
@@ -177,9 +189,11 @@ async def generate_paper(
             )
             
         # Validate question type IDs
+        known_types = await curriculum_cache.get_many(
+            "question_types", [qt.question_type_id for qt in paper_request.question_type_distribution]
+        )
         for qt in paper_request.question_type_distribution:
-            question_type = curriculum_db.question_types.find_one({"id": qt.question_type_id})
-            if not question_type:
+            if qt.question_type_id not in known_types:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail=f"Question type with ID {qt.question_type_id} not found"
@@ -194,41 +208,37 @@ async def generate_paper(
         selected_chapter_ids = {ch.id for ch in paper_request.selected_chapters}
         
         # Validate chapter IDs
+        known_chapters = await curriculum_cache.get_many("chapters", selected_chapter_ids)
         for ch_id in selected_chapter_ids:
-            chapter = curriculum_db.chapters.find_one({
-                "id": ch_id, 
-                "subject_id": subject_id
-            })
-            if not chapter:
+            chapter = known_chapters.get(ch_id)
+            if not chapter or chapter.get("subject_id") != subject_id:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail=f"Chapter with ID {ch_id} not found in this subject"
                 )
         
         # Collect all selected topic IDs
+        topic_paths = await curriculum_cache.topic_paths(
+            [topic.id for chapter in paper_request.selected_chapters for topic in chapter.topics or []]
+        )
         for chapter in paper_request.selected_chapters:
             if chapter.topics:
                 for topic in chapter.topics:
                     # Validate topic ID
-                    db_topic = curriculum_db.topics.find_one({
-                        "id": topic.id,
-                        "chapter_id": chapter.id
-                    })
-                    if not db_topic:
+                    path = topic_paths.get(topic.id)
+                    if not path or not path.chapter or path.chapter["id"] != chapter.id:
                         raise HTTPException(
                             status_code=status.HTTP_404_NOT_FOUND,
                             detail=f"Topic with ID {topic.id} not found in chapter {chapter.id}"
                         )
                     selected_topic_ids.add(topic.id)
             
-        # If chapters are selected but no specific topics, include all topics from those chapters
-        if not selected_topic_ids:
-            topics_in_chapters = curriculum_db.topics.find({"chapter_id": {"$in": list(selected_chapter_ids)}})
-            selected_topic_ids = {topic["id"] for topic in topics_in_chapters}
-            
-        # Filter questions by selected topics
+        # Filter questions by selected topics, or by chapter when no specific
+        # topics were chosen (questions store their chapter)
         if selected_topic_ids:
             filtered_questions = [q for q in filtered_questions if q.get("topic_id") in selected_topic_ids]
+        else:
+            filtered_questions = [q for q in filtered_questions if q.get("chapter_id") in selected_chapter_ids]
     
     if not filtered_questions:
         raise HTTPException(
@@ -247,8 +257,8 @@ async def generate_paper(
     # Create distribution if not provided
     if not paper_request.question_type_distribution:
         # Create even distribution across available question types
-        question_types = curriculum_db.question_types.find({})
-        available_types = [qt for qt in question_types if qt["id"] in question_types_map]
+        known_types = await curriculum_cache.get_many("question_types", question_types_map.keys())
+        available_types = [known_types[qt_id] for qt_id in question_types_map if qt_id in known_types]
         
         if not available_types:
             raise HTTPException(
@@ -287,17 +297,15 @@ async def generate_paper(
     # Generate the paper
     paper_sections = []
     total_paper_marks = 0
-    question_type_names = {qt["id"]: qt["name"] for qt in curriculum_db.question_types.find()}
+    question_type_names = await curriculum_cache.names("question_types", question_types_map.keys(), "Unknown Type")
     
-    # Prepare lookup maps for topic and chapter names
-    topic_names = {}
-    chapter_names = {}
-    
-    for topic in curriculum_db.topics.find({}):
-        topic_names[topic["id"]] = topic.get("name", "Unknown Topic")
-        
-    for chapter in curriculum_db.chapters.find({}):
-        chapter_names[chapter["id"]] = chapter.get("name", "Unknown Chapter")
+    # Prepare lookup maps for topic and chapter names of the candidate questions only
+    topic_names = await curriculum_cache.names(
+        "topics", {q.get("topic_id") for q in filtered_questions}, "Unknown Topic"
+    )
+    chapter_names = await curriculum_cache.names(
+        "chapters", {q.get("chapter_id") for q in filtered_questions}, "Unknown Chapter"
+    )
     
     # Create sections by question type
     for question_type_id, total_marks in marks_by_type.items():
@@ -503,21 +511,49 @@ async def generate_paper(
     }
     
     # Save to database
-    papers_db.papers.insert_one(paper)
+    await papers_db.papers.insert_one(paper)
     
-    # Return as expected model
-    return GeneratedPaper(**paper)
+    # The paper was just built from validated models, so skip re-validating it
+    return trusted_response(
+        {field: paper[field] for field in GeneratedPaper.model_fields},
+        status_code=status.HTTP_201_CREATED
+    )
 
-@router.get("/", status_code=status.HTTP_200_OK)
-async def get_all_papers(current_user: User = Depends(get_current_user)):
+@router.get("/", response_model=List[PaperSummary], response_class=FastJSONResponse)
+async def get_all_papers(
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Papers per page"),
+    current_user: User = Depends(get_current_user)
+):
     """
-    Get all papers generated by the authenticated user
+    Get summaries of the papers generated by the authenticated user, newest first.
+    The full paper is available from GET /papers/{paper_id}.
     """
     papers_db = get_db()
-    papers = list(papers_db.papers.find({"created_by": current_user.username}))
-    return papers
+    match = {"created_by": current_user.username, **keyset_filter(PAPER_SORT, cursor)}
+    results = await papers_db.papers.aggregate([
+        {"$match": match},
+        {"$sort": dict(PAPER_SORT)},
+        {"$limit": limit + 1},
+        {"$project": {
+            "_id": 0,
+            "id": 1,
+            "title": 1,
+            "standard_name": 1,
+            "subject_name": 1,
+            "total_marks": 1,
+            "created_at": 1,
+            # Count questions on the server so sections never leave the database
+            "question_count": {"$sum": {"$map": {
+                "input": {"$ifNull": ["$sections", []]},
+                "in": {"$size": {"$ifNull": ["$$this.questions", []]}}
+            }}},
+        }},
+    ])
+    papers, next_cursor = paginate(await results.to_list(), PAPER_SORT, limit)
+    return trusted_response(papers, headers=next_cursor_headers(next_cursor))
 
-@router.get("/{paper_id}", status_code=status.HTTP_200_OK)
+@router.get("/{paper_id}", status_code=status.HTTP_200_OK, response_class=FastJSONResponse)
 async def get_paper(
     paper_id: str,
     current_user: User = Depends(get_current_user)
@@ -526,7 +562,7 @@ async def get_paper(
     Get a specific paper by ID
     """
     papers_db = get_db()
-    paper = papers_db.papers.find_one({"id": paper_id})
+    paper = await papers_db.papers.find_one({"id": paper_id}, {"_id": 0})
     
     if not paper:
         raise HTTPException(
@@ -541,7 +577,7 @@ async def get_paper(
             detail="You don't have permission to access this paper"
         )
     
-    return paper
+    return trusted_response(paper)
 
 @router.delete("/{paper_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_paper(
@@ -552,7 +588,7 @@ async def delete_paper(
     Delete a specific paper by ID
     """
     papers_db = get_db()
-    paper = papers_db.papers.find_one({"id": paper_id})
+    paper = await papers_db.papers.find_one({"id": paper_id})
     
     if not paper:
         raise HTTPException(
@@ -567,5 +603,5 @@ async def delete_paper(
             detail="You don't have permission to delete this paper"
         )
     
-    papers_db.papers.delete_one({"id": paper_id})
+    await papers_db.papers.delete_one({"id": paper_id})
     return None
\ No newline at end of file
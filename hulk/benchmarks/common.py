@@ -0,0 +1,60 @@
+"""Helpers shared by the benchmark scripts"""
+import os
+import statistics
+import subprocess
+import sys
+from datetime import timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Benchmarks run against their own databases so they never touch real data
+BENCH_DB_PREFIX = os.getenv("BENCH_DB_PREFIX", "examcraft_bench")
+
+
+def use_benchmark_databases(prefix: str = BENCH_DB_PREFIX):
+    """Point every router at the benchmark databases, must run before the first query"""
+    os.environ["MONGO_AUTH_DB"] = f"{prefix}_auth"
+    os.environ["MONGO_CURRICULUM_DB"] = f"{prefix}_curriculum"
+    os.environ["MONOGO_QUESTION_BANK_DB"] = f"{prefix}_question_bank"
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(latencies, errors, elapsed=None):
+    """Latency percentiles in milliseconds for a list of durations in seconds"""
+    summary = {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2) if latencies else 0.0,
+        "mean_ms": round(statistics.mean(latencies) * 1000, 2) if latencies else 0.0,
+    }
+    if elapsed is not None:
+        summary["throughput_rps"] = round(len(latencies) / elapsed, 2) if elapsed else 0.0
+    return summary
+
+
+def auth_headers(username: str, is_superuser: bool = True) -> dict:
+    from security.main import create_access_token
+
+    token = create_access_token(
+        data={"sub": username, "is_superuser": is_superuser},
+        expires_delta=timedelta(minutes=60)
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+def current_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
@@ -0,0 +1,46 @@
+"""
+Compare two benchmark result files:
+
+    python -m benchmarks.compare benchmarks/results/abc1234.json benchmarks/results/def5678.json
+"""
+import argparse
+import json
+
+
+def _change(old: float, new: float) -> str:
+    if not old:
+        return "n/a"
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def compare(base: dict, head: dict) -> list:
+    rows = []
+    for name in sorted(set(base["scenarios"]) | set(head["scenarios"])):
+        old = base["scenarios"].get(name)
+        new = head["scenarios"].get(name)
+        if not old or not new:
+            rows.append((name, "only in " + ("head" if new else "base")))
+            continue
+        rows.append((
+            name,
+            f"p50 {old['p50_ms']:.2f} -> {new['p50_ms']:.2f} ms ({_change(old['p50_ms'], new['p50_ms'])})",
+            f"p99 {old['p99_ms']:.2f} -> {new['p99_ms']:.2f} ms ({_change(old['p99_ms'], new['p99_ms'])})",
+            f"db {old.get('db_commands', 0)} -> {new.get('db_commands', 0)}",
+        ))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+
+    print(f"{base['commit']} -> {head['commit']}")
+    for row in compare(base, head):
+        print("  ".join([f"{row[0]:<24}"] + list(row[1:])))
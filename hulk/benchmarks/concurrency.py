@@ -0,0 +1,103 @@
+"""
+Concurrency benchmark for the event-loop bound routes.
+
+Fires concurrent requests at `/curriculum/standards` and `/papers/generate`
+against the app in-process (one event loop, like a single uvicorn worker)
+and reports latency percentiles. Any route that blocks the loop shows up
+as p99 growing linearly with concurrency.
+
+Needs a reachable MongoDB (MONGO_URI) with at least one question bank
+that contains questions, or --bench-db after `python -m benchmarks.seed`.
+Run from the hulk directory:
+
+    python -m benchmarks.concurrency --concurrency 50 --requests 500 --output before.json
+    python -m benchmarks.concurrency --concurrency 50 --requests 500 --output after.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import httpx
+
+from benchmarks.common import summarize, auth_headers, use_benchmark_databases
+
+from main import app
+from apis.Ginny.utils import close_mongo_clients, get_database
+
+
+async def run_scenario(client, method, path, total, concurrency, body=None):
+    """Issue `total` requests with at most `concurrency` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def find_question_bank_id():
+    """Pick the largest question bank to generate papers from"""
+    db = get_database(os.getenv("MONOGO_QUESTION_BANK_DB"))
+    banks = await db.question_banks.find({}, {"id": 1, "question_ids": 1}).to_list()
+    banks = [bank for bank in banks if bank.get("question_ids")]
+    if not banks:
+        return None
+    return max(banks, key=lambda bank: len(bank["question_ids"]))["id"]
+
+
+async def main(args):
+    if args.bench_db:
+        use_benchmark_databases()
+    headers = auth_headers(args.username)
+    results = {"label": args.label, "concurrency": args.concurrency, "scenarios": {}}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers, timeout=None) as client:
+        results["scenarios"]["GET /curriculum/standards"] = await run_scenario(
+            client, "GET", "/curriculum/standards", args.requests, args.concurrency
+        )
+
+        bank_id = args.question_bank_id or await find_question_bank_id()
+        if bank_id:
+            body = {"title": "Benchmark paper", "question_bank_ids": [bank_id], "total_marks": args.total_marks}
+            results["scenarios"]["POST /papers/generate"] = await run_scenario(
+                client, "POST", "/papers/generate", args.requests, args.concurrency, body
+            )
+            # Don't leave thousands of benchmark papers behind
+            db = get_database(os.getenv("MONOGO_QUESTION_BANK_DB"))
+            await db.papers.delete_many({"title": "Benchmark paper", "created_by": args.username})
+        else:
+            print("No question bank with questions found, skipping /papers/generate", file=sys.stderr)
+
+    await close_mongo_clients()
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure route latency under concurrent load")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--total-marks", type=int, default=80)
+    parser.add_argument("--question-bank-id", default=None)
+    parser.add_argument("--username", default="benchmark")
+    parser.add_argument("--label", default="")
+    parser.add_argument("--bench-db", action="store_true", help="Use the databases seeded by benchmarks.seed")
+    parser.add_argument("--output", default=None, help="Write results as JSON to this path")
+    asyncio.run(main(parser.parse_args()))
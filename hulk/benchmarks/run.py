@@ -0,0 +1,163 @@
+"""
+Time the hot endpoints in-process against the seeded benchmark databases.
+
+Each scenario is called sequentially after a short warm-up so the numbers
+reflect the cost of a single request, including the number of MongoDB
+commands it issued. Results are written as JSON, one file per commit, so
+two runs can be compared with benchmarks.compare:
+
+    python -m benchmarks.seed --scale medium
+    python -m benchmarks.run --iterations 50
+    python -m benchmarks.compare benchmarks/results/<old>.json benchmarks/results/<new>.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+
+from benchmarks.common import use_benchmark_databases, summarize, auth_headers, current_commit, BENCH_DB_PREFIX
+
+# Must be set before main is imported so the query stats headers are enabled
+os.environ["DEBUG"] = "true"
+os.environ.setdefault("MONGO_ENSURE_INDEXES", "false")
+use_benchmark_databases()
+
+import httpx
+
+from main import app
+from apis.Ginny.utils import close_mongo_clients, get_database
+from apis.Harry.stats import STATS_FIELDS, apply_question_stats
+from apis.Harry.tags import apply_tag_usage_changes, count_tags
+from benchmarks.seed import BENCH_USERNAME, BENCH_PASSWORD
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+WRITER_USERNAME = "benchmark_writer"
+
+
+async def largest_bank():
+    question_db = get_database(os.environ["MONOGO_QUESTION_BANK_DB"])
+    cursor = await question_db.question_banks.aggregate([
+        {"$project": {"id": 1, "subject_id": 1, "size": {"$size": "$question_ids"}}},
+        {"$sort": {"size": -1}},
+        {"$limit": 1},
+    ])
+    banks = await cursor.to_list()
+    if not banks:
+        raise SystemExit("No question banks found, run `python -m benchmarks.seed` first")
+    return banks[0]
+
+
+async def topic_for_subject(subject_id):
+    curriculum_db = get_database(os.environ["MONGO_CURRICULUM_DB"])
+    chapter = await curriculum_db.chapters.find_one({"subject_id": subject_id})
+    topic = await curriculum_db.topics.find_one({"chapter_id": chapter["id"]})
+    question_type = await curriculum_db.question_types.find_one({})
+    return topic["id"], question_type["id"]
+
+
+def build_scenarios(bank, topic_id, question_type_id):
+    """Scenario name -> keyword arguments for httpx.AsyncClient.request"""
+    return {
+        "login": {
+            "method": "POST", "url": "/auth/login",
+            "data": {"username": BENCH_USERNAME, "password": BENCH_PASSWORD},
+        },
+        "get_all_tags": {"method": "GET", "url": "/curriculum/tags"},
+        "get_question_banks": {"method": "GET", "url": "/question-banks"},
+        "get_questions_in_bank": {"method": "GET", "url": f"/question-banks/{bank['id']}/questions"},
+        "generate_paper": {
+            "method": "POST", "url": "/papers/generate",
+            "json": {"title": "Benchmark paper", "question_bank_ids": [bank["id"]], "total_marks": 100},
+        },
+        "create_question": {
+            "method": "POST", "url": "/questions/",
+            "headers": auth_headers(WRITER_USERNAME),
+            "data": {
+                "question_text": "Benchmark question $x^2$",
+                "question_type_id": question_type_id,
+                "difficulty_level": "medium",
+                "marks": "2",
+                "image_required": "false",
+                "topic_id": topic_id,
+            },
+        },
+    }
+
+
+async def time_scenario(client, request, iterations, warmup):
+    latencies = []
+    commands = []
+    errors = 0
+    for i in range(warmup + iterations):
+        start = time.perf_counter()
+        response = await client.request(**request)
+        elapsed = time.perf_counter() - start
+        if i < warmup:
+            continue
+        latencies.append(elapsed)
+        commands.append(int(response.headers.get("X-DB-Commands", 0)))
+        if response.status_code >= 400:
+            errors += 1
+    summary = summarize(latencies, errors)
+    summary["db_commands"] = max(commands) if commands else 0
+    return summary
+
+
+async def cleanup():
+    """Remove what the write scenarios created so runs stay comparable"""
+    question_db = get_database(os.environ["MONOGO_QUESTION_BANK_DB"])
+    await question_db.papers.delete_many({"title": "Benchmark paper"})
+
+    # Release the tag counters and rollups the created questions added, as
+    # the question delete routes do, so later read scenarios see the seed
+    questions = await question_db.questions.find(
+        {"created_by": WRITER_USERNAME},
+        {"_id": 0, "id": 1, "tags": 1, **{field: 1 for field in STATS_FIELDS}}
+    ).to_list()
+    if questions:
+        await question_db.questions.delete_many({"id": {"$in": [question["id"] for question in questions]}})
+        await apply_tag_usage_changes({tag_id: -count for tag_id, count in count_tags(questions).items()})
+        await apply_question_stats(questions, -1)
+
+
+async def main(args):
+    bank = await largest_bank()
+    topic_id, question_type_id = await topic_for_subject(bank["subject_id"])
+    scenarios = build_scenarios(bank, topic_id, question_type_id)
+    selected = args.only or list(scenarios)
+
+    results = {
+        "commit": current_commit(),
+        "timestamp": datetime.now().isoformat(),
+        "database_prefix": BENCH_DB_PREFIX,
+        "largest_bank_questions": bank["size"],
+        "iterations": args.iterations,
+        "scenarios": {},
+    }
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=auth_headers(BENCH_USERNAME), timeout=None) as client:
+        try:
+            for name in selected:
+                results["scenarios"][name] = await time_scenario(client, scenarios[name], args.iterations, args.warmup)
+                print(f"{name:<24} p50 {results['scenarios'][name]['p50_ms']:>9.2f} ms  p99 {results['scenarios'][name]['p99_ms']:>9.2f} ms")
+        finally:
+            await cleanup()
+            await close_mongo_clients()
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{results['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the hot endpoints against seeded data")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--only", nargs="*", help="Scenario names to run (default: all)")
+    parser.add_argument("--output", default=None, help="Defaults to benchmarks/results/<commit>.json")
+    asyncio.run(main(parser.parse_args()))
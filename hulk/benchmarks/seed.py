@@ -0,0 +1,82 @@
+"""
+Seed the benchmark databases with a synthetic curriculum.
+
+Generation is delegated to tools.datagen, so documents follow the shapes
+the routers write. Run from the hulk directory:
+
+    python -m benchmarks.seed --scale small
+    python -m benchmarks.seed --scale large --questions 1000000
+"""
+import argparse
+import asyncio
+
+from benchmarks.common import use_benchmark_databases
+from tools.datagen import add_scale_arguments as _add_scale_overrides, generate, parse_scale as _parse_scale
+
+SCALES = {
+    "small": {"standards": 2, "subjects": 10, "chapters": 50, "topics": 250, "questions": 5_000, "banks": 20, "tags": 50, "largest_bank": 1_000},
+    "medium": {"standards": 10, "subjects": 100, "chapters": 500, "topics": 2_500, "questions": 100_000, "banks": 500, "tags": 100, "largest_bank": 5_000},
+    "large": {"standards": 20, "subjects": 200, "chapters": 1_000, "topics": 5_000, "questions": 500_000, "banks": 2_000, "tags": 200, "largest_bank": 10_000},
+}
+
+BENCH_USERNAME = "benchmark"
+BENCH_PASSWORD = "benchmark-password"
+
+
+async def seed(scale: dict, drop: bool = True, seed_value: int = None):
+    """Create the synthetic curriculum, questions, banks and the benchmark user"""
+    from apis.Ginny.utils import get_database, get_mongo_client
+    from apis.Ginny.indexes import ensure_indexes
+    from security.main import get_password_hash
+    import os
+
+    auth_db = get_database(os.environ["MONGO_AUTH_DB"])
+    curriculum_db = get_database(os.environ["MONGO_CURRICULUM_DB"])
+    question_db = get_database(os.environ["MONOGO_QUESTION_BANK_DB"])
+
+    if drop:
+        client = get_mongo_client()
+        for db in (auth_db, curriculum_db, question_db):
+            await client.drop_database(db.name)
+    await ensure_indexes()
+
+    await auth_db.users.update_one({"username": BENCH_USERNAME}, {"$set": {
+        "username": BENCH_USERNAME,
+        "email": "benchmark@example.com",
+        "password": get_password_hash(BENCH_PASSWORD),
+        "full_name": "Benchmark User",
+        "contact_number": None,
+        "is_superuser": True,
+        "privileges": [],
+    }}, upsert=True)
+
+    await generate(curriculum_db, question_db, scale, seed=seed_value, created_by=BENCH_USERNAME)
+
+
+def parse_scale(args) -> dict:
+    return _parse_scale(args, SCALES[args.scale])
+
+
+def add_scale_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    _add_scale_overrides(parser, SCALES["small"])
+
+
+async def _main(args):
+    from apis.Ginny.utils import close_mongo_clients
+
+    try:
+        scale = parse_scale(args)
+        await seed(scale, drop=not args.keep, seed_value=args.seed)
+        print(f"Seeded {scale}")
+    finally:
+        await close_mongo_clients()
+
+
+if __name__ == "__main__":
+    use_benchmark_databases()
+    parser = argparse.ArgumentParser(description="Seed the benchmark databases")
+    add_scale_arguments(parser)
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible data")
+    parser.add_argument("--keep", action="store_true", help="Add to the existing benchmark data instead of dropping it")
+    asyncio.run(_main(parser.parse_args()))
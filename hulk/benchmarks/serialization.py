@@ -0,0 +1,142 @@
+"""
+Serialization benchmark for large list and paper payloads.
+
+Serves the same in-memory documents (1k questions by default, and a paper
+embedding as many questions) through the default path (response_model
+validation plus the standard library encoder) and the trusted orjson
+path, then reports latency percentiles for both. Needs no database.
+Run from the hulk directory:
+
+    python -m benchmarks.serialization --questions 1000 --requests 200
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime
+from typing import List
+
+import httpx
+from fastapi import FastAPI
+
+from benchmarks.common import summarize
+from apis.Ginny.responses import FastJSONResponse, trusted_response
+from apis.Hermione.main import QuestionResponse
+from apis.Ron.main import GeneratedPaper, QuestionPaperItem
+from tools.datagen import build_curriculum, build_question
+
+
+def build_payloads(question_count: int, seed: int = 0):
+    """A list of question documents and a paper with the same number of questions"""
+    rng = random.Random(seed)
+    scale = {"standards": 1, "subjects": 1, "chapters": 10, "topics": 50, "questions": question_count, "banks": 1, "tags": 20, "largest_bank": question_count}
+    curriculum = build_curriculum(rng, scale)
+    subject = curriculum["subjects"][0]
+    chapters = {chapter["id"]: chapter for chapter in curriculum["chapters"]}
+    questions = []
+    for _ in range(question_count):
+        topic = rng.choice(curriculum["topics"])
+        question_type = rng.choice(curriculum["question_types"])
+        questions.append(build_question(rng, topic, chapters[topic["chapter_id"]], subject, question_type, curriculum["tags"]))
+
+    sections = {}
+    for question in questions:
+        item = QuestionPaperItem(
+            question_id=question["id"],
+            question_text=question["question_text"],
+            question_type_name=question["question_type_id"],
+            marks=question["marks"],
+            difficulty_level=question["difficulty_level"],
+            image_required=question["image_required"],
+            images=[],
+            topic_name=question["topic_id"],
+            chapter_name=question["chapter_id"],
+        )
+        sections.setdefault(question["question_type_id"], []).append(item.model_dump())
+    paper = {
+        "id": "benchmark-paper",
+        "title": "Benchmark paper",
+        "standard_name": "1",
+        "subject_name": subject["name"],
+        "total_marks": sum(question["marks"] for question in questions),
+        "sections": [
+            {"title": title, "description": None, "questions": items, "total_marks": sum(i["marks"] for i in items)}
+            for title, items in sections.items()
+        ],
+        "created_at": datetime.now(),
+        "created_by": "benchmark",
+    }
+    return questions, paper
+
+
+def build_app(questions: list, paper: dict) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/default/questions", response_model=List[QuestionResponse])
+    async def default_questions():
+        return questions
+
+    @app.get("/fast/questions", response_model=List[QuestionResponse], response_class=FastJSONResponse)
+    async def fast_questions():
+        return trusted_response(questions)
+
+    @app.get("/default/paper", response_model=GeneratedPaper)
+    async def default_paper():
+        return paper
+
+    @app.get("/fast/paper", response_model=GeneratedPaper, response_class=FastJSONResponse)
+    async def fast_paper():
+        return trusted_response(paper)
+
+    return app
+
+
+async def measure(client, path: str, total: int) -> dict:
+    latencies = []
+    errors = 0
+    size = 0
+    for _ in range(total):
+        start = time.perf_counter()
+        response = await client.get(path)
+        latencies.append(time.perf_counter() - start)
+        size = len(response.content)
+        if response.status_code >= 400:
+            errors += 1
+    summary = summarize(latencies, errors)
+    summary["body_bytes"] = size
+    return summary
+
+
+async def main(args):
+    questions, paper = build_payloads(args.questions)
+    app = build_app(questions, paper)
+    results = {"questions": args.questions, "scenarios": {}}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for payload in ("questions", "paper"):
+            default = await client.get(f"/default/{payload}")
+            fast = await client.get(f"/fast/{payload}")
+            # The fast path must not change what clients receive
+            if default.json() != fast.json():
+                raise SystemExit(f"{payload}: trusted response differs from the validated one")
+            for path in (f"/default/{payload}", f"/fast/{payload}"):
+                results["scenarios"][f"GET {path}"] = await measure(client, path, args.requests)
+
+    for payload in ("questions", "paper"):
+        default = results["scenarios"][f"GET /default/{payload}"]
+        fast = results["scenarios"][f"GET /fast/{payload}"]
+        saving = (default["p50_ms"] - fast["p50_ms"]) / default["p50_ms"] * 100 if default["p50_ms"] else 0.0
+        print(f"{payload:<10} default p50 {default['p50_ms']:.2f} ms  fast p50 {fast['p50_ms']:.2f} ms  ({saving:.0f}% less)")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare default and orjson response serialization")
+    parser.add_argument("--questions", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--output", default=None, help="Write the results as JSON to this file")
+    asyncio.run(main(parser.parse_args()))
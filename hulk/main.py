@@ -1,18 +1,38 @@
-from fastapi import FastAPI, Depends
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from apis.Hagrid.main import router as auth_router
 from apis.Hermione.main import router as question_extractor_router
-from apis.Hermione.main import questions_router
+from apis.Hermione.main import questions_router, extraction_workers
 from apis.Ron.main import router as paper_generation_router
 from apis.Harry.main import router as curriculum_router
-from security.main import get_current_user
+from security.main import get_current_user, get_current_admin_user
+from apis.Ginny.utils import close_mongo_clients, get_pool_stats
+from apis.Ginny.pagination import NEXT_CURSOR_HEADER
+from apis.Ginny.indexes import ensure_indexes
+from apis.Ginny.query_stats import start_request_stats, check_query_threshold
+from apis.Ginny.metrics import REGISTRY, http_requests_total, http_request_duration_seconds, http_requests_in_flight
+import os
+import time
 from apis.Luna.main import router as question_bank_router
 from apis.Ron.main import router as paper_generation_router
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Mongo clients are created lazily on first use and shared by every router
+    if os.getenv("MONGO_ENSURE_INDEXES", "true").lower() != "false":
+        await ensure_indexes()
+    await extraction_workers.start()
+    yield
+    await extraction_workers.stop()
+    await close_mongo_clients()
+
 app = FastAPI(
     title="ExamCraft API",
     description="API for the ExamCraft application",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -22,8 +42,49 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
+DEBUG = os.getenv("DEBUG", "false").lower() == "true"
+
+# Count MongoDB commands per request and flag N+1 query patterns
+@app.middleware("http")
+async def query_stats_middleware(request: Request, call_next):
+    stats = start_request_stats()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    check_query_threshold(stats, request.method, route.path if route else request.url.path)
+    if DEBUG:
+        response.headers.update(stats.headers())
+    return response
+
+# Request count and latency per route template, not per raw path, to keep label cardinality bounded
+@app.middleware("http")
+async def metrics_middleware(request: Request, call_next):
+    http_requests_in_flight.inc()
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        http_requests_in_flight.dec()
+        route = request.scope.get("route")
+        route_path = route.path if route else "unmatched"
+        http_requests_total.inc(method=request.method, route=route_path, status=status_code)
+        http_request_duration_seconds.observe(time.perf_counter() - start, method=request.method, route=route_path)
+
+# Attach the ETag computed by conditional_get to successful reads
+@app.middleware("http")
+async def etag_middleware(request: Request, call_next):
+    response = await call_next(request)
+    etag = getattr(request.state, "etag", None)
+    if etag and response.status_code == 200:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(question_extractor_router)
@@ -46,6 +107,16 @@ async def protected_route(current_user = Depends(get_current_user)):
         "user": current_user.username
     }
 
+# Connection pool usage of the shared Mongo clients
+@app.get("/db/pool-stats")
+async def pool_stats(current_admin = Depends(get_current_admin_user)):
+    return get_pool_stats()
+
+# Prometheus scrape endpoint
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=9563)
\ No newline at end of file
@@ -67,5 +67,14 @@ class QuestionBankUpload(BaseModel):
     created_at: datetime = Field(default_factory=datetime.now, description="Timestamp when the upload was created")
     created_by: str = Field(..., description="Identifier of the user who uploaded the file")
     error_message: Optional[str] = Field(None, description="Error message if processing failed")
+    filename: Optional[str] = Field(None, description="Name of the uploaded file")
+    question_bank_id: Optional[str] = Field(None, description="Question bank the extracted questions are meant for")
+    bank_info: Optional[dict] = Field(None, description="Standard and subject of that question bank")
+    pages_total: Optional[int] = Field(None, description="Number of pages to process, once known")
+    pages_processed: int = Field(default=0, description="Number of pages processed so far")
+    questions: Optional[List[dict]] = Field(None, description="Extracted questions, once processing completed")
+    attempts: int = Field(default=0, description="Number of times a worker claimed the job")
+    started_at: Optional[datetime] = Field(None, description="When processing started")
+    finished_at: Optional[datetime] = Field(None, description="When processing completed or failed")
 
 
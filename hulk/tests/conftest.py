@@ -7,10 +7,29 @@ from datetime import datetime, timedelta
 
 # Add the root directory to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 # Now we can import from our project
 from hulk.security.main import create_access_token, get_password_hash
-from hulk.apis.Ginny.utils import set_test_db
+# The app imports its routers as top-level `apis` modules, so the test hook has to
+# be set on that module rather than on `hulk.apis`
+from apis.Ginny.utils import set_test_db, close_mongo_clients
+
+@pytest.fixture(autouse=True)
+async def reset_mongo_clients():
+    """
+    Drop the shared Mongo clients after every test
+
+    Async clients are bound to the event loop that created them and each
+    test runs in its own loop, so a client left behind by a test (e.g. one
+    whose fixture setup failed) must not be reused by the next one.
+    """
+    yield
+    try:
+        await close_mongo_clients()
+    except Exception:
+        # Created in another loop (e.g. TestClient's), the registry is cleared anyway
+        pass
 
 @pytest.fixture
 def app():
@@ -0,0 +1,60 @@
+import pytest
+from datetime import datetime
+from apis.Ginny.utils import close_mongo_clients, get_database
+from apis.Harry.ancestors import child_ancestors, migrate_ancestors
+
+@pytest.mark.unit
+class TestChildAncestors:
+
+    def test_child_of_standard(self):
+        """Test that a child of a standard has only the standard as ancestor"""
+        assert child_ancestors({"id": "std", "ancestors": []}) == ["std"]
+
+    def test_child_extends_parent_path(self):
+        """Test that a child's path is its parent's path followed by the parent"""
+        assert child_ancestors({"id": "ch", "ancestors": ["std", "sub"]}) == ["std", "sub", "ch"]
+
+
+@pytest.mark.integration
+class TestAncestorMigration:
+
+    @pytest.fixture
+    async def databases(self, monkeypatch):
+        monkeypatch.setenv("MONGO_CURRICULUM_DB", "examcraft_ancestors_curriculum_test")
+        monkeypatch.setenv("MONOGO_QUESTION_BANK_DB", "examcraft_ancestors_questions_test")
+        curriculum_db = get_database("examcraft_ancestors_curriculum_test")
+        question_db = get_database("examcraft_ancestors_questions_test")
+        node = {"created_at": datetime.now(), "created_by": "test"}
+        await curriculum_db.standards.insert_one({"id": "std", "name": 10, **node})
+        await curriculum_db.subjects.insert_one({"id": "sub", "name": "Mathematics", "standard_id": "std", **node})
+        await curriculum_db.chapters.insert_one({"id": "ch", "name": "Algebra", "subject_id": "sub", **node})
+        await curriculum_db.topics.insert_many([
+            {"id": "top", "name": "Linear Equations", "chapter_id": "ch", **node},
+            {"id": "orphan", "name": "Lost", "chapter_id": "missing", **node},
+        ])
+        await question_db.questions.insert_one({
+            "id": "q1", "topic_id": "top", "chapter_id": "ch", "subject_id": "sub", "standard_id": "std", **node
+        })
+        yield curriculum_db, question_db
+        await curriculum_db.client.drop_database(curriculum_db.name)
+        await question_db.client.drop_database(question_db.name)
+        await close_mongo_clients()
+
+    async def test_migration_writes_paths(self, databases):
+        """Test that the migration fills the path of every node and question"""
+        curriculum_db, question_db = databases
+        updated = await migrate_ancestors()
+
+        assert updated["topics"] == 1
+        assert (await curriculum_db.standards.find_one({"id": "std"}))["ancestors"] == []
+        assert (await curriculum_db.topics.find_one({"id": "top"}))["ancestors"] == ["std", "sub", "ch"]
+        assert "ancestors" not in await curriculum_db.topics.find_one({"id": "orphan"})
+        assert (await question_db.questions.find_one({"id": "q1"}))["ancestors"] == ["std", "sub", "ch", "top"]
+
+    async def test_subtree_is_one_query(self, databases):
+        """Test that everything below a standard is found by its id alone"""
+        curriculum_db, question_db = databases
+        await migrate_ancestors()
+
+        assert await curriculum_db.topics.count_documents({"ancestors": "std"}) == 1
+        assert await question_db.questions.count_documents({"ancestors": "sub"}) == 1
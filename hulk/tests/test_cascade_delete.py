@@ -0,0 +1,112 @@
+import pytest
+from datetime import datetime
+from gridfs import AsyncGridFS
+from uuid import uuid4
+from apis.Ginny.utils import close_mongo_clients, get_database
+from apis.Harry.cascade import collect_subtree, create_cascade_job, question_field, run_cascade_delete, _batches
+from apis.Harry.models import QuestionAction, TreeLevel
+
+CHAPTER_OF_TOPIC = ["ch1", "ch1", "ch1", "ch2", "ch2", "ch2"]
+
+@pytest.mark.unit
+class TestCascadeHelpers:
+
+    def test_batches_cover_every_item(self):
+        """Test that batches split a list without dropping items"""
+        assert list(_batches(list(range(5)), 2)) == [[0, 1], [2, 3], [4]]
+
+    def test_question_field(self):
+        """Test that each level maps to the id field stored on questions"""
+        assert question_field(TreeLevel.SUBJECT) == "subject_id"
+        assert question_field(TreeLevel.TOPIC) == "topic_id"
+
+
+@pytest.mark.integration
+class TestCascadeDelete:
+
+    @pytest.fixture
+    async def databases(self, monkeypatch):
+        monkeypatch.setenv("MONGO_CURRICULUM_DB", "examcraft_cascade_curriculum_test")
+        monkeypatch.setenv("MONOGO_QUESTION_BANK_DB", "examcraft_cascade_questions_test")
+        curriculum_db = get_database("examcraft_cascade_curriculum_test")
+        question_db = get_database("examcraft_cascade_questions_test")
+        now = datetime.now()
+        node = {"created_at": now, "created_by": "test"}
+        await curriculum_db.standards.insert_one({"id": "std", "name": 10, "ancestors": [], **node})
+        await curriculum_db.subjects.insert_one({"id": "sub", "name": "Mathematics", "standard_id": "std", "ancestors": ["std"], **node})
+        await curriculum_db.chapters.insert_many([
+            {"id": "ch1", "name": "Algebra", "subject_id": "sub", "ancestors": ["std", "sub"], **node},
+            {"id": "ch2", "name": "Geometry", "subject_id": "sub", "ancestors": ["std", "sub"], **node},
+        ])
+        await curriculum_db.topics.insert_many([
+            {"id": f"top{i}", "name": f"Topic {i}", "chapter_id": chapter_id, "ancestors": ["std", "sub", chapter_id], **node}
+            for i, chapter_id in enumerate(CHAPTER_OF_TOPIC)
+        ])
+        await curriculum_db.tags.insert_one({"id": "t1", "name": "Important", "color": "#3498db", "usage_count": 6, **node})
+        image_id = uuid4()
+        await AsyncGridFS(question_db).put(b"png", file_id=str(image_id), question_id="q0")
+        await question_db.questions.insert_many([
+            {
+                "id": f"q{i}", "topic_id": f"top{i}", "chapter_id": chapter_id,
+                "subject_id": "sub", "standard_id": "std", "ancestors": ["std", "sub", chapter_id, f"top{i}"],
+                "tags": ["t1"], "images": [image_id] if i == 0 else [], **node
+            }
+            for i, chapter_id in enumerate(CHAPTER_OF_TOPIC)
+        ])
+        await question_db.question_banks.insert_one({
+            "id": "bank", "name": "10_Mathematics_1", "standard_id": "std", "subject_id": "sub",
+            "question_ids": ["q0", "q5"], **node
+        })
+        yield curriculum_db, question_db
+        await curriculum_db.client.drop_database(curriculum_db.name)
+        await question_db.client.drop_database(question_db.name)
+        await close_mongo_clients()
+
+    async def test_collect_subtree(self, databases):
+        """Test that every level below the node is collected"""
+        subtree = await collect_subtree(TreeLevel.SUBJECT, "sub")
+
+        assert subtree["subjects"] == ["sub"]
+        assert sorted(subtree["chapters"]) == ["ch1", "ch2"]
+        assert len(subtree["topics"]) == 6
+
+    async def test_cascade_deletes_questions_and_images(self, databases):
+        """Test that deleting a chapter removes its topics, questions, images and bank entries"""
+        curriculum_db, question_db = databases
+        job = await create_cascade_job(TreeLevel.CHAPTER, "ch1", QuestionAction.DELETE, "test")
+        await run_cascade_delete(job["id"])
+
+        job = await curriculum_db.curriculum_jobs.find_one({"id": job["id"]})
+        assert job["status"] == "completed"
+        assert job["progress"]["questions"] == 3
+        assert job["progress"]["topics"] == 3
+        assert await curriculum_db.chapters.count_documents({}) == 1
+        assert await question_db.questions.count_documents({}) == 3
+        assert await question_db["fs.files"].count_documents({}) == 0
+        assert (await question_db.question_banks.find_one({"id": "bank"}))["question_ids"] == ["q5"]
+        assert (await curriculum_db.tags.find_one({"id": "t1"}))["usage_count"] == 3
+
+    async def test_cascade_detaches_questions(self, databases):
+        """Test that detached questions keep the ids of the levels above the deleted node"""
+        curriculum_db, question_db = databases
+        job = await create_cascade_job(TreeLevel.SUBJECT, "sub", QuestionAction.DETACH, "test")
+        await run_cascade_delete(job["id"])
+
+        question = await question_db.questions.find_one({"id": "q0"})
+        assert question["standard_id"] == "std"
+        assert question["subject_id"] is None
+        assert question["topic_id"] is None
+        assert question["ancestors"] == ["std"]
+        assert await question_db.questions.count_documents({}) == 6
+        assert await question_db.question_banks.count_documents({}) == 0
+        assert await curriculum_db.topics.count_documents({}) == 0
+
+    async def test_job_runs_once(self, databases):
+        """Test that a job that already ran isn't started again"""
+        curriculum_db, _ = databases
+        job = await create_cascade_job(TreeLevel.TOPIC, "top0", QuestionAction.DELETE, "test")
+        await run_cascade_delete(job["id"])
+        finished = await curriculum_db.curriculum_jobs.find_one({"id": job["id"]})
+        await run_cascade_delete(job["id"])
+
+        assert (await curriculum_db.curriculum_jobs.find_one({"id": job["id"]}))["finished_at"] == finished["finished_at"]
@@ -0,0 +1,116 @@
+import pytest
+from datetime import datetime
+from apis.Ginny.metrics import curriculum_cache_hits_total, curriculum_cache_misses_total
+from apis.Ginny.utils import close_mongo_clients, get_database
+from apis.Harry.cache import CurriculumCache, TopicPath
+
+@pytest.mark.unit
+class TestCurriculumCacheBounds:
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test that the cache never holds more than max_entries documents"""
+        cache = CurriculumCache(ttl_seconds=60, max_entries=2)
+        cache._store(("topics", "a"), {"id": "a"})
+        cache._store(("topics", "b"), {"id": "b"})
+        cache._lookup(("topics", "a"))
+        cache._store(("topics", "c"), {"id": "c"})
+
+        assert cache._lookup(("topics", "b")) is None
+        assert cache._lookup(("topics", "a")) == {"id": "a"}
+        assert len(cache._entries) == 2
+
+    def test_expired_entries_are_not_returned(self):
+        """Test that entries older than the TTL are dropped on lookup"""
+        cache = CurriculumCache(ttl_seconds=-1, max_entries=10)
+        cache._store(("topics", "a"), {"id": "a"})
+
+        assert cache._lookup(("topics", "a")) is None
+
+    def test_invalidate_clears_and_bumps_version(self):
+        """Test that a write empties the cache and changes its version"""
+        cache = CurriculumCache(ttl_seconds=60, max_entries=10)
+        cache._store(("topics", "a"), {"id": "a"})
+        cache.invalidate()
+
+        assert cache.version == 1
+        assert cache._lookup(("topics", "a")) is None
+
+
+    async def test_topic_paths_are_memoized(self):
+        """Test that a cached topic path is returned without a query and dropped on writes"""
+        cache = CurriculumCache(ttl_seconds=60, max_entries=10)
+        path = TopicPath({"id": "std"}, {"id": "sub"}, {"id": "ch"}, {"id": "top"})
+        cache._store(("topic_path", "top"), path)
+        hits = curriculum_cache_hits_total._values.get(("topic_path",), 0)
+
+        assert await cache.topic_path("top") == path
+        assert curriculum_cache_hits_total._values[("topic_path",)] == hits + 1
+        cache.invalidate()
+        assert cache._lookup(("topic_path", "top")) is None
+
+
+@pytest.mark.integration
+class TestCurriculumCacheLookups:
+
+    @pytest.fixture
+    async def curriculum_db(self, monkeypatch):
+        monkeypatch.setenv("MONGO_CURRICULUM_DB", "examcraft_curriculum_cache_test")
+        db = get_database("examcraft_curriculum_cache_test")
+        now = datetime.now()
+        await db.standards.insert_one({"id": "std", "name": 10, "created_at": now, "created_by": "test"})
+        await db.subjects.insert_one({"id": "sub", "name": "Mathematics", "standard_id": "std", "created_at": now, "created_by": "test"})
+        await db.chapters.insert_one({"id": "ch", "name": "Algebra", "subject_id": "sub", "created_at": now, "created_by": "test"})
+        await db.topics.insert_one({"id": "top", "name": "Linear Equations", "chapter_id": "ch", "created_at": now, "created_by": "test"})
+        yield db
+        await db.client.drop_database(db.name)
+        await close_mongo_clients()
+
+    async def test_hierarchy_is_served_from_cache(self, curriculum_db):
+        """Test that a repeated hierarchy lookup doesn't query MongoDB again"""
+        cache = CurriculumCache(ttl_seconds=60, max_entries=100)
+        first = await cache.hierarchy("top")
+        misses = dict(curriculum_cache_misses_total._values)
+        second = await cache.hierarchy("top")
+
+        assert first["standard"]["name"] == 10
+        assert second == first
+        assert curriculum_cache_misses_total._values == misses
+
+    async def test_topic_path_falls_back_without_ancestors(self, curriculum_db):
+        """Test that topics created before ancestor paths still resolve"""
+        cache = CurriculumCache(ttl_seconds=60, max_entries=100)
+        path = await cache.topic_path("top")
+
+        assert path.standard["id"] == "std"
+        assert path.subject["id"] == "sub"
+        assert path.chapter["id"] == "ch"
+
+    async def test_topic_path_in_one_aggregation(self, curriculum_db):
+        """Test that a topic with an ancestor path resolves with a single query and is then memoized"""
+        await curriculum_db.topics.update_one({"id": "top"}, {"$set": {"ancestors": ["std", "sub", "ch"]}})
+        cache = CurriculumCache(ttl_seconds=60, max_entries=100)
+        paths = await cache.topic_paths(["top", "missing"])
+        misses = dict(curriculum_cache_misses_total._values)
+        again = await cache.topic_path("top")
+
+        assert set(paths) == {"top"}
+        assert paths["top"].standard["name"] == 10
+        assert paths["top"].chapter["name"] == "Algebra"
+        assert again == paths["top"]
+        assert curriculum_cache_misses_total._values == misses
+
+    async def test_names_fall_back_to_default(self, curriculum_db):
+        """Test that unknown ids map to the default name"""
+        cache = CurriculumCache(ttl_seconds=60, max_entries=100)
+        names = await cache.names("subjects", ["sub", "missing"], "Unknown Subject")
+
+        assert names == {"sub": "Mathematics", "missing": "Unknown Subject"}
+
+    async def test_invalidate_picks_up_renames(self, curriculum_db):
+        """Test that a rename is visible after invalidation"""
+        cache = CurriculumCache(ttl_seconds=60, max_entries=100)
+        await cache.get("topics", "top")
+        await curriculum_db.topics.update_one({"id": "top"}, {"$set": {"name": "Quadratics"}})
+        cache.invalidate()
+
+        assert (await cache.get("topics", "top"))["name"] == "Quadratics"
@@ -0,0 +1,87 @@
+import pytest
+from fastapi import HTTPException
+from apis.Ginny.utils import close_mongo_clients, get_database
+from apis.Harry.importer import import_curriculum, parse_rows, read_sheet
+
+SHEET = (
+    b"Standard,Subject,Chapter,Topic\n"
+    b"10,Mathematics,Algebra,Linear Equations\n"
+    b"10,Mathematics,Algebra,Quadratic Equations\n"
+    b"10,Mathematics,,\n"
+    b",,,\n"
+    b"ten,Science,,\n"
+    b"10,,Algebra,\n"
+)
+
+@pytest.mark.unit
+class TestSheetParsing:
+
+    def test_read_sheet_normalizes_headers(self):
+        """Test that column names are matched case-insensitively"""
+        df = read_sheet(SHEET, "curriculum.CSV")
+
+        assert list(df.columns) == ["standard", "subject", "chapter", "topic"]
+
+    def test_read_sheet_rejects_other_files(self):
+        """Test that only CSV and Excel uploads are accepted"""
+        with pytest.raises(HTTPException) as exc:
+            read_sheet(SHEET, "curriculum.txt")
+
+        assert exc.value.status_code == 400
+
+    def test_read_sheet_requires_standard_column(self):
+        """Test that a sheet without a standard column is rejected"""
+        with pytest.raises(HTTPException) as exc:
+            read_sheet(b"subject,chapter\nMathematics,Algebra\n", "curriculum.csv")
+
+        assert exc.value.status_code == 400
+
+    def test_read_sheet_rejects_unreadable_files(self):
+        """Test that empty or corrupt uploads return 400 instead of a server error"""
+        for content, filename in [(b"", "curriculum.csv"), (b"not a workbook", "curriculum.xlsx"), (b'standard\n"10\n', "curriculum.csv")]:
+            with pytest.raises(HTTPException) as exc:
+                read_sheet(content, filename)
+
+            assert exc.value.status_code == 400
+            assert exc.value.detail.startswith(f"Could not read {filename}")
+
+    def test_parse_rows_reports_each_row(self):
+        """Test that blank rows are skipped and invalid rows get an error"""
+        rows = parse_rows(read_sheet(SHEET, "curriculum.csv"))
+
+        assert [row["row"] for row in rows] == [2, 3, 4, 5, 6, 7]
+        assert [row["status"] for row in rows] == ["unchanged", "unchanged", "unchanged", "skipped", "error", "error"]
+        assert rows[0]["names"] == {"standard": 10, "subject": "Mathematics", "chapter": "Algebra", "topic": "Linear Equations"}
+        assert rows[2]["names"]["chapter"] is None
+        assert "number" in rows[4]["error"]
+        assert "required" in rows[5]["error"]
+
+
+@pytest.mark.integration
+class TestCurriculumImport:
+
+    @pytest.fixture
+    async def curriculum_db(self, monkeypatch):
+        monkeypatch.setenv("MONGO_CURRICULUM_DB", "examcraft_import_curriculum_test")
+        db = get_database("examcraft_import_curriculum_test")
+        await db.standards.insert_one({"id": "s10", "name": 10, "description": None, "created_by": "test"})
+        yield db
+        await db.client.drop_database(db.name)
+        await close_mongo_clients()
+
+    async def test_import_creates_missing_levels_once(self, curriculum_db):
+        """Test that existing nodes are reused and shared parents are created once"""
+        result = await import_curriculum(SHEET, "curriculum.csv", "test")
+
+        assert result["created"] == {"standards": 0, "subjects": 1, "chapters": 1, "topics": 2}
+        assert result["errors"] == 2
+        assert await curriculum_db.subjects.count_documents({"standard_id": "s10"}) == 1
+        assert result["report"][0]["created"] == ["subject", "chapter", "topic"]
+        assert result["report"][1]["created"] == ["topic"]
+
+    async def test_dry_run_writes_nothing(self, curriculum_db):
+        """Test that a dry run reports the changes without making them"""
+        result = await import_curriculum(SHEET, "curriculum.csv", "test", dry_run=True)
+
+        assert result["created"]["topics"] == 2
+        assert await curriculum_db.topics.count_documents({}) == 0
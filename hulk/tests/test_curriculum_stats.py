@@ -0,0 +1,87 @@
+import pytest
+from datetime import datetime
+from apis.Ginny.utils import close_mongo_clients, get_database
+from apis.Harry.models import TreeLevel
+from apis.Harry.stats import apply_question_stats, format_stats, rebuild_stats, stat_changes, stat_operations
+
+def make_question(question_id, topic_id="top", question_type_id="mcq", difficulty_level="easy", marks=1):
+    return {
+        "id": question_id, "question_type_id": question_type_id, "difficulty_level": difficulty_level, "marks": marks,
+        "standard_id": "std", "subject_id": "sub", "chapter_id": "ch", "topic_id": topic_id,
+    }
+
+@pytest.mark.unit
+class TestStatChanges:
+
+    def test_question_counts_at_every_level(self):
+        """Test that a question is counted at its standard, subject, chapter and topic"""
+        changes = stat_changes([make_question("q1"), make_question("q2", topic_id="top2", marks=5)], 1)
+
+        assert set(changes) == {"std", "sub", "ch", "top", "top2"}
+        assert changes["ch"]["level"] == "chapter"
+        assert changes["ch"]["inc"]["total"] == 2
+        assert changes["ch"]["inc"]["by_marks.5"] == 1
+        assert changes["top"]["inc"]["by_difficulty.easy"] == 1
+
+    def test_changes_cancel_out(self):
+        """Test that adding and removing the same question leaves no operations"""
+        changes = stat_changes([make_question("q1")], 1)
+        stat_changes([make_question("q1")], -1, changes)
+
+        assert stat_operations(changes) == []
+
+    def test_detached_levels_are_skipped(self):
+        """Test that levels a question was detached from aren't counted"""
+        question = {**make_question("q1"), "chapter_id": None, "topic_id": None}
+
+        assert set(stat_changes([question], 1)) == {"std", "sub"}
+
+    def test_format_drops_zero_counters(self):
+        """Test that breakdown entries that fell back to zero aren't served"""
+        stats = format_stats(TreeLevel.TOPIC, "top", {"total": 1, "by_marks": {"1": 1, "5": 0}})
+
+        assert stats["by_marks"] == {"1": 1}
+        assert stats["by_difficulty"] == {}
+        assert format_stats(TreeLevel.TOPIC, "new", None)["total"] == 0
+
+
+@pytest.mark.integration
+class TestCurriculumStats:
+
+    @pytest.fixture
+    async def databases(self, monkeypatch):
+        monkeypatch.setenv("MONGO_CURRICULUM_DB", "examcraft_stats_curriculum_test")
+        monkeypatch.setenv("MONOGO_QUESTION_BANK_DB", "examcraft_stats_questions_test")
+        curriculum_db = get_database("examcraft_stats_curriculum_test")
+        question_db = get_database("examcraft_stats_questions_test")
+        yield curriculum_db, question_db
+        await curriculum_db.client.drop_database(curriculum_db.name)
+        await question_db.client.drop_database(question_db.name)
+        await close_mongo_clients()
+
+    async def test_incremental_updates(self, databases):
+        """Test that creating and deleting questions keeps the rollups exact"""
+        curriculum_db, _ = databases
+        questions = [make_question("q1"), make_question("q2", difficulty_level="hard"), make_question("q3", topic_id="top2")]
+        await apply_question_stats(questions, 1)
+        await apply_question_stats(questions[:1], -1)
+
+        chapter = await curriculum_db.curriculum_stats.find_one({"_id": "ch"})
+        assert chapter["total"] == 2
+        assert chapter["by_difficulty"] == {"easy": 1, "hard": 1}
+        assert (await curriculum_db.curriculum_stats.find_one({"_id": "top"}))["total"] == 1
+
+    async def test_rebuild_matches_questions(self, databases):
+        """Test that a rebuild replaces drifted counters with the real counts"""
+        curriculum_db, question_db = databases
+        await question_db.questions.insert_many([
+            {**make_question("q1"), "created_at": datetime.now()},
+            {**make_question("q2", marks=3), "created_at": datetime.now()},
+        ])
+        await curriculum_db.curriculum_stats.insert_one({"_id": "std", "level": "standard", "total": 40})
+
+        await rebuild_stats()
+
+        standard = await curriculum_db.curriculum_stats.find_one({"_id": "std"})
+        assert standard["total"] == 2
+        assert standard["by_marks"] == {"1": 1, "3": 1}
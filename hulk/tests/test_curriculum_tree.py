@@ -0,0 +1,68 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from apis.Harry.cache import curriculum_cache
+from apis.Harry.main import router
+from apis.Harry.models import TreeLevel
+from apis.Harry.tree import tree_etag, tree_pipeline
+from security.main import get_current_user
+
+@pytest.mark.unit
+class TestCurriculumTree:
+
+    @pytest.fixture
+    def client(self):
+        app = FastAPI()
+        app.include_router(router)
+        app.dependency_overrides[get_current_user] = lambda: {"username": "test"}
+        body = b'[{"id":"std","name":10,"subjects":[]}]'
+        curriculum_cache.store_derived("tree:standard:None:None", {"body": body, "etag": tree_etag(body)}, curriculum_cache.version)
+        yield TestClient(app)
+        curriculum_cache.invalidate()
+
+    def test_pipeline_stops_at_requested_depth(self):
+        """Test that depth limits how many levels of children are joined"""
+        collection, pipeline = tree_pipeline(TreeLevel.SUBJECT, "sub", depth=1)
+        lookup = pipeline[2]["$lookup"]
+
+        assert collection == "subjects"
+        assert pipeline[0] == {"$match": {"id": "sub"}}
+        assert lookup["from"] == "chapters" and lookup["foreignField"] == "subject_id"
+        assert not any("$lookup" in stage for stage in lookup["pipeline"])
+
+    def test_full_tree_joins_every_level(self):
+        """Test that without a depth the tree reaches the topics"""
+        _, pipeline = tree_pipeline()
+        levels = []
+        stages = pipeline
+        while True:
+            lookup = next((stage["$lookup"] for stage in stages if "$lookup" in stage), None)
+            if not lookup:
+                break
+            levels.append(lookup["from"])
+            stages = lookup["pipeline"]
+
+        assert levels == ["subjects", "chapters", "topics"]
+
+    def test_tree_is_served_with_etag(self, client):
+        """Test that the tree carries an ETag and revalidates with 304"""
+        response = client.get("/curriculum/tree")
+        assert response.status_code == 200
+        assert response.json()[0]["id"] == "std"
+
+        revalidated = client.get("/curriculum/tree", headers={"If-None-Match": response.headers["etag"]})
+        assert revalidated.status_code == 304
+        assert revalidated.content == b""
+
+    def test_weak_and_listed_etags_revalidate(self, client):
+        """Test that weak validators and lists of ETags also revalidate with 304"""
+        etag = client.get("/curriculum/tree").headers["etag"]
+
+        assert client.get("/curriculum/tree", headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+        assert client.get("/curriculum/tree", headers={"If-None-Match": f'"other", {etag}'}).status_code == 304
+        assert client.get("/curriculum/tree", headers={"If-None-Match": '"other"'}).status_code == 200
+
+    def test_non_standard_root_requires_id(self, client):
+        """Test that a subject root without an id is rejected"""
+        response = client.get("/curriculum/tree", params={"root_level": "subject"})
+        assert response.status_code == 400
@@ -0,0 +1,110 @@
+import asyncio
+import pytest
+from datetime import datetime
+from fastapi import HTTPException
+from pymongo import ASCENDING
+from pymongo.errors import DuplicateKeyError
+from types import SimpleNamespace
+from apis.Ginny.utils import close_mongo_clients, get_database
+from apis.Harry.main import update_node, update_subject, update_tag
+from apis.Harry.models import SubjectUpdate, TagUpdate
+
+USER = SimpleNamespace(username="test")
+
+
+class FakeCollection:
+    """Stands in for a collection whose find_one_and_update has a fixed outcome"""
+
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.calls = []
+
+    async def find_one_and_update(self, query, update, **kwargs):
+        self.calls.append((query, update))
+        if self.error:
+            raise self.error
+        return self.result
+
+
+@pytest.mark.unit
+class TestUpdateNode:
+
+    async def test_update_is_a_single_call(self):
+        """Test that only the fields that were sent are set, in one round trip"""
+        collection = FakeCollection(result={"id": "s1", "name": "Physics"})
+        document = await update_node(collection, "s1", SubjectUpdate(name="Physics"), "test", "Subject", "conflict")
+
+        assert document == {"id": "s1", "name": "Physics"}
+        assert len(collection.calls) == 1
+        query, update = collection.calls[0]
+        assert query == {"id": "s1"}
+        assert set(update["$set"]) == {"name", "updated_at", "updated_by"}
+
+    async def test_missing_document_is_404(self):
+        """Test that updating an unknown id is reported as not found"""
+        with pytest.raises(HTTPException) as exc:
+            await update_node(FakeCollection(), "nope", SubjectUpdate(name="Physics"), "test", "Subject", "conflict")
+
+        assert exc.value.status_code == 404
+        assert exc.value.detail == "Subject not found"
+
+    async def test_duplicate_name_is_400(self):
+        """Test that a unique index violation is reported as a name conflict"""
+        collection = FakeCollection(error=DuplicateKeyError("E11000 duplicate key"))
+        with pytest.raises(HTTPException) as exc:
+            await update_node(collection, "s1", SubjectUpdate(name="Physics"), "test", "Subject", "Name taken")
+
+        assert exc.value.status_code == 400
+        assert exc.value.detail == "Name taken"
+
+
+@pytest.mark.integration
+class TestConcurrentUpdates:
+
+    @pytest.fixture
+    async def curriculum_db(self, monkeypatch):
+        monkeypatch.setenv("MONGO_CURRICULUM_DB", "examcraft_curriculum_updates_test")
+        db = get_database("examcraft_curriculum_updates_test")
+        now = datetime.now()
+        await db.subjects.create_index([("standard_id", ASCENDING), ("name", ASCENDING)], unique=True)
+        await db.tags.create_index([("name", ASCENDING)], unique=True)
+        await db.subjects.insert_many([
+            {"id": f"sub{i}", "name": f"Subject {i}", "standard_id": "std", "created_at": now, "created_by": "test"}
+            for i in range(5)
+        ])
+        await db.tags.insert_one({"id": "t1", "name": "Important", "color": "#3498db", "usage_count": 0, "created_at": now, "created_by": "test"})
+        yield db
+        await db.client.drop_database(db.name)
+        await close_mongo_clients()
+
+    async def test_concurrent_renames_to_same_name(self, curriculum_db):
+        """Test that only one of several racing renames to the same name wins"""
+        results = await asyncio.gather(
+            *(update_subject(f"sub{i}", SubjectUpdate(name="Physics"), current_user=USER) for i in range(5)),
+            return_exceptions=True
+        )
+
+        succeeded = [result for result in results if not isinstance(result, Exception)]
+        rejected = [result for result in results if isinstance(result, HTTPException)]
+        assert len(succeeded) == 1
+        assert len(rejected) == 4
+        assert all(error.status_code == 400 for error in rejected)
+        assert await curriculum_db.subjects.count_documents({"name": "Physics"}) == 1
+
+    async def test_concurrent_updates_return_their_own_write(self, curriculum_db):
+        """Test that each racing update returns a document reflecting its own change"""
+        colors = [f"#00000{i}" for i in range(5)]
+        results = await asyncio.gather(
+            *(update_tag("t1", TagUpdate(color=color), current_user=USER) for color in colors)
+        )
+
+        assert sorted(result.color for result in results) == colors
+        assert (await curriculum_db.tags.find_one({"id": "t1"}))["color"] in colors
+
+    async def test_update_missing_node(self, curriculum_db):
+        """Test that updating a node that doesn't exist is a 404"""
+        with pytest.raises(HTTPException) as exc:
+            await update_subject("missing", SubjectUpdate(name="Physics"), current_user=USER)
+
+        assert exc.value.status_code == 404
@@ -0,0 +1,98 @@
+import asyncio
+import random
+import pytest
+from apis.Harry.models import (
+    StandardResponse, SubjectResponse, ChapterResponse, TopicResponse, TagResponse, QuestionTypeResponse
+)
+from apis.Hermione.main import QuestionResponse
+from apis.Luna.main import QuestionBankInDB
+from tools.datagen import DEFAULT_SCALE, _attach_images, bank_sizes, build_bank, build_curriculum, build_question, render_diagram
+
+SMALL_SCALE = {"standards": 2, "subjects": 6, "chapters": 20, "topics": 60, "questions": 500, "banks": 8, "tags": 15, "largest_bank": 100}
+
+@pytest.mark.unit
+class TestDataGenerator:
+
+    def test_documents_match_response_models(self):
+        """Test that generated documents validate against the API response models"""
+        rng = random.Random(1)
+        curriculum = build_curriculum(rng, SMALL_SCALE)
+        models = {
+            "standards": StandardResponse,
+            "subjects": SubjectResponse,
+            "chapters": ChapterResponse,
+            "topics": TopicResponse,
+            "question_types": QuestionTypeResponse,
+            "tags": TagResponse,
+        }
+        for collection_name, model in models.items():
+            for document in curriculum[collection_name]:
+                model(**document)
+
+        subject = curriculum["subjects"][0]
+        chapter = next(c for c in curriculum["chapters"] if c["subject_id"] == subject["id"])
+        topic = next(t for t in curriculum["topics"] if t["chapter_id"] == chapter["id"])
+        question = build_question(rng, topic, chapter, subject, curriculum["question_types"][0], curriculum["tags"])
+        QuestionResponse(**question)
+        QuestionBankInDB(**build_bank(rng, curriculum["standards"][0], subject, 2))
+
+    def test_sibling_names_are_unique(self):
+        """Test that generated names respect the unique indexes on parent and name"""
+        curriculum = build_curriculum(random.Random(2), DEFAULT_SCALE)
+        for collection_name, parent_key in [("subjects", "standard_id"), ("chapters", "subject_id"), ("topics", "chapter_id")]:
+            keys = [(document[parent_key], document["name"]) for document in curriculum[collection_name]]
+            assert len(keys) == len(set(keys)), collection_name
+        tag_names = [tag["name"] for tag in curriculum["tags"]]
+        assert len(tag_names) == len(set(tag_names))
+
+    def test_ancestors_follow_parents(self):
+        """Test that every node's ancestor path is its parent's path plus the parent"""
+        curriculum = build_curriculum(random.Random(3), SMALL_SCALE)
+        paths = {standard["id"]: [standard["id"]] for standard in curriculum["standards"]}
+        for collection_name, parent_key in [("subjects", "standard_id"), ("chapters", "subject_id"), ("topics", "chapter_id")]:
+            for document in curriculum[collection_name]:
+                assert document["ancestors"] == paths[document[parent_key]]
+                paths[document["id"]] = [*document["ancestors"], document["id"]]
+
+    def test_seed_makes_output_reproducible(self):
+        """Test that the same seed generates the same ids and names"""
+        first = build_curriculum(random.Random(7), SMALL_SCALE)
+        second = build_curriculum(random.Random(7), SMALL_SCALE)
+
+        assert [t["id"] for t in first["topics"]] == [t["id"] for t in second["topics"]]
+        assert [t["name"] for t in first["tags"]] == [t["name"] for t in second["tags"]]
+
+    def test_bank_sizes_add_up_to_question_count(self):
+        """Test that bank sizes cover every question with the largest bank first"""
+        sizes = bank_sizes(SMALL_SCALE)
+
+        assert sum(sizes) == SMALL_SCALE["questions"]
+        assert sizes[0] == SMALL_SCALE["largest_bank"]
+        assert len(sizes) == SMALL_SCALE["banks"]
+
+    def test_diagram_is_png(self):
+        """Test that generated diagrams are valid PNG images"""
+        assert render_diagram(random.Random(3)).startswith(b"\x89PNG")
+
+    async def test_images_do_not_depend_on_upload_order(self):
+        """Test that a seed gives every question the same image however the uploads interleave"""
+
+        class FakeGridFS:
+            def __init__(self, delays):
+                self.delays = delays
+                self.files = {}
+
+            async def put(self, data, **metadata):
+                await asyncio.sleep(self.delays.pop())
+                self.files[metadata["question_id"]] = (metadata["file_id"], data)
+
+        async def attach(delays):
+            fs = FakeGridFS(delays)
+            questions = [{"id": f"q{i}"} for i in range(5)]
+            await _attach_images(fs, random.Random(11), questions, "test", concurrency=2)
+            return fs.files
+
+        first = await attach([0.001, 0.02, 0.001, 0.02, 0.001])
+        second = await attach([0.02, 0.001, 0.02, 0.001, 0.02])
+
+        assert first == second
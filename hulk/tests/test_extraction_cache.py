@@ -0,0 +1,152 @@
+import asyncio
+import json
+import pytest
+from copy import deepcopy
+from types import SimpleNamespace
+from PIL import Image
+from pymongo.errors import PyMongoError
+import apis.Hermione.main as extractor
+from apis.Hermione import extraction_cache as cache_module
+from apis.Hermione.extraction_cache import ExtractionCache, cache_key
+from apis.Ginny.metrics import extraction_cache_hits_total, extraction_cache_misses_total
+
+RESULT = {"questions": [{"question_text": "What is $2 + 2$?", "image_required": False}]}
+
+class FakeCollection:
+    def __init__(self, fail=False):
+        self.documents = {}
+        self.fail = fail
+
+    async def find_one(self, query, projection=None):
+        if self.fail:
+            raise PyMongoError("connection refused")
+        document = self.documents.get(query["id"])
+        return deepcopy(document) if document else None
+
+    async def update_one(self, query, update, upsert=False):
+        if self.fail:
+            raise PyMongoError("connection refused")
+        self.documents[query["id"]] = {"id": query["id"], **deepcopy(update["$set"])}
+
+@pytest.fixture
+def collection(monkeypatch):
+    collection = FakeCollection()
+    monkeypatch.setattr(cache_module, "get_cache_collection", lambda: collection)
+    return collection
+
+@pytest.mark.unit
+class TestExtractionCache:
+
+    def test_key_covers_image_prompt_and_model(self):
+        """Test that a different image, prompt version or model gives a different key"""
+        key = cache_key(b"page", "1", "gemini-2.0-flash")
+
+        assert key == cache_key(b"page", "1", "gemini-2.0-flash")
+        assert key != cache_key(b"other page", "1", "gemini-2.0-flash")
+        assert key != cache_key(b"page", "2", "gemini-2.0-flash")
+        assert key != cache_key(b"page", "1", "gemini-2.5-pro")
+
+    async def test_memory_then_mongo_hits(self, collection):
+        """Test that evicted entries are still served from Mongo and counted per layer"""
+        cache = ExtractionCache(max_entries=1, ttl_days=1, enabled=True)
+        memory_hits = extraction_cache_hits_total._values.get(("memory",), 0)
+        mongo_hits = extraction_cache_hits_total._values.get(("mongo",), 0)
+        await cache.set("a", RESULT, "test-model")
+        await cache.set("b", RESULT, "test-model")
+
+        assert await cache.get("b") == RESULT
+        assert await cache.get("a") == RESULT
+        assert extraction_cache_hits_total._values[("memory",)] == memory_hits + 1
+        assert extraction_cache_hits_total._values[("mongo",)] == mongo_hits + 1
+
+    async def test_results_are_copied(self, collection):
+        """Test that callers modifying a result don't change the cached entry"""
+        cache = ExtractionCache(max_entries=10, ttl_days=1, enabled=True)
+        await cache.set("a", RESULT, "test-model")
+        (await cache.get("a"))["questions"][0]["question_text"] = "changed"
+
+        assert await cache.get("a") == RESULT
+
+    async def test_mongo_failure_is_a_miss(self, monkeypatch):
+        """Test that an unreachable cache collection never fails an extraction"""
+        monkeypatch.setattr(cache_module, "get_cache_collection", lambda: FakeCollection(fail=True))
+        cache = ExtractionCache(max_entries=10, ttl_days=1, enabled=True)
+        misses = extraction_cache_misses_total._values.get((), 0)
+
+        assert await cache.get("a") is None
+        await cache.set("a", RESULT, "test-model")
+        assert extraction_cache_misses_total._values[()] == misses + 1
+
+    async def test_disabled_cache_stores_nothing(self, collection):
+        """Test that EXTRACTION_CACHE=false skips both layers"""
+        cache = ExtractionCache(max_entries=10, ttl_days=1, enabled=False)
+        await cache.set("a", RESULT, "test-model")
+
+        assert await cache.get("a") is None
+        assert collection.documents == {}
+
+    async def test_repeat_scan_skips_gemini(self, collection, monkeypatch):
+        """Test that the same image is only sent to Gemini once"""
+        calls = []
+
+        class FakeModel:
+            def __init__(self, name):
+                pass
+
+            async def generate_content_async(self, contents, stream=False):
+                calls.append(contents)
+                return SimpleNamespace(text='{"questions": [{"question_text": "What is $2 + 2$?", "image_required": false}]}')
+
+        monkeypatch.setattr(extractor.genai, "GenerativeModel", FakeModel)
+        monkeypatch.setattr(extractor, "extraction_cache", ExtractionCache(max_entries=10, ttl_days=1, enabled=True))
+        image = Image.new("RGB", (20, 20), "white")
+
+        first = await extractor.extract_questions_from_image(image)
+        second = await extractor.extract_questions_from_image(image.copy())
+
+        assert first == second
+        assert first["questions"][0]["question_text"] == "What is $2 + 2$?"
+        assert len(calls) == 1
+
+    async def test_cached_page_does_not_wait_for_a_slot(self, collection, monkeypatch):
+        """Test that a cache hit is answered while every Gemini slot is taken"""
+        cache = ExtractionCache(max_entries=10, ttl_days=1, enabled=True)
+        monkeypatch.setattr(extractor, "extraction_cache", cache)
+        image = Image.new("RGB", (20, 20), "white")
+        await cache.set(cache_key(b"RGB:(20, 20):" + image.tobytes(), str(extractor.EXTRACTION_PROMPT_VERSION), extractor.GEMINI_MODEL), RESULT, "test-model")
+        slots = extractor.get_gemini_slots()
+        for _ in range(extractor.GEMINI_CONCURRENCY):
+            await slots.acquire()
+        try:
+            assert await asyncio.wait_for(extractor.extract_questions_from_image(image), 1) == RESULT
+        finally:
+            for _ in range(extractor.GEMINI_CONCURRENCY):
+                slots.release()
+
+    async def test_repeat_cleanup_skips_openai(self, collection, monkeypatch):
+        """Test that the same questions are only sent to OpenAI for cleanup once"""
+        calls = []
+
+        class FakeCompletions:
+            async def create(self, model, messages, temperature):
+                calls.append(messages)
+                return SimpleNamespace(
+                    choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(RESULT)))],
+                    usage=None
+                )
+
+        class FakeOpenAI:
+            def __init__(self, **kwargs):
+                self.chat = SimpleNamespace(completions=FakeCompletions())
+
+        monkeypatch.setenv("OPENAI_API_BASE", "http://openai.test")
+        monkeypatch.setenv("GITHUB_TOKEN", "test")
+        monkeypatch.setattr(extractor, "AsyncOpenAI", FakeOpenAI)
+        monkeypatch.setattr(extractor, "extraction_cache", ExtractionCache(max_entries=10, ttl_days=1, enabled=True))
+
+        first = await extractor.get_checked_from_openai_response(deepcopy(RESULT))
+        second = await extractor.get_checked_from_openai_response(deepcopy(RESULT))
+
+        assert first == second
+        assert first["questions"][0]["question_text"] == "What is $2 + 2$?"
+        assert len(calls) == 1
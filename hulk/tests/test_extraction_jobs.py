@@ -0,0 +1,236 @@
+import asyncio
+import pytest
+import apis.Hermione.jobs as jobs
+from datetime import datetime, timedelta
+from uuid import uuid4
+from apis.Ginny.utils import close_mongo_clients, get_database
+from apis.Hermione.jobs import ExtractionWorkers, claim_next_job, create_upload_job, requeue_stale_jobs
+from models.question_bank_model import QuestionBankUpload, UploadType
+
+async def extract_two_questions(job, content):
+    return {"questions": [{"question_text": content.decode(), "image_required": False}] * 2}
+
+async def fail_extraction(job, content):
+    raise ValueError("unreadable PDF")
+
+@pytest.mark.unit
+class TestExtractionWorkers:
+
+    async def test_notify_wakes_waiting_worker(self):
+        """Test that queuing a job wakes a worker before the poll interval"""
+        workers = ExtractionWorkers({}, workers=1, poll_seconds=60)
+        waiting = asyncio.create_task(workers._wait())
+        await asyncio.sleep(0)
+        workers.notify()
+
+        await asyncio.wait_for(waiting, 1)
+
+    async def test_no_workers_configured(self):
+        """Test that EXTRACTION_WORKERS=0 starts no tasks, e.g. for API-only processes"""
+        workers = ExtractionWorkers({}, workers=0)
+        await workers.start()
+
+        assert workers._tasks == []
+        await workers.stop()
+
+    async def test_stop_queues_job_in_progress_again(self, monkeypatch):
+        """Test that stopping a worker mid-job hands the job back to the queue"""
+        queue = [{"id": "job-1", "file_path": "0" * 24, "upload_type": "pdf"}]
+        requeued = []
+        started = asyncio.Event()
+
+        async def claim():
+            return queue.pop() if queue else None
+
+        async def requeue(job_ids):
+            requeued.extend(job_ids)
+            return len(requeued)
+
+        async def hang(job, content):
+            started.set()
+            await asyncio.Event().wait()
+
+        class Upload:
+            async def read(self):
+                return b"%PDF"
+
+        class Bucket:
+            async def get(self, file_id):
+                return Upload()
+
+        monkeypatch.setattr(jobs, "claim_next_job", claim)
+        monkeypatch.setattr(jobs, "requeue_jobs", requeue)
+        monkeypatch.setattr(jobs, "requeue_stale_jobs", lambda seconds: asyncio.sleep(0, 0))
+        monkeypatch.setattr(jobs, "get_uploads_bucket", Bucket)
+        workers = ExtractionWorkers({UploadType.PDF: hang}, workers=1, poll_seconds=0.05)
+        await workers.start()
+        await asyncio.wait_for(started.wait(), 1)
+        await workers.stop()
+
+        assert requeued == ["job-1"]
+        assert workers._running == set()
+
+    async def test_worker_survives_unrecorded_failure(self, monkeypatch):
+        """Test that a worker keeps claiming jobs when a failure can't be recorded"""
+        queue = [{"id": f"job-{i}", "file_path": "0" * 24, "upload_type": "pdf", "attempts": 1} for i in range(2)]
+        attempted = []
+        done = asyncio.Event()
+
+        async def claim():
+            return queue.pop() if queue else None
+
+        async def fail(job, content):
+            attempted.append(job["id"])
+            if len(attempted) == 2:
+                done.set()
+            raise ValueError("unreadable PDF")
+
+        async def update(job_id, **fields):
+            raise ConnectionError("MongoDB is unreachable")
+
+        class Upload:
+            async def read(self):
+                return b"%PDF"
+
+        class Bucket:
+            async def get(self, file_id):
+                return Upload()
+
+            async def delete(self, file_id):
+                pass
+
+        monkeypatch.setattr(jobs, "claim_next_job", claim)
+        monkeypatch.setattr(jobs, "update_upload_job", update)
+        monkeypatch.setattr(jobs, "requeue_stale_jobs", lambda seconds: asyncio.sleep(0, 0))
+        monkeypatch.setattr(jobs, "get_uploads_bucket", Bucket)
+        workers = ExtractionWorkers({UploadType.PDF: fail}, workers=1, poll_seconds=0.05)
+        await workers.start()
+        try:
+            await asyncio.wait_for(done.wait(), 1)
+        finally:
+            await workers.stop()
+
+        assert sorted(attempted) == ["job-0", "job-1"]
+
+    async def test_job_over_max_attempts_fails_without_processing(self, monkeypatch):
+        """Test that a job claimed too many times is marked failed and its upload removed"""
+        updates = []
+        deleted = []
+
+        async def update(job_id, **fields):
+            updates.append(fields)
+
+        async def never(job, content):
+            raise AssertionError("the processor must not run")
+
+        class Bucket:
+            async def delete(self, file_id):
+                deleted.append(str(file_id))
+
+        monkeypatch.setattr(jobs, "update_upload_job", update)
+        monkeypatch.setattr(jobs, "get_uploads_bucket", Bucket)
+        workers = ExtractionWorkers({UploadType.PDF: never}, workers=0, max_attempts=3)
+        await workers.process({"id": "job-1", "file_path": "0" * 24, "upload_type": "pdf", "attempts": 4})
+
+        assert updates[0]["processing_status"] == "failed"
+        assert updates[0]["error_message"] == "Gave up after 3 attempts"
+        assert deleted == ["0" * 24]
+
+    def test_job_response_hides_stored_upload(self, monkeypatch):
+        """Test that the GridFS id of the upload is not returned to clients"""
+        from fastapi.testclient import TestClient
+        import apis.Hermione.main as extractor
+        from main import app
+        from security.main import TokenData, get_current_user
+
+        class Uploads:
+            async def find_one(self, query, projection):
+                return {"id": str(uuid4()), "upload_type": "pdf", "file_path": "0" * 24, "created_by": "teacher"}
+
+        monkeypatch.setattr(extractor, "get_uploads_collection", Uploads)
+        monkeypatch.setitem(app.dependency_overrides, get_current_user, lambda: TokenData(username="teacher"))
+        response = TestClient(app).get("/question-extractor/jobs/job-1")
+
+        assert response.status_code == 200
+        assert "file_path" not in response.json()
+
+
+@pytest.mark.integration
+class TestExtractionJobs:
+
+    @pytest.fixture
+    async def question_db(self, monkeypatch):
+        monkeypatch.setenv("MONOGO_QUESTION_BANK_DB", "examcraft_extraction_jobs_test")
+        db = get_database("examcraft_extraction_jobs_test")
+        yield db
+        await db.client.drop_database(db.name)
+        await close_mongo_clients()
+
+    async def test_job_lifecycle(self, question_db):
+        """Test that a queued job is claimed once, processed and its upload removed"""
+        job = await create_upload_job(b"What is 2 + 2?", "paper.pdf", UploadType.PDF, "test")
+        claimed = await claim_next_job()
+
+        assert claimed["id"] == job["id"]
+        assert claimed["processing_status"] == "processing"
+        assert claimed["attempts"] == 1
+        assert await claim_next_job() is None
+
+        await ExtractionWorkers({UploadType.PDF: extract_two_questions}, workers=0).process(claimed)
+
+        stored = QuestionBankUpload(**await question_db.question_bank_uploads.find_one({"id": job["id"]}, {"_id": 0}))
+        assert stored.processing_status == "completed"
+        assert stored.questions_extracted == 2
+        assert stored.questions[0]["question_text"] == "What is 2 + 2?"
+        assert await question_db["uploads.files"].count_documents({}) == 0
+
+    async def test_failed_job_records_error(self, question_db):
+        """Test that a processor error marks the job failed with its message"""
+        job = await create_upload_job(b"%PDF", "paper.pdf", UploadType.PDF, "test")
+        await ExtractionWorkers({UploadType.PDF: fail_extraction}, workers=0).process(await claim_next_job())
+
+        stored = await question_db.question_bank_uploads.find_one({"id": job["id"]})
+        assert stored["processing_status"] == "failed"
+        assert stored["error_message"] == "unreadable PDF"
+
+    async def test_stale_jobs_are_queued_again(self, question_db):
+        """Test that jobs abandoned mid-processing go back to pending"""
+        job = await create_upload_job(b"%PDF", "paper.pdf", UploadType.PDF, "test")
+        await question_db.question_bank_uploads.update_one(
+            {"id": job["id"]},
+            {"$set": {"processing_status": "processing", "started_at": datetime.now() - timedelta(hours=1)}}
+        )
+
+        assert await requeue_stale_jobs(60) == 1
+        assert (await claim_next_job())["id"] == job["id"]
+
+    async def test_job_stopped_mid_processing_runs_again(self, question_db):
+        """Test that a job cancelled by stopping its worker is queued again and completed by the next one"""
+        job = await create_upload_job(b"What is 2 + 2?", "paper.pdf", UploadType.PDF, "test")
+        started = asyncio.Event()
+
+        async def hang(job, content):
+            started.set()
+            await asyncio.Event().wait()
+
+        workers = ExtractionWorkers({UploadType.PDF: hang}, workers=1, poll_seconds=0.05)
+        await workers.start()
+        await asyncio.wait_for(started.wait(), 5)
+        await workers.stop()
+
+        stored = await question_db.question_bank_uploads.find_one({"id": job["id"]})
+        assert stored["processing_status"] == "pending"
+        assert await question_db["uploads.files"].count_documents({}) == 1
+
+        workers = ExtractionWorkers({UploadType.PDF: extract_two_questions}, workers=1, poll_seconds=0.05)
+        await workers.start()
+        try:
+            for _ in range(100):
+                stored = await question_db.question_bank_uploads.find_one({"id": job["id"]})
+                if stored["processing_status"] == "completed":
+                    break
+                await asyncio.sleep(0.05)
+        finally:
+            await workers.stop()
+        assert stored["processing_status"] == "completed"
+        assert stored["questions_extracted"] == 2
@@ -0,0 +1,26 @@
+import pytest
+from apis.Ginny.indexes import INDEXES, compare_indexes
+
+@pytest.mark.unit
+class TestIndexRegistry:
+
+    def test_every_id_collection_has_unique_id_index(self):
+        """Test that collections looked up by `id` get a unique index on it"""
+        for collections in INDEXES.values():
+            for name, indexes in collections.items():
+                if name in ("users", "llm_rate_leases"):
+                    continue
+                id_indexes = [index.document for index in indexes if index.document["key"] == {"id": 1}]
+                assert id_indexes and id_indexes[0]["unique"], name
+
+    def test_compare_reports_missing_unregistered_and_unused(self):
+        """Test that the report splits indexes into missing, unregistered and unused"""
+        declared = INDEXES["MONGO_CURRICULUM_DB"]["standards"]
+        existing = {"_id_": {}, "id_unique": {}, "legacy_name": {}}
+        usage = {"_id_": 10, "id_unique": 42, "legacy_name": 0}
+
+        report = compare_indexes(declared, existing, usage)
+
+        assert report["missing"] == ["name_unique"]
+        assert report["unregistered"] == ["legacy_name"]
+        assert report["unused"] == ["legacy_name"]
@@ -0,0 +1,41 @@
+import pytest
+from apis.Ginny.metrics import Counter, Histogram, MetricsRegistry, track_llm_call, llm_request_failures_total
+
+@pytest.mark.unit
+class TestMetrics:
+
+    def test_counter_renders_labels(self):
+        """Test that counters render one sample per label set"""
+        registry = MetricsRegistry()
+        requests = registry.register(Counter("requests_total", "Requests", ["route"]))
+        requests.inc(route="/curriculum/standards")
+        requests.inc(2, route="/curriculum/standards")
+
+        output = registry.render()
+
+        assert "# TYPE requests_total counter" in output
+        assert 'requests_total{route="/curriculum/standards"} 3' in output
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test that histogram buckets, sum and count follow the exposition format"""
+        registry = MetricsRegistry()
+        latency = registry.register(Histogram("latency_seconds", "Latency", ["route"], buckets=(0.1, 1.0)))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.observe(value, route="/papers/generate")
+
+        output = registry.render()
+
+        assert 'latency_seconds_bucket{route="/papers/generate",le="0.1"} 2' in output
+        assert 'latency_seconds_bucket{route="/papers/generate",le="1"} 3' in output
+        assert 'latency_seconds_bucket{route="/papers/generate",le="+Inf"} 4' in output
+        assert 'latency_seconds_count{route="/papers/generate"} 4' in output
+        assert 'latency_seconds_sum{route="/papers/generate"} 3.65' in output
+
+    def test_llm_failures_are_counted(self):
+        """Test that an exception inside track_llm_call counts as a failure"""
+        failures = llm_request_failures_total._values.get(("gemini", "test-model", "error"), 0)
+        with pytest.raises(RuntimeError):
+            with track_llm_call("gemini", "test-model"):
+                raise RuntimeError("quota exceeded")
+
+        assert llm_request_failures_total._values[("gemini", "test-model", "error")] == failures + 1
@@ -0,0 +1,98 @@
+import asyncio
+import fitz
+import pytest
+import threading
+import apis.Hermione.main as extractor
+from io import BytesIO
+from fastapi import UploadFile
+from starlette.datastructures import Headers
+from apis.Hermione.extraction_cache import ExtractionCache, cache_key
+
+def pdf_bytes(pages):
+    with fitz.open() as document:
+        for _ in range(pages):
+            document.new_page()
+        return document.tobytes()
+
+@pytest.mark.unit
+class TestPageExtraction:
+
+    @pytest.fixture
+    def gemini(self, monkeypatch):
+        """Fake Gemini call recording how many pages are in flight at once"""
+        calls = {"in_flight": 0, "peak": 0, "started": 0}
+
+        async def extract(image, page_id, key):
+            calls["started"] += 1
+            calls["in_flight"] += 1
+            calls["peak"] = max(calls["peak"], calls["in_flight"])
+            try:
+                await asyncio.sleep(0.01)
+            finally:
+                calls["in_flight"] -= 1
+            return {"questions": [{"question_text": page_id, "image_required": False}]}
+
+        monkeypatch.setattr(extractor, "_extract_questions_from_image", extract)
+        monkeypatch.setattr(extractor, "extraction_cache", ExtractionCache(enabled=False))
+        monkeypatch.setattr(extractor, "GEMINI_CONCURRENCY", 2)
+        return calls
+
+    async def test_pages_share_concurrency_limit(self, gemini):
+        """Test that every page is extracted with no more Gemini calls in flight than the limit"""
+        pages = [page async for page, _, _ in extractor.iter_pdf_page_questions(pdf_bytes(7))]
+
+        assert sorted(pages) == list(range(1, 8))
+        assert gemini["peak"] == 2
+
+    async def test_closing_stream_cancels_queued_pages(self, gemini):
+        """Test that pages waiting for a slot are dropped once the consumer stops reading"""
+        pages = extractor.iter_pdf_page_questions(pdf_bytes(10))
+        await anext(pages)
+        await pages.aclose()
+
+        assert gemini["started"] < 10
+        assert gemini["in_flight"] == 0
+
+    async def test_disconnected_stream_cancels_queued_pages(self, gemini, monkeypatch):
+        """Test that closing the SSE stream early stops the pages still waiting for a slot"""
+        async def cleanup(data):
+            return data
+
+        monkeypatch.setattr(extractor, "GEMINI_API_KEY", "test")
+        monkeypatch.setattr(extractor, "get_checked_from_openai_response", cleanup)
+        upload = UploadFile(BytesIO(pdf_bytes(10)), filename="paper.pdf", headers=Headers({"content-type": "application/pdf"}))
+        response = await extractor.scan_pdf_stream(upload, None, {"username": "test"})
+        events = response.body_iterator
+        await anext(events)
+        await anext(events)
+        await events.aclose()
+
+        assert gemini["started"] < 10
+        assert gemini["in_flight"] == 0
+
+    async def test_slots_are_per_event_loop(self):
+        """Test that the Gemini slots are created for the running loop instead of at import"""
+        slots = extractor.get_gemini_slots()
+
+        assert extractor.get_gemini_slots() is slots
+        assert extractor._gemini_slots[asyncio.get_running_loop()] is slots
+
+    async def test_pages_are_rendered_off_the_event_loop(self, monkeypatch):
+        """Test that rasterising a PDF page runs in a worker thread"""
+        render_threads = []
+        render = extractor.render_page
+
+        def record_render(page):
+            render_threads.append(threading.current_thread())
+            return render(page)
+
+        cache = ExtractionCache(max_entries=10, ttl_days=1, enabled=True)
+        monkeypatch.setattr(extractor, "render_page", record_render)
+        monkeypatch.setattr(extractor, "extraction_cache", cache)
+        with fitz.open(stream=pdf_bytes(1), filetype="pdf") as document:
+            png = render(document[0])
+            cache._remember(cache_key(png, str(extractor.EXTRACTION_PROMPT_VERSION), extractor.GEMINI_MODEL), {"questions": []})
+            result = await extractor.extract_questions_from_image(document[0])
+
+        assert result == {"questions": []}
+        assert render_threads and render_threads[0] is not threading.main_thread()
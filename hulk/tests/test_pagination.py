@@ -0,0 +1,99 @@
+import json
+import pytest
+from datetime import datetime
+from fastapi import HTTPException
+from apis.Ginny.pagination import DEFAULT_PAGE_SIZE, PageParams, decode_cursor, encode_cursor, keyset_filter, paginate
+from apis.Harry.main import NAME_SORT
+from apis.Harry.models import StandardResponse
+from apis.Ron.main import PAPER_SORT
+
+@pytest.mark.unit
+class TestKeysetPagination:
+
+    def test_cursor_round_trips_datetimes(self):
+        """Test that cursors decode to the original sort values"""
+        values = {"created_at": datetime(2025, 3, 1, 9, 15, 30, 250000), "id": "abc"}
+
+        assert decode_cursor(encode_cursor(values)) == values
+
+    def test_invalid_cursor_is_rejected(self):
+        """Test that a tampered cursor returns 400 instead of a server error"""
+        with pytest.raises(HTTPException) as exc:
+            keyset_filter(PAPER_SORT, "not-a-cursor")
+        assert exc.value.status_code == 400
+
+        with pytest.raises(HTTPException):
+            keyset_filter(PAPER_SORT, encode_cursor({"name": "x"}))
+
+    def test_cursor_with_operator_values_is_rejected(self):
+        """Test that a cursor smuggling query operators or lists returns 400"""
+        for created_at in ({"$ne": None}, ["2025-03-01"]):
+            with pytest.raises(HTTPException) as exc:
+                keyset_filter(PAPER_SORT, encode_cursor({"created_at": created_at, "id": "p5"}))
+            assert exc.value.status_code == 400
+
+    def test_filter_continues_after_last_item(self):
+        """Test that the filter selects items after the cursor in descending order"""
+        created_at = datetime(2025, 3, 1)
+        cursor = encode_cursor({"created_at": created_at, "id": "p5"})
+
+        assert keyset_filter(PAPER_SORT, cursor) == {"$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "id": {"$lt": "p5"}},
+        ]}
+        assert keyset_filter(PAPER_SORT, None) == {}
+
+    def test_paginate_uses_extra_item_to_detect_next_page(self):
+        """Test that a next cursor is returned only when more items exist"""
+        items = [{"created_at": datetime(2025, 1, day), "id": f"p{day}"} for day in (3, 2, 1)]
+
+        page, cursor = paginate(list(items), PAPER_SORT, 2)
+        assert page == items[:2]
+        assert decode_cursor(cursor) == {"created_at": items[1]["created_at"], "id": "p2"}
+
+        page, cursor = paginate(items[:2], PAPER_SORT, 2)
+        assert cursor is None
+
+    async def test_fetch_defaults_to_one_page(self):
+        """Test that a request without limit gets the default page size and a next cursor"""
+
+        class FakeFind:
+            def __init__(self, documents):
+                self.documents = documents
+
+            def sort(self, sort):
+                return self
+
+            def limit(self, limit):
+                return FakeFind(self.documents[:limit])
+
+            async def to_list(self):
+                return self.documents
+
+        class FakeCollection:
+            def find(self, query, projection):
+                return FakeFind([{"id": f"s{i:03d}", "name": i} for i in range(DEFAULT_PAGE_SIZE * 2)])
+
+        page = PageParams(cursor=None, limit=DEFAULT_PAGE_SIZE, fields=None)
+        documents, cursor = await page.fetch(FakeCollection(), {}, NAME_SORT, {})
+
+        assert len(documents) == DEFAULT_PAGE_SIZE
+        assert decode_cursor(cursor) == {"name": DEFAULT_PAGE_SIZE - 1}
+
+    def test_fields_project_requested_fields_and_sort_keys(self):
+        """Test that fields= selects the id, the requested fields and the sort keys"""
+        page = PageParams(cursor=None, limit=DEFAULT_PAGE_SIZE, fields="description")
+
+        assert page.projection(StandardResponse, NAME_SORT) == {"id": 1, "description": 1, "name": 1, "_id": 0}
+
+        with pytest.raises(HTTPException) as exc:
+            PageParams(cursor=None, limit=DEFAULT_PAGE_SIZE, fields="password").projection(StandardResponse, NAME_SORT)
+        assert exc.value.status_code == 400
+
+    def test_respond_returns_only_requested_fields(self):
+        """Test that sort keys fetched for the cursor are dropped from partial documents"""
+        page = PageParams(cursor=None, limit=DEFAULT_PAGE_SIZE, fields="description")
+        response = page.respond([{"id": "s1", "name": 10, "description": "Tenth"}], StandardResponse, "abc")
+
+        assert json.loads(response.body) == [{"id": "s1", "description": "Tenth"}]
+        assert response.headers["X-Next-Cursor"] == "abc"
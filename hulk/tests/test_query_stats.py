@@ -0,0 +1,43 @@
+import pytest
+import logging
+from types import SimpleNamespace
+from apis.Ginny.query_stats import QueryStatsListener, start_request_stats, check_query_threshold
+
+def command_event(name, collection, duration=0):
+    return SimpleNamespace(
+        command_name=name,
+        command={name: collection},
+        database_name="examcraft",
+        duration_micros=duration
+    )
+
+@pytest.mark.unit
+class TestQueryStats:
+
+    def test_listener_counts_commands_and_round_trips(self):
+        """Test that cursor continuations count as round trips but not commands"""
+        stats = start_request_stats()
+        listener = QueryStatsListener()
+
+        for event in [command_event("find", "questions", 1500), command_event("getMore", 12345, 500)]:
+            listener.started(event)
+            listener.succeeded(event)
+
+        assert stats.commands == 1
+        assert stats.round_trips == 2
+        assert stats.headers()["X-DB-Time-Ms"] == "2.00"
+        assert stats.by_command == {"find questions": 1}
+
+    def test_threshold_warns_with_worst_offender(self, monkeypatch, caplog):
+        """Test that a request over the threshold logs its most repeated command"""
+        monkeypatch.setenv("MONGO_QUERY_WARN_THRESHOLD", "3")
+        stats = start_request_stats()
+        listener = QueryStatsListener()
+        for _ in range(5):
+            listener.started(command_event("count", "questions"))
+
+        with caplog.at_level(logging.WARNING):
+            check_query_threshold(stats, "GET", "/curriculum/tags")
+
+        assert "GET /curriculum/tags issued 5 MongoDB commands" in caplog.text
+        assert "count questions x5" in caplog.text
@@ -0,0 +1,220 @@
+import asyncio
+import pytest
+import time
+from types import SimpleNamespace
+from google.api_core.exceptions import ResourceExhausted
+from pymongo.errors import DuplicateKeyError
+from apis.Ginny import ratelimit
+from apis.Ginny.ratelimit import RateLimiter, TokenBucket, error_status, retry_after
+
+class ProviderError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers=headers or {})
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class FakeLeases:
+    """Lease collection with the unique (key, window) index of the real one"""
+
+    def __init__(self):
+        self.windows = {}
+
+    @staticmethod
+    def _matches(document, query):
+        for field, condition in query.items():
+            if isinstance(condition, dict):
+                if "$lt" in condition and not document.get(field, 0) < condition["$lt"]:
+                    return False
+                if "$lte" in condition and not document.get(field, 0) <= condition["$lte"]:
+                    return False
+            elif document.get(field) != condition:
+                return False
+        return True
+
+    async def update_one(self, query, update, upsert=False):
+        key = (query["key"], query["window"])
+        document = self.windows.get(key)
+        if document is None:
+            document = self.windows[key] = {"key": key[0], "window": key[1], **update.get("$setOnInsert", {})}
+        elif not self._matches(document, query):
+            # The upsert tries to insert a second document for the window
+            raise DuplicateKeyError("E11000 duplicate key error")
+        for field, amount in update["$inc"].items():
+            document[field] = document.get(field, 0) + amount
+
+def failing(*errors, result="ok"):
+    """Provider call raising the given errors in turn, then succeeding"""
+    calls = []
+
+    async def call():
+        calls.append(len(calls))
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+    return call, calls
+
+@pytest.mark.unit
+class TestTokenBucket:
+
+    def test_refills_at_per_minute_rate(self):
+        """Test that an empty bucket is refilled at one minute's quota per minute"""
+        clock = FakeClock()
+        bucket = TokenBucket(12, clock)
+        bucket.take(12)
+
+        assert bucket.wait_time(1) == pytest.approx(5)
+        clock.now = 5
+        assert bucket.wait_time(1) == 0
+
+    def test_oversized_request_waits_for_full_bucket(self):
+        """Test that a request larger than the bucket is not held back forever"""
+        clock = FakeClock()
+        bucket = TokenBucket(60, clock)
+        bucket.take(60)
+
+        assert bucket.wait_time(500) == pytest.approx(60)
+
+    async def test_usage_settlement_creates_debt(self):
+        """Test that tokens used beyond the estimate delay the next requests"""
+        clock = FakeClock()
+        limiter = RateLimiter("gemini", "test", requests_per_minute=60, tokens_per_minute=600, clock=clock)
+        limiter.tokens.take(600)
+        await limiter.record_usage(100, 400)
+
+        assert limiter.wait_time(60) == pytest.approx(36)
+
+
+@pytest.mark.unit
+class TestRateLimiter:
+
+    @pytest.fixture(autouse=True)
+    def fast_backoff(self, monkeypatch):
+        monkeypatch.setattr(ratelimit, "backoff_delay", lambda attempt: 0.01)
+
+    async def test_acquire_waits_for_quota(self):
+        """Test that a caller waits once the request bucket is empty"""
+        limiter = RateLimiter("gemini", "test", requests_per_minute=1200, tokens_per_minute=1_000_000)
+        limiter.requests.take(1200)
+        start = time.monotonic()
+        await limiter.acquire(1)
+
+        assert time.monotonic() - start >= 0.04
+
+    async def test_rate_limit_is_retried_and_pauses_limiter(self):
+        """Test that a 429 is retried after pausing every caller of the limiter"""
+        limiter = RateLimiter("gemini", "test", requests_per_minute=600, tokens_per_minute=1_000_000)
+        call, calls = failing(ProviderError(429))
+
+        assert await limiter.call(call) == "ok"
+        assert len(calls) == 2
+        assert limiter.paused_until > 0
+
+    async def test_server_error_is_retried(self):
+        """Test that 5xx responses are retried without pausing the limiter"""
+        limiter = RateLimiter("openai", "test", requests_per_minute=600, tokens_per_minute=1_000_000)
+        call, calls = failing(ProviderError(503), ProviderError(502))
+
+        assert await limiter.call(call) == "ok"
+        assert len(calls) == 3
+        assert limiter.paused_until == 0
+
+    async def test_client_error_is_not_retried(self):
+        """Test that errors other than 429 and 5xx are raised at once"""
+        limiter = RateLimiter("openai", "test", requests_per_minute=600, tokens_per_minute=1_000_000)
+        call, calls = failing(ProviderError(400))
+
+        with pytest.raises(ProviderError):
+            await limiter.call(call)
+        assert len(calls) == 1
+
+    async def test_gives_up_after_retries(self):
+        """Test that the last error is raised once the retries are used up"""
+        limiter = RateLimiter("openai", "test", requests_per_minute=600, tokens_per_minute=1_000_000)
+        call, calls = failing(*[ProviderError(500)] * 5)
+
+        with pytest.raises(ProviderError):
+            await limiter.call(call, retries=2)
+        assert len(calls) == 3
+
+    def test_reads_provider_errors(self):
+        """Test that statuses and Retry-After are read from Google and OpenAI errors"""
+        assert error_status(ResourceExhausted("quota")) == 429
+        assert error_status(ProviderError(503)) == 503
+        assert error_status(ValueError("bad json")) is None
+        assert retry_after(ProviderError(429, {"retry-after": "7"})) == 7
+        assert retry_after(ProviderError(429)) is None
+
+
+@pytest.mark.unit
+class TestSharedLeases:
+
+    @pytest.fixture
+    def leases(self, monkeypatch):
+        leases = FakeLeases()
+        monkeypatch.setattr(ratelimit, "get_leases_collection", lambda: leases)
+        return leases
+
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        """One fake clock for the buckets and the lease windows, advanced by sleeping"""
+        clock = FakeClock()
+        clock.sleeps = []
+        real_sleep = asyncio.sleep
+
+        async def sleep(seconds, result=None):
+            clock.sleeps.append(seconds)
+            clock.now += seconds
+            await real_sleep(0)
+
+        monkeypatch.setattr(ratelimit.asyncio, "sleep", sleep)
+        return clock
+
+    def limiter(self, clock, **limits):
+        return RateLimiter("gemini", "test", shared=True, clock=clock, wall_clock=clock, **limits)
+
+    async def test_full_window_waits_for_next_minute(self, leases, clock):
+        """Test that a request over the shared quota waits until the next minute's window"""
+        # Another process already used the whole minute
+        leases.windows[("gemini:test", 0)] = {"key": "gemini:test", "window": 0, "requests": 2, "tokens": 0}
+        limiter = self.limiter(clock, requests_per_minute=2, tokens_per_minute=1000)
+        await limiter.acquire(10)
+
+        assert clock.now >= 60
+        assert leases.windows[("gemini:test", 1)]["requests"] == 1
+        assert leases.windows[("gemini:test", 1)]["tokens"] == 10
+
+    async def test_token_quota_is_shared(self, leases, clock):
+        """Test that the shared window also refuses requests once its tokens are used"""
+        limiter = self.limiter(clock, requests_per_minute=100, tokens_per_minute=1000)
+        await limiter.acquire(600)
+        await limiter.acquire(600)
+
+        assert leases.windows[("gemini:test", 0)]["tokens"] == 600
+        assert leases.windows[("gemini:test", 1)]["tokens"] == 600
+
+    async def test_usage_is_settled_in_shared_window(self, leases, clock):
+        """Test that the difference between estimated and real tokens reaches the shared window"""
+        limiter = self.limiter(clock, requests_per_minute=100, tokens_per_minute=10000)
+        await limiter.acquire(100)
+        await limiter.record_usage(100, 400)
+
+        window = leases.windows[("gemini:test", 0)]
+        assert window["requests"] == 1
+        assert window["tokens"] == 400
+
+    async def test_settlement_opens_window_with_room_for_requests(self, leases, clock):
+        """Test that settling into a new minute leaves its request count usable"""
+        limiter = self.limiter(clock, requests_per_minute=100, tokens_per_minute=10000)
+        await limiter.record_usage(100, 50)
+        await limiter.acquire(10)
+
+        window = leases.windows[("gemini:test", 0)]
+        assert window["requests"] == 1
+        assert window["tokens"] == -40
@@ -0,0 +1,36 @@
+import json
+import pytest
+from bson import ObjectId
+from datetime import datetime
+from uuid import uuid4
+from fastapi.encoders import jsonable_encoder
+from apis.Ginny.responses import dumps, model_projection, sse_event, trusted_response
+from apis.Hermione.main import QuestionResponse
+
+@pytest.mark.unit
+class TestFastResponses:
+
+    def test_encoding_matches_default_encoder(self):
+        """Test that orjson output matches FastAPI's encoder for stored types"""
+        document = {"id": "q1", "created_at": datetime(2024, 5, 1, 10, 30, 0, 123000), "images": [uuid4()], "marks": 2}
+
+        assert json.loads(dumps(document)) == jsonable_encoder(document)
+
+    def test_trusted_response_strips_mongo_id(self):
+        """Test that the internal ObjectId never reaches the client"""
+        response = trusted_response([{"_id": ObjectId(), "id": "q1"}, {"_id": ObjectId(), "id": "q2"}])
+
+        assert json.loads(response.body) == [{"id": "q1"}, {"id": "q2"}]
+
+    def test_model_projection_covers_response_fields(self):
+        """Test that the projection selects every response field and excludes _id"""
+        projection = model_projection(QuestionResponse)
+
+        assert projection.pop("_id") == 0
+        assert set(projection) == set(QuestionResponse.model_fields)
+
+    def test_sse_event_format(self):
+        """Test that events are framed as one named Server-Sent Events message"""
+        message = sse_event("page", {"page": 1, "questions": []})
+
+        assert message == b'event: page\ndata: {"page":1,"questions":[]}\n\n'
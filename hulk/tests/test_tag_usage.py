@@ -0,0 +1,61 @@
+import pytest
+from datetime import datetime
+from apis.Ginny.utils import close_mongo_clients, get_database
+from apis.Harry.tags import adjust_tag_usage, count_tags, reconcile_tag_usage
+
+@pytest.mark.unit
+class TestTagCounting:
+
+    def test_count_tags_counts_each_question_once(self):
+        """Test that a tag repeated on one question only counts once"""
+        questions = [{"tags": ["a", "b", "a"]}, {"tags": ["a"]}, {"tags": None}, {}]
+
+        assert count_tags(questions) == {"a": 2, "b": 1}
+
+
+@pytest.mark.integration
+class TestTagReconciliation:
+
+    @pytest.fixture
+    async def databases(self, monkeypatch):
+        monkeypatch.setenv("MONGO_CURRICULUM_DB", "examcraft_tag_usage_curriculum_test")
+        monkeypatch.setenv("MONOGO_QUESTION_BANK_DB", "examcraft_tag_usage_questions_test")
+        curriculum_db = get_database("examcraft_tag_usage_curriculum_test")
+        question_db = get_database("examcraft_tag_usage_questions_test")
+        now = datetime.now()
+        await curriculum_db.tags.insert_many([
+            {"id": "t1", "name": "Important", "color": "#3498db", "usage_count": 0, "created_at": now, "created_by": "test"},
+            {"id": "t2", "name": "HOTS", "color": "#3498db", "usage_count": 7, "created_at": now, "created_by": "test"},
+        ])
+        await question_db.questions.insert_many([
+            {"id": "q1", "tags": ["t1"]},
+            {"id": "q2", "tags": ["t1", "t2"]},
+        ])
+        yield curriculum_db
+        await curriculum_db.client.drop_database(curriculum_db.name)
+        await question_db.client.drop_database(question_db.name)
+        await close_mongo_clients()
+
+    async def test_reconcile_fixes_drift(self, databases):
+        """Test that reconciliation sets every counter to the real usage"""
+        report = await reconcile_tag_usage()
+
+        assert report["fixed"] == 2
+        assert report["drift"]["t2"] == {"stored": 7, "actual": 1}
+        t1 = await databases.tags.find_one({"id": "t1"})
+        assert t1["usage_count"] == 2
+
+    async def test_reconcile_counts_duplicated_tag_once(self, databases):
+        """Test that a question listing a tag twice counts as one use, like the incremental counters"""
+        await get_database("examcraft_tag_usage_questions_test").questions.insert_one({"id": "q3", "tags": ["t2", "t2"]})
+        await reconcile_tag_usage()
+
+        t2 = await databases.tags.find_one({"id": "t2"})
+        assert t2["usage_count"] == 2
+
+    async def test_adjust_increments_atomically(self, databases):
+        """Test that adjusting a question's tags updates each counter once"""
+        await adjust_tag_usage(["t1", "t1", "unknown"], 1)
+
+        t1 = await databases.tags.find_one({"id": "t1"})
+        assert t1["usage_count"] == 1
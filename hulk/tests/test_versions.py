@@ -0,0 +1,89 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+import apis.Ginny.versions as versions
+from apis.Ginny.versions import conditional_get, etag_matches, make_etag
+from security.main import create_access_token
+
+def auth_headers(username="teacher"):
+    return {"Authorization": f"Bearer {create_access_token(data={'sub': username})}"}
+
+@pytest.mark.unit
+class TestConditionalGet:
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        from main import etag_middleware
+
+        current = {"standards": 3}
+        reads = []
+
+        async def fake_versions(collections):
+            reads.append(collections)
+            return {name: current.get(name, 0) for name in collections}
+
+        monkeypatch.setattr(versions, "get_versions", fake_versions)
+        app = FastAPI()
+        app.middleware("http")(etag_middleware)
+
+        @app.get("/standards", dependencies=[Depends(conditional_get("standards"))])
+        async def standards():
+            return [{"id": "std"}]
+
+        client = TestClient(app, headers=auth_headers())
+        client.current = current
+        client.reads = reads
+        return client
+
+    def test_etag_depends_on_url_and_versions(self):
+        """Test that ETags change with the query and with every collection version"""
+        base = make_etag("/tags?", {"tags": 1})
+
+        assert make_etag("/tags?", {"tags": 1}) == base
+        assert make_etag("/tags?limit=5", {"tags": 1}) != base
+        assert make_etag("/tags?", {"tags": 2}) != base
+        assert make_etag("/tags?", {"tags": 1}, "teacher") != base
+
+    def test_if_none_match_parsing(self):
+        """Test that lists, weak validators and the wildcard are matched"""
+        assert etag_matches('"a", W/"b"', '"b"')
+        assert etag_matches("*", '"b"')
+        assert not etag_matches("", '"b"')
+        assert not etag_matches('"a"', '"b"')
+
+    def test_unchanged_collection_returns_304(self, client):
+        """Test that revalidating an unchanged list skips the route"""
+        response = client.get("/standards")
+        etag = response.headers["etag"]
+        assert response.status_code == 200
+
+        revalidated = client.get("/standards", headers={"If-None-Match": etag})
+        assert revalidated.status_code == 304
+        assert revalidated.content == b""
+        assert revalidated.headers["etag"] == etag
+
+    def test_write_invalidates_etag(self, client):
+        """Test that a version bump makes the old ETag stale"""
+        etag = client.get("/standards").headers["etag"]
+        client.current["standards"] += 1
+
+        response = client.get("/standards", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+
+    def test_unauthenticated_request_gets_401_before_versions(self, client):
+        """Test that a matching ETag without a token is rejected without reading the versions"""
+        etag = client.get("/standards").headers["etag"]
+        client.reads.clear()
+
+        response = client.get("/standards", headers={"If-None-Match": etag, "Authorization": ""})
+        assert response.status_code == 401
+        assert client.reads == []
+
+    def test_etag_is_per_user(self, client):
+        """Test that one user's ETag does not validate another user's request"""
+        etag = client.get("/standards").headers["etag"]
+
+        response = client.get("/standards", headers={"If-None-Match": etag, **auth_headers("other")})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
@@ -0,0 +1,410 @@
+"""
+Synthetic data generator for load and scale testing.
+
+Generates curriculum trees, question types, tags, questions (with GridFS
+images for questions that require one) and question banks in the same
+document shapes the Harry create routes, create_question and
+create_question_bank write, inserted with bulk writes. Run from the hulk
+directory:
+
+    python -m tools.datagen --questions 200000 --banks 400 --image-ratio 0.05
+    python -m tools.datagen --db-prefix examcraft_load --drop --seed 42
+
+Without --db-prefix the databases configured in .env are used, so only
+run it against a local MongoDB.
+"""
+from datetime import datetime
+from io import BytesIO
+from uuid import UUID
+from PIL import Image, ImageDraw
+from collections import Counter
+from pymongo import InsertOne, UpdateOne
+import argparse
+import asyncio
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+DEFAULT_SCALE = {
+    "standards": 10,
+    "subjects": 60,
+    "chapters": 600,
+    "topics": 3_000,
+    "questions": 50_000,
+    "banks": 120,
+    "tags": 80,
+    "largest_bank": 2_000,
+}
+
+SUBJECTS = [
+    "Mathematics", "Science", "English", "Hindi", "Marathi", "History", "Geography", "Civics",
+    "Physics", "Chemistry", "Biology", "Computer Science", "Economics", "Environmental Studies",
+]
+
+CHAPTERS = {
+    "Mathematics": [
+        "Real Numbers", "Polynomials", "Linear Equations in Two Variables", "Quadratic Equations",
+        "Arithmetic Progressions", "Triangles", "Coordinate Geometry", "Trigonometry", "Circles",
+        "Mensuration", "Statistics", "Probability",
+    ],
+    "Science": [
+        "Chemical Reactions", "Acids, Bases and Salts", "Metals and Non-metals", "Life Processes",
+        "Control and Coordination", "Light", "Electricity", "Magnetic Effects of Current", "Our Environment",
+    ],
+    "Physics": ["Motion", "Force and Laws of Motion", "Gravitation", "Work and Energy", "Sound", "Optics", "Current Electricity"],
+    "Chemistry": ["Matter in Our Surroundings", "Atoms and Molecules", "Structure of the Atom", "Periodic Classification", "Carbon Compounds"],
+    "Biology": ["The Cell", "Tissues", "Diversity in Living Organisms", "Heredity and Evolution", "Reproduction"],
+    "Geography": ["Field Visit", "Location and Extent", "Physiography and Drainage", "Climate", "Natural Vegetation", "Population"],
+    "History": ["Historiography", "Applied History", "History of Indian Arts", "Mass Media and History", "Entertainment and History"],
+    "English": ["Prose", "Poetry", "Grammar", "Writing Skills", "Comprehension"],
+}
+
+TOPIC_PATTERNS = [
+    "Introduction to {chapter}", "Properties of {chapter}", "Applications of {chapter}",
+    "Problems on {chapter}", "{chapter} in Daily Life", "Advanced {chapter}",
+]
+
+QUESTION_TYPES = [
+    ("Multiple Choice", "Choose the correct option"),
+    ("True/False", "State whether the statement is true or false"),
+    ("Fill in the Blanks", "Complete the sentence"),
+    ("Short Answer", "Answer in two or three sentences"),
+    ("Long Answer", "Answer in detail"),
+]
+
+# Question type name -> (text templates, possible marks)
+QUESTION_TEMPLATES = {
+    "Multiple Choice": ([
+        "Which of the following best describes {topic}? \\newline (a) option one \\newline (b) option two \\newline (c) option three \\newline (d) option four",
+        "If $x^2 - {a}x + {b} = 0$, which of the following is a root? \\newline (a) ${a}$ \\newline (b) ${b}$ \\newline (c) $1$ \\newline (d) $0$",
+    ], [1]),
+    "True/False": ([
+        "State true or false: {topic} applies only to special cases.",
+        "State true or false: $\\sqrt{{{c}}}$ is a rational number.",
+    ], [1]),
+    "Fill in the Blanks": ([
+        "The \\dots is an important idea in {topic}.",
+        "The value of ${a} \\times {b}$ is \\dots.",
+    ], [1]),
+    "Short Answer": ([
+        "Define {topic} and give one example.",
+        "Find the value of $x$ if ${a}x + {b} = {c}$.",
+    ], [2, 3]),
+    "Long Answer": ([
+        "Explain {topic} in detail with a suitable example.",
+        "Prove that $\\frac{{{a}}}{{{b}}} + \\frac{{{b}}}{{{a}}} \\geq 2$ and discuss where {topic} is used.",
+    ], [4, 5]),
+}
+
+TAG_NAMES = [
+    "Important", "HOTS", "NCERT", "Previous Year", "Board Exam", "Conceptual", "Numerical",
+    "Diagram Based", "Application", "Revision", "Olympiad", "Competency Based",
+]
+TAG_COLORS = ["#3498db", "#e74c3c", "#2ecc71", "#f1c40f", "#9b59b6", "#1abc9c", "#e67e22"]
+DIFFICULTY_WEIGHTS = {"easy": 30, "medium": 50, "hard": 20}
+
+
+def _spread(parents, total):
+    """Assign `total` children round-robin over the parents"""
+    return [parents[i % len(parents)] for i in range(total)]
+
+
+def _node(rng, name, created_by, **fields):
+    return {
+        "name": name,
+        "description": None,
+        **fields,
+        "id": str(UUID(int=rng.getrandbits(128), version=4)),
+        "created_at": datetime.now(),
+        "created_by": created_by,
+    }
+
+
+def _unique_names(base_names, count):
+    """Cycle through base names, numbering repeats so siblings stay unique"""
+    names = []
+    for i in range(count):
+        base = base_names[i % len(base_names)]
+        round_number = i // len(base_names)
+        names.append(base if round_number == 0 else f"{base} {round_number + 1}")
+    return names
+
+
+def build_curriculum(rng: random.Random, scale: dict, created_by: str = "datagen") -> dict:
+    """Standards, subjects, chapters, topics, question types and tags"""
+    standards = [_node(rng, grade + 1, created_by, ancestors=[]) for grade in range(scale["standards"])]
+
+    subjects = []
+    subject_parents = _spread(standards, scale["subjects"])
+    for standard in standards:
+        count = sum(1 for parent in subject_parents if parent is standard)
+        for name in _unique_names(SUBJECTS, count):
+            subjects.append(_node(rng, name, created_by, standard_id=standard["id"], ancestors=[standard["id"]]))
+
+    chapters = []
+    chapter_parents = _spread(subjects, scale["chapters"]) if subjects else []
+    for subject in subjects:
+        count = sum(1 for parent in chapter_parents if parent is subject)
+        base_names = CHAPTERS.get(subject["name"].rsplit(" ", 1)[0], CHAPTERS.get(subject["name"], [f"{subject['name']} Unit"]))
+        for name in _unique_names(base_names, count):
+            chapters.append(_node(rng, name, created_by, subject_id=subject["id"], ancestors=[*subject["ancestors"], subject["id"]]))
+
+    topics = []
+    topic_parents = _spread(chapters, scale["topics"]) if chapters else []
+    for chapter in chapters:
+        count = sum(1 for parent in topic_parents if parent is chapter)
+        base_names = [pattern.format(chapter=chapter["name"]) for pattern in TOPIC_PATTERNS]
+        for name in _unique_names(base_names, count):
+            topics.append(_node(rng, name, created_by, chapter_id=chapter["id"], ancestors=[*chapter["ancestors"], chapter["id"]]))
+
+    question_types = [_node(rng, name, created_by, description=description) for name, description in QUESTION_TYPES]
+    tags = [
+        _node(rng, name, created_by, color=rng.choice(TAG_COLORS), usage_count=0)
+        for name in _unique_names(TAG_NAMES, scale["tags"])
+    ]
+
+    return {
+        "standards": standards,
+        "subjects": subjects,
+        "chapters": chapters,
+        "topics": topics,
+        "question_types": question_types,
+        "tags": tags,
+    }
+
+
+def build_question(rng: random.Random, topic: dict, chapter: dict, subject: dict, question_type: dict, tags: list, created_by: str = "datagen") -> dict:
+    """A question document as create_question stores it, without images"""
+    templates, marks = QUESTION_TEMPLATES.get(question_type["name"], QUESTION_TEMPLATES["Short Answer"])
+    a, b = rng.randint(2, 12), rng.randint(2, 40)
+    text = rng.choice(templates).format(topic=topic["name"].lower(), a=a, b=b, c=a * b + rng.randint(1, 9))
+    question_tags = [tag["id"] for tag in rng.sample(tags, k=rng.randint(0, min(3, len(tags))))]
+    return {
+        "id": str(UUID(int=rng.getrandbits(128), version=4)),
+        "question_text": text,
+        "question_type_id": question_type["id"],
+        "difficulty_level": rng.choices(list(DIFFICULTY_WEIGHTS), weights=list(DIFFICULTY_WEIGHTS.values()))[0],
+        "marks": rng.choice(marks),
+        "image_required": False,
+        "tags": question_tags or None,
+        "created_at": datetime.now(),
+        "updated_at": None,
+        "created_by": created_by,
+        "updated_by": None,
+        "topic_id": topic["id"],
+        "chapter_id": chapter["id"],
+        "subject_id": subject["id"],
+        "standard_id": subject["standard_id"],
+        "ancestors": [subject["standard_id"], subject["id"], chapter["id"], topic["id"]],
+        "images": [],
+    }
+
+
+def build_bank(rng: random.Random, standard: dict, subject: dict, set_number: int, created_by: str = "datagen") -> dict:
+    """A question bank as create_question_bank stores it, numbered when a subject has several"""
+    name = f"{standard['name']} - {subject['name']}"
+    if set_number > 1:
+        name = f"{name} (Set {set_number})"
+    now = datetime.now()
+    return {
+        "id": str(UUID(int=rng.getrandbits(128), version=4)),
+        "name": name,
+        "description": None,
+        "standard_id": standard["id"],
+        "subject_id": subject["id"],
+        "question_ids": [],
+        "created_at": now,
+        "updated_at": now,
+        "created_by": created_by,
+    }
+
+
+def bank_sizes(scale: dict) -> list:
+    """The first bank gets `largest_bank` questions, the rest share what is left"""
+    banks = scale["banks"]
+    largest = min(scale["largest_bank"], scale["questions"])
+    if banks == 1:
+        return [largest]
+    rest = scale["questions"] - largest
+    share, remainder = divmod(rest, banks - 1)
+    return [largest] + [share + (1 if i < remainder else 0) for i in range(banks - 1)]
+
+
+def render_diagram(rng: random.Random) -> bytes:
+    """A small PNG line diagram standing in for a scanned figure"""
+    image = Image.new("RGB", (320, 200), "white")
+    draw = ImageDraw.Draw(image)
+    points = [(rng.randint(10, 310), rng.randint(10, 190)) for _ in range(3)]
+    draw.polygon(points, outline="black")
+    draw.ellipse([rng.randint(10, 150), rng.randint(10, 90), rng.randint(170, 310), rng.randint(110, 190)], outline="blue")
+    buffer = BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+async def _attach_images(fs, rng, questions, created_by, concurrency=20):
+    """Store one GridFS image per question that requires it, the way create_question does"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def put(question, file_id, image_seed):
+        async with semaphore:
+            await fs.put(
+                render_diagram(random.Random(image_seed)),
+                filename=f"{question['id']}.png",
+                content_type="image/png",
+                question_id=question["id"],
+                uploaded_by=created_by,
+                uploaded_at=datetime.now(),
+                file_id=str(file_id),
+            )
+        question["images"] = [file_id]
+
+    # Draw everything random up front, the uploads finish in any order and
+    # must not change what a seed generates
+    draws = [(UUID(int=rng.getrandbits(128), version=4), rng.getrandbits(64)) for _ in questions]
+    await asyncio.gather(*(put(question, *draw) for question, draw in zip(questions, draws)))
+
+
+async def _bulk_insert(collection, documents, batch_size):
+    for start in range(0, len(documents), batch_size):
+        batch = documents[start:start + batch_size]
+        await collection.bulk_write([InsertOne(document) for document in batch], ordered=False)
+
+
+async def generate(
+    curriculum_db,
+    question_db,
+    scale: dict,
+    seed: int = None,
+    image_ratio: float = 0.0,
+    batch_size: int = 5_000,
+    created_by: str = "datagen",
+) -> dict:
+    """Generate and insert a full dataset, returning the number of documents per collection"""
+    from gridfs import AsyncGridFS
+    from apis.Harry.stats import STATS_COLLECTION, stat_changes, stat_operations
+
+    rng = random.Random(seed)
+    curriculum = build_curriculum(rng, scale, created_by)
+    for collection_name, documents in curriculum.items():
+        await _bulk_insert(curriculum_db[collection_name], documents, batch_size)
+
+    standards = {standard["id"]: standard for standard in curriculum["standards"]}
+    chapters = {chapter["id"]: chapter for chapter in curriculum["chapters"]}
+    topics_by_subject = {}
+    for topic in curriculum["topics"]:
+        topics_by_subject.setdefault(chapters[topic["chapter_id"]]["subject_id"], []).append(topic)
+    # Banks only go to subjects that have topics to draw questions from
+    bank_subjects = [subject for subject in curriculum["subjects"] if subject["id"] in topics_by_subject]
+    fs = AsyncGridFS(question_db)
+
+    counts = {name: len(documents) for name, documents in curriculum.items()}
+    counts.update({"questions": 0, "question_banks": 0, "images": 0})
+    banks = []
+    sets_per_subject = {}
+    pending = []
+    tag_usage = Counter()
+    node_stats = {}
+
+    async def flush():
+        with_images = [question for question in pending if question["image_required"]]
+        await _attach_images(fs, rng, with_images, created_by)
+        await _bulk_insert(question_db.questions, pending, batch_size)
+        stat_changes(pending, 1, node_stats)
+        counts["questions"] += len(pending)
+        counts["images"] += len(with_images)
+        pending.clear()
+
+    if bank_subjects:
+        for subject, size in zip(_spread(bank_subjects, scale["banks"]), bank_sizes(scale)):
+            sets_per_subject[subject["id"]] = sets_per_subject.get(subject["id"], 0) + 1
+            bank = build_bank(rng, standards[subject["standard_id"]], subject, sets_per_subject[subject["id"]], created_by)
+            for _ in range(size):
+                topic = rng.choice(topics_by_subject[subject["id"]])
+                question = build_question(
+                    rng, topic, chapters[topic["chapter_id"]], subject,
+                    rng.choice(curriculum["question_types"]), curriculum["tags"], created_by
+                )
+                question["image_required"] = rng.random() < image_ratio
+                bank["question_ids"].append(question["id"])
+                tag_usage.update(question["tags"] or [])
+                pending.append(question)
+                if len(pending) >= batch_size:
+                    await flush()
+            banks.append(bank)
+    if pending:
+        await flush()
+    await _bulk_insert(question_db.question_banks, banks, batch_size)
+    counts["question_banks"] = len(banks)
+
+    # Keep the stored tag counters consistent with the generated questions
+    if tag_usage:
+        await curriculum_db.tags.bulk_write(
+            [UpdateOne({"id": tag_id}, {"$set": {"usage_count": count}}) for tag_id, count in tag_usage.items()],
+            ordered=False
+        )
+    # Same for the per-node question statistics
+    operations = stat_operations(node_stats)
+    for start in range(0, len(operations), batch_size):
+        await curriculum_db[STATS_COLLECTION].bulk_write(operations[start:start + batch_size], ordered=False)
+    return counts
+
+
+def add_scale_arguments(parser: argparse.ArgumentParser, defaults: dict = None):
+    for key, value in (defaults or DEFAULT_SCALE).items():
+        parser.add_argument(f"--{key.replace('_', '-')}", dest=key, type=int, default=None, help=f"default {value}")
+
+
+def parse_scale(args, defaults: dict = None) -> dict:
+    scale = dict(defaults or DEFAULT_SCALE)
+    for key in scale:
+        value = getattr(args, key, None)
+        if value is not None:
+            scale[key] = value
+    return scale
+
+
+async def _main(args):
+    from apis.Ginny.utils import get_database, get_mongo_client, close_mongo_clients
+    from apis.Ginny.indexes import ensure_indexes
+
+    if args.db_prefix:
+        os.environ["MONGO_CURRICULUM_DB"] = f"{args.db_prefix}_curriculum"
+        os.environ["MONOGO_QUESTION_BANK_DB"] = f"{args.db_prefix}_question_bank"
+    curriculum_db = get_database(os.environ["MONGO_CURRICULUM_DB"])
+    question_db = get_database(os.environ["MONOGO_QUESTION_BANK_DB"])
+
+    try:
+        if args.drop:
+            client = get_mongo_client()
+            await client.drop_database(curriculum_db.name)
+            await client.drop_database(question_db.name)
+        await ensure_indexes()
+        counts = await generate(
+            curriculum_db, question_db, parse_scale(args),
+            seed=args.seed, image_ratio=args.image_ratio, batch_size=args.batch_size
+        )
+        print(counts)
+    finally:
+        await close_mongo_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic curriculum and question data")
+    add_scale_arguments(parser)
+    parser.add_argument("--image-ratio", type=float, default=0.0, help="Share of questions that get a GridFS image")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible data")
+    parser.add_argument("--batch-size", type=int, default=5_000)
+    parser.add_argument("--db-prefix", default=None, help="Write to <prefix>_curriculum and <prefix>_question_bank")
+    parser.add_argument("--drop", action="store_true", help="Drop the target databases first")
+    parser.add_argument(
+        "--yes-drop-configured-dbs", action="store_true",
+        help="Allow --drop without --db-prefix, dropping the databases named in .env"
+    )
+    args = parser.parse_args()
+    # Check if --drop would hit the application's own databases
+    if args.drop and not args.db_prefix and not args.yes_drop_configured_dbs:
+        parser.error("--drop without --db-prefix drops the databases configured in .env, pass --yes-drop-configured-dbs to confirm")
+    asyncio.run(_main(args))